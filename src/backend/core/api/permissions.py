@@ -12,6 +12,8 @@ from core.models import DocumentAccess, RoleChoices, get_trashbin_cutoff
 ACTION_FOR_METHOD_TO_PERMISSION = {
     "versions_detail": {"DELETE": "versions_destroy", "GET": "versions_retrieve"},
     "children": {"GET": "children_list", "POST": "children_create"},
+    "attachment_upload_start": {"POST": "attachment_upload"},
+    "attachment_upload_complete": {"POST": "attachment_upload"},
 }
 
 
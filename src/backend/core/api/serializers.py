@@ -18,6 +18,7 @@ from core.services.converter_services import (
     ConversionError,
     YdocConverter,
 )
+from core.services.import_services import DocumentImporter, DocumentImportError
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -257,31 +258,11 @@ class DocumentSerializer(ListDocumentSerializer):
         new_attachments = extracted_attachments - existing_attachments
 
         if new_attachments:
-            attachments_documents = (
-                models.Document.objects.filter(
-                    attachments__overlap=list(new_attachments)
-                )
-                .only("path", "attachments")
-                .order_by("path")
-            )
-
-            user = self.context["request"].user
-            readable_per_se_paths = (
-                models.Document.objects.readable_per_se(user)
-                .order_by("path")
-                .values_list("path", flat=True)
+            readable_attachments = set(
+                models.DocumentAttachment.objects.filter(key__in=new_attachments)
+                .readable(self.context["request"].user)
+                .values_list("key", flat=True)
             )
-            readable_attachments_paths = utils.filter_descendants(
-                [doc.path for doc in attachments_documents],
-                readable_per_se_paths,
-                skip_sorting=True,
-            )
-
-            readable_attachments = set()
-            for document in attachments_documents:
-                if document.path not in readable_attachments_paths:
-                    continue
-                readable_attachments.update(set(document.attachments) & new_attachments)
 
             # Update attachments with readable keys
             self.validated_data["attachments"] = list(
@@ -480,6 +461,68 @@ class ServerCreateDocumentSerializer(serializers.Serializer):
         raise NotImplementedError("Update is not supported for this serializer.")
 
 
+# Records of an import are only validated, they are created by the serializer of
+# the import
+# pylint: disable-next=abstract-method
+class ImportDocumentSerializer(serializers.Serializer):
+    """
+    Serializer for a document of a bulk import, identified by its "id" in the source of
+    the import and placed under the document of the same source with the "id" given as
+    "parent". Its content is markdown.
+    """
+
+    id = serializers.CharField(max_length=255)
+    parent = serializers.CharField(
+        max_length=255, required=False, allow_null=True, default=None
+    )
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    content = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class ServerImportDocumentsSerializer(serializers.Serializer):
+    """
+    Serializer for importing a tree of documents in bulk from a server-to-server request,
+    on behalf of an owner identified like in `ServerCreateDocumentSerializer`. No email
+    is sent to the owner.
+
+    Documents already imported under the same "import_key" are skipped so that an
+    interrupted import is resumed by sending the same documents again.
+    """
+
+    import_key = serializers.CharField(max_length=255)
+    documents = ImportDocumentSerializer(many=True, allow_empty=False)
+    # User
+    sub = serializers.CharField(
+        required=True, validators=[models.User.sub_validator], max_length=255
+    )
+    email = serializers.EmailField(required=True)
+
+    def create(self, validated_data):
+        """Import the documents and return the numbers of created and skipped ones."""
+        try:
+            user = models.User.objects.get_user_by_sub_or_email(
+                validated_data["sub"], validated_data["email"]
+            )
+        except models.DuplicateEmailError as err:
+            raise serializers.ValidationError({"email": [err.message]}) from err
+
+        importer = DocumentImporter(
+            validated_data["import_key"], user=user, email=validated_data["email"]
+        )
+        try:
+            created, skipped = importer.import_documents(validated_data["documents"])
+        except DocumentImportError as err:
+            raise serializers.ValidationError({"documents": [str(err)]}) from err
+
+        return {"created": created, "skipped": skipped}
+
+    def update(self, instance, validated_data):
+        """
+        This serializer does not support updates.
+        """
+        raise NotImplementedError("Update is not supported for this serializer.")
+
+
 class LinkDocumentSerializer(serializers.ModelSerializer):
     """
     Serialize link configuration for documents.
@@ -515,6 +558,44 @@ class DocumentDuplicationSerializer(serializers.Serializer):
         raise NotImplementedError("This serializer does not support updating.")
 
 
+def get_attachment_type(file_name, mime_type):
+    """
+    Return the extension under which an attachment is stored and whether it is unsafe,
+    given its file name and the MIME type of its content.
+    """
+    extension = file_name.rpartition(".")[-1] if "." in file_name else None
+
+    is_unsafe = False
+    if settings.DOCUMENT_ATTACHMENT_CHECK_UNSAFE_MIME_TYPES_ENABLED:
+        is_unsafe = mime_type in settings.DOCUMENT_UNSAFE_MIME_TYPES
+
+        extension_mime_type, _ = mimetypes.guess_type(file_name)
+
+        # Try guessing a coherent extension from the mimetype
+        if extension_mime_type != mime_type:
+            is_unsafe = True
+
+    guessed_ext = mimetypes.guess_extension(mime_type)
+    # Missing extensions or extensions longer than 5 characters (it's as long as an extension
+    # can be) are replaced by the extension we eventually guessed from mimetype.
+    if (extension is None or len(extension) > 5) and guessed_ext:
+        extension = guessed_ext[1:]
+
+    if extension is None:
+        raise serializers.ValidationError("Could not determine file extension.")
+
+    return extension, is_unsafe
+
+
+def validate_attachment_size(size):
+    """Check that the size of an attachment does not exceed the limit set in settings."""
+    if size > settings.DOCUMENT_IMAGE_MAX_SIZE:
+        max_size = settings.DOCUMENT_IMAGE_MAX_SIZE // (1024 * 1024)
+        raise serializers.ValidationError(
+            f"File size exceeds the maximum limit of {max_size:d} MB."
+        )
+
+
 # Suppress the warning about not implementing `create` and `update` methods
 # since we don't use a model and only rely on the serializer for validation
 # pylint: disable=abstract-method
@@ -525,40 +606,16 @@ class FileUploadSerializer(serializers.Serializer):
 
     def validate_file(self, file):
         """Add file size and type constraints as defined in settings."""
-        # Validate file size
-        if file.size > settings.DOCUMENT_IMAGE_MAX_SIZE:
-            max_size = settings.DOCUMENT_IMAGE_MAX_SIZE // (1024 * 1024)
-            raise serializers.ValidationError(
-                f"File size exceeds the maximum limit of {max_size:d} MB."
-            )
-
-        extension = file.name.rpartition(".")[-1] if "." in file.name else None
+        validate_attachment_size(file.size)
 
         # Read the first few bytes to determine the MIME type accurately
         mime = magic.Magic(mime=True)
         magic_mime_type = mime.from_buffer(file.read(1024))
         file.seek(0)  # Reset file pointer to the beginning after reading
-        self.context["is_unsafe"] = False
-        if settings.DOCUMENT_ATTACHMENT_CHECK_UNSAFE_MIME_TYPES_ENABLED:
-            self.context["is_unsafe"] = (
-                magic_mime_type in settings.DOCUMENT_UNSAFE_MIME_TYPES
-            )
-
-            extension_mime_type, _ = mimetypes.guess_type(file.name)
 
-            # Try guessing a coherent extension from the mimetype
-            if extension_mime_type != magic_mime_type:
-                self.context["is_unsafe"] = True
-
-        guessed_ext = mimetypes.guess_extension(magic_mime_type)
-        # Missing extensions or extensions longer than 5 characters (it's as long as an extension
-        # can be) are replaced by the extension we eventually guessed from mimetype.
-        if (extension is None or len(extension) > 5) and guessed_ext:
-            extension = guessed_ext[1:]
-
-        if extension is None:
-            raise serializers.ValidationError("Could not determine file extension.")
+        extension, is_unsafe = get_attachment_type(file.name, magic_mime_type)
 
+        self.context["is_unsafe"] = is_unsafe
         self.context["expected_extension"] = extension
         self.context["content_type"] = magic_mime_type
         self.context["file_name"] = file.name
@@ -574,6 +631,44 @@ class FileUploadSerializer(serializers.Serializer):
         return attrs
 
 
+class AttachmentUploadStartSerializer(serializers.Serializer):
+    """
+    Receive requests to upload a file directly to object storage. The type of the file
+    is declared by the client and checked against its content once uploaded.
+    """
+
+    file_name = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=255)
+
+    def validate_size(self, size):
+        """Add file size constraints as defined in settings."""
+        validate_attachment_size(size)
+        return size
+
+    def validate(self, attrs):
+        """Add the extension under which the file is stored and whether it is unsafe."""
+        attrs["expected_extension"], attrs["is_unsafe"] = get_attachment_type(
+            attrs["file_name"], attrs["content_type"]
+        )
+        return attrs
+
+
+class AttachmentUploadPartSerializer(serializers.Serializer):
+    """Receive a part of a file uploaded directly to object storage."""
+
+    part_number = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField(max_length=255)
+
+
+class AttachmentUploadCompleteSerializer(serializers.Serializer):
+    """Receive requests to complete the upload of a file directly to object storage."""
+
+    key = serializers.CharField(max_length=255)
+    upload_id = serializers.CharField(max_length=1024)
+    parts = AttachmentUploadPartSerializer(many=True, allow_empty=False)
+
+
 class TemplateSerializer(serializers.ModelSerializer):
     """Serialize templates."""
 
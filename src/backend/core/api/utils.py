@@ -1,7 +1,11 @@
 """Util to generate S3 authorization headers for object storage access control"""
 
+import functools
+import hashlib
+import hmac
 import time
 from abc import ABC, abstractmethod
+from urllib.parse import quote, urlsplit
 
 from django.conf import settings
 from django.core.cache import cache
@@ -11,16 +15,20 @@ import botocore
 from rest_framework.throttling import BaseThrottle
 
 
-def nest_tree(flat_list, steplen):
+def nest_tree(flat_list, steplen, skip_sorting=False):
     """
     Convert a flat list of serialized documents into a nested tree making advantage
     of the`path` field and its step length.
+
+    Documents already ordered by path, e.g. by the database, can be nested as they
+    come by skipping sorting.
     """
     node_dict = {}
     roots = []
 
     # Sort the flat list by path to ensure parent nodes are processed first
-    flat_list.sort(key=lambda x: x["path"])
+    if not skip_sorting:
+        flat_list.sort(key=lambda x: x["path"])
 
     for node in flat_list:
         node["children"] = []  # Initialize children list
@@ -63,6 +71,96 @@ def filter_root_paths(paths, skip_sorting=False):
     return root_paths
 
 
+SIGV4_ALGORITHM = "AWS4-HMAC-SHA256"
+# Attachments are fetched with GET requests, which have no payload
+EMPTY_PAYLOAD_SHA256 = hashlib.sha256(b"").hexdigest()
+KEY_PLACEHOLDER = "KEY"
+
+
+@functools.lru_cache(maxsize=16)
+def get_sigv4_signing_key(secret_key, date_stamp, region, service):
+    """
+    Derive the SigV4 key signing the requests of a day to a service in a region. It
+    is the same for all the requests of the day so it is derived once and cached.
+    """
+    signing_key = f"AWS4{secret_key:s}".encode()
+    for message in (date_stamp, region, service, "aws4_request"):
+        signing_key = hmac.new(signing_key, message.encode(), hashlib.sha256).digest()
+    return signing_key
+
+
+@functools.lru_cache(maxsize=16)
+def get_s3_object_url_template(bucket_name):
+    """
+    Return the parts of the url of the objects of a bucket before and after their
+    key, and the host it targets, so that the url of an object is built without
+    asking the client of the storage to resolve it.
+    """
+    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
+        "get_object",
+        ExpiresIn=0,
+        Params={"Bucket": bucket_name, "Key": KEY_PLACEHOLDER},
+    )
+    prefix, _placeholder, suffix = url.rpartition(KEY_PLACEHOLDER)
+
+    parts = urlsplit(url)
+    host = parts.netloc
+    if (parts.scheme, parts.port) in {("http", 80), ("https", 443)}:
+        host = parts.hostname
+    return prefix, suffix, host
+
+
+def sign_s3_get_request(url, host, timestamp, credentials, region):
+    """
+    Sign a GET request to object storage with SigV4, as `botocore.auth.S3SigV4Auth`
+    does, and return the headers to add to the request.
+    """
+    amz_date = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(timestamp))
+    headers = {"X-Amz-Date": amz_date, "X-Amz-Content-SHA256": EMPTY_PAYLOAD_SHA256}
+    if credentials.token:
+        headers["X-Amz-Security-Token"] = credentials.token
+
+    signed_headers = {"host": host, **{k.lower(): v for k, v in headers.items()}}
+    signed_names = ";".join(sorted(signed_headers))
+    canonical_request = "\n".join(
+        [
+            "GET",
+            urlsplit(url).path,
+            "",
+            *(f"{name:s}:{signed_headers[name]:s}" for name in sorted(signed_headers)),
+            "",
+            signed_names,
+            EMPTY_PAYLOAD_SHA256,
+        ]
+    )
+
+    scope = f"{amz_date[:8]:s}/{region:s}/s3/aws4_request"
+    string_to_sign = "\n".join(
+        [
+            SIGV4_ALGORITHM,
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ]
+    )
+    signing_key = get_sigv4_signing_key(
+        credentials.secret_key, amz_date[:8], region, "s3"
+    )
+    signature = hmac.new(
+        signing_key, string_to_sign.encode(), hashlib.sha256
+    ).hexdigest()
+
+    headers["Authorization"] = (
+        f"{SIGV4_ALGORITHM:s} Credential={credentials.access_key:s}/{scope:s}, "
+        f"SignedHeaders={signed_names:s}, Signature={signature:s}"
+    )
+    return headers
+
+
+# Headers signed for the same object within a window of time are the same
+sign_s3_get_request_cached = functools.lru_cache(maxsize=1024)(sign_s3_get_request)
+
+
 def generate_s3_authorization_headers(key):
     """
     Generate authorization headers for an s3 object.
@@ -72,23 +170,30 @@ def generate_s3_authorization_headers(key):
       with cookies)
     - access control is truly realtime
     - the object storage service does not need to be exposed on internet
+
+    The url of the object is built from a template of the urls of the bucket and the
+    signing key of the day is cached. When MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT is set,
+    the headers of an object are signed once per window of that many seconds.
     """
-    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
-        "get_object",
-        ExpiresIn=0,
-        Params={"Bucket": default_storage.bucket_name, "Key": key},
-    )
-    request = botocore.awsrequest.AWSRequest(method="get", url=url)
+    prefix, suffix, host = get_s3_object_url_template(default_storage.bucket_name)
+    url = f"{prefix:s}{quote(key, safe='/~'):s}{suffix:s}"
 
     s3_client = default_storage.connection.meta.client
     # pylint: disable=protected-access
     credentials = s3_client._request_signer._credentials  # noqa: SLF001
     frozen_credentials = credentials.get_frozen_credentials()
     region = s3_client.meta.region_name
-    auth = botocore.auth.S3SigV4Auth(frozen_credentials, "s3", region)
-    auth.add_auth(request)
 
-    return request
+    timestamp = int(time.time())
+    window = settings.MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT
+    if window > 0:
+        headers = sign_s3_get_request_cached(
+            url, host, timestamp - timestamp % window, frozen_credentials, region
+        )
+    else:
+        headers = sign_s3_get_request(url, host, timestamp, frozen_credentials, region)
+
+    return botocore.awsrequest.AWSRequest(method="get", url=url, headers=dict(headers))
 
 
 class AIBaseRateThrottle(BaseThrottle, ABC):
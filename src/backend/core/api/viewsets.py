@@ -13,16 +13,18 @@ from django.contrib.postgres.search import TrigramSimilarity
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
-from django.db import connection, transaction
 from django.db import models as db
+from django.db import transaction
 from django.db.models.expressions import RawSQL
-from django.db.models.functions import Left, Length
+from django.db.models.functions import Coalesce
 from django.http import Http404, StreamingHttpResponse
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.text import capfirst, slugify
 from django.utils.translation import gettext_lazy as _
 
+import magic
 import requests
 import rest_framework as drf
 from botocore.exceptions import ClientError
@@ -38,7 +40,7 @@ from core import authentication, choices, enums, models
 from core.services.ai_services import AIService
 from core.services.collaboration_services import CollaborationService
 from core.tasks.mail import send_ask_for_access_mail
-from core.utils import extract_attachments, filter_descendants
+from core.utils import extract_attachments
 
 from . import permissions, serializers, utils
 from .filters import DocumentFilter, ListDocumentFilter
@@ -135,6 +137,138 @@ class Pagination(drf.pagination.PageNumberPagination):
     page_size_query_param = "page_size"
 
 
+# DRF paginators keep the state of the page being paginated on their instance
+# pylint: disable-next=too-many-instance-attributes
+class CursorPagination(drf.pagination.CursorPagination):
+    """
+    Keyset pagination on the ordering of the queryset, opted in by passing a `cursor`.
+
+    Pages are fetched by filtering on the values of the ordering fields of the last
+    document seen instead of counting and skipping all the documents before them, so
+    the cost of a page does not depend on its position and no count is computed.
+    The primary key is added to the ordering as a tie-breaker unless it is already
+    unique, and nullable fields are compared as empty strings.
+    """
+
+    max_page_size = 200
+    ordering = "path"
+    page_size_query_param = "page_size"
+    unique_fields = ("id", "path")
+
+    def __init__(self):
+        super().__init__()
+        self.request = None
+        self.base_url = None
+        self.cursor = None
+        self.fields = []
+        self.page = []
+        self.has_next = self.has_previous = False
+
+    def get_ordering(self, request, queryset, view):
+        """Follow the ordering of the queryset and make it unique."""
+        ordering = [
+            field for field in queryset.query.order_by if isinstance(field, str)
+        ] or [self.ordering]
+
+        if not any(field.lstrip("-") in self.unique_fields for field in ordering):
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Fetch the page of documents following or preceding the cursor position."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        is_reversed = self.cursor is not None and self.cursor.reverse
+
+        self.fields = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if queryset.model._meta.get_field(name).null:  # noqa: SLF001
+                queryset = queryset.annotate(
+                    **{f"cursor_{name:s}": Coalesce(name, db.Value(""))}
+                )
+                name = f"cursor_{name:s}"
+            self.fields.append((name, field.startswith("-")))
+
+        queryset = queryset.order_by(
+            *(
+                f"-{name:s}" if descending != is_reversed else name
+                for name, descending in self.fields
+            )
+        )
+        if self.cursor is not None and self.cursor.position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(is_reversed))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+        has_position = self.cursor is not None and self.cursor.position is not None
+
+        if is_reversed:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_position, has_more
+        else:
+            self.has_next, self.has_previous = has_more, has_position
+
+        return self.page
+
+    def get_keyset_filter(self, is_reversed):
+        """
+        Filter documents coming after the cursor position in the ordering, or before
+        it when paginating in reverse: (a > x) OR (a = x AND b > y) OR ...
+        """
+        try:
+            position = json.loads(self.cursor.position)
+        except ValueError as excpt:
+            raise drf.exceptions.NotFound(self.invalid_cursor_message) from excpt
+        if not isinstance(position, list) or len(position) != len(self.fields):
+            raise drf.exceptions.NotFound(self.invalid_cursor_message)
+
+        clauses = []
+        equalities = {}
+        for (name, descending), value in zip(self.fields, position, strict=True):
+            lookup = "lt" if descending != is_reversed else "gt"
+            clauses.append(db.Q(**equalities, **{f"{name:s}__{lookup:s}": value}))
+            equalities[name] = value
+
+        return db.Q(*clauses, _connector=db.Q.OR)
+
+    def get_cursor_position(self, document):
+        """Encode the values of the ordering fields for a document."""
+        return json.dumps([str(getattr(document, name)) for name, _ in self.fields])
+
+    def get_next_link(self):
+        """Return the link to the page following the last document of this page."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            drf.pagination.Cursor(
+                offset=0,
+                reverse=False,
+                position=self.get_cursor_position(self.page[-1]),
+            )
+        )
+
+    def get_previous_link(self):
+        """Return the link to the page preceding the first document of this page."""
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            drf.pagination.Cursor(
+                offset=0,
+                reverse=True,
+                position=self.get_cursor_position(self.page[0]),
+            )
+        )
+
+
 class UserListThrottleBurst(UserRateThrottle):
     """Throttle for the user list endpoint."""
 
@@ -343,6 +477,16 @@ class DocumentViewSet(
         - GET /api/v1.0/documents/?is_creator_me=true&is_favorite=true
         - GET /api/v1.0/documents/?is_creator_me=false&title=hello
 
+    ### Pagination:
+        Lists are paginated by page number by default. Passing a `cursor` query
+        parameter (empty for the first page) switches to keyset pagination: pages are
+        linked by `next` and `previous` cursors, no count is computed, and the cost
+        of a page does not depend on how deep it is in the list.
+
+        Example:
+        - GET /api/v1.0/documents/?cursor=&ordering=-updated_at
+        - GET /api/v1.0/documents/{id}/children/?cursor=
+
     ### Annotations:
     1. **is_favorite**: Indicates whether the document is marked as favorite by the current user.
     2. **user_roles**: Roles the current user has on the document or its ancestors.
@@ -368,14 +512,29 @@ class DocumentViewSet(
     trashbin_serializer_class = serializers.ListDocumentSerializer
     tree_serializer_class = serializers.ListDocumentSerializer
 
+    @property
+    def paginator(self):
+        """Switch to keyset pagination when the client passes a cursor."""
+        if (
+            not hasattr(self, "_paginator")
+            and CursorPagination.cursor_query_param in self.request.query_params
+        ):
+            # The paginator is memoized on the view as GenericAPIView.paginator does
+            # pylint: disable-next=attribute-defined-outside-init
+            self._paginator = CursorPagination()
+        return super().paginator
+
     def get_queryset(self):
         """Get queryset performing all annotation and filtering on the document tree structure."""
         user = self.request.user
         queryset = super().get_queryset()
 
-        # Only list views need filtering and annotation
+        # Only list views need filtering. Detail views fetch the document along with
+        # the links of its ancestors, while list views resolve them in bulk for each
+        # page. The number of accesses of the document is served from its cache, or
+        # counted in a single query when it is missing.
         if self.detail:
-            return queryset
+            return queryset.annotate_ancestors_links()
 
         if not user.is_authenticated:
             return queryset.none()
@@ -412,11 +571,25 @@ class DocumentViewSet(
         """Return paginated response for the queryset if requested."""
         context = context or self.get_serializer_context()
         page = self.paginate_queryset(queryset)
+        documents = list(queryset) if page is None else page
+
+        # Fetch links of all the documents' ancestors in one query and pass them to
+        # the serializer as a context variable instead of querying them per document
+        if context.get("paths_links_mapping") is None:
+            context["paths_links_mapping"] = models.Document.get_paths_links_mapping(
+                document.path for document in documents
+            )
+
+        # Compute abilities on all documents at once instead of once per document
+        models.Document.prefetch_abilities(
+            documents, self.request.user, context["paths_links_mapping"]
+        )
+        models.Document.prefetch_nb_accesses(documents)
+
+        serializer = self.get_serializer(documents, many=True, context=context)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True, context=context)
         return drf.response.Response(serializer.data)
 
     def list(self, request, *args, **kwargs):
@@ -443,15 +616,10 @@ class DocumentViewSet(
         for field in ["is_creator_me", "title"]:
             queryset = filterset.filters[field].filter(queryset, filter_data[field])
 
-        queryset = queryset.annotate_user_roles(user)
-
         # Among the results, we may have documents that are ancestors/descendants
         # of each other. In this case we want to keep only the highest ancestors.
-        root_paths = utils.filter_root_paths(
-            queryset.order_by("path").values_list("path", flat=True),
-            skip_sorting=True,
-        )
-        queryset = queryset.filter(path__in=root_paths)
+        queryset = queryset.filter_highest_ancestors()
+        queryset = queryset.annotate_user_roles(user)
 
         # Annotate favorite status and filter if applicable as late as possible
         queryset = queryset.annotate_is_favorite(user)
@@ -489,15 +657,10 @@ class DocumentViewSet(
 
     @transaction.atomic
     def perform_create(self, serializer):
-        """Set the current user as creator and owner of the newly created object."""
-
-        # locks the table to ensure safe concurrent access
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f'LOCK TABLE "{models.Document._meta.db_table}" '  # noqa: SLF001
-                "IN SHARE ROW EXCLUSIVE MODE;"
-            )
-
+        """
+        Set the current user as creator and owner of the newly created object.
+        Paths of root documents are allocated from a sequence so no lock is needed.
+        """
         obj = models.Document.add_root(
             creator=self.request.user,
             **serializer.validated_data,
@@ -640,13 +803,6 @@ class DocumentViewSet(
         Create a document on behalf of a specified owner (pre-existing user or invited).
         """
 
-        # locks the table to ensure safe concurrent access
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f'LOCK TABLE "{models.Document._meta.db_table}" '  # noqa: SLF001
-                "IN SHARE ROW EXCLUSIVE MODE;"
-            )
-
         # Deserialize and validate the data
         serializer = serializers.ServerCreateDocumentSerializer(data=request.data)
         if not serializer.is_valid():
@@ -660,6 +816,27 @@ class DocumentViewSet(
             {"id": str(document.id)}, status=status.HTTP_201_CREATED
         )
 
+    @drf.decorators.action(
+        authentication_classes=[authentication.ServerToServerAuthentication],
+        detail=False,
+        methods=["post"],
+        permission_classes=[],
+        url_path="import",
+    )
+    def import_documents(self, request):
+        """
+        Import a tree of documents in bulk on behalf of a specified owner (pre-existing
+        user or invited). Documents are created by batches, each in its own transaction,
+        so that an interrupted import can be resumed.
+        """
+        serializer = serializers.ServerImportDocumentsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return drf_response.Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return drf_response.Response(serializer.save(), status=status.HTTP_201_CREATED)
+
     @drf.decorators.action(detail=True, methods=["post"])
     @transaction.atomic
     def move(self, request, *args, **kwargs):
@@ -767,13 +944,9 @@ class DocumentViewSet(
             )
             serializer.is_valid(raise_exception=True)
 
+            # The path of the child is allocated without locking the parent
             with transaction.atomic():
-                # "select_for_update" locks the table to ensure safe concurrent access
-                locked_parent = models.Document.objects.select_for_update().get(
-                    pk=document.pk
-                )
-
-                child_document = locked_parent.add_child(
+                child_document = document.add_child(
                     creator=request.user,
                     **serializer.validated_data,
                 )
@@ -845,51 +1018,44 @@ class DocumentViewSet(
         except models.Document.DoesNotExist as excpt:
             raise drf.exceptions.NotFound() from excpt
 
-        ancestors = (
-            (current_document.get_ancestors() | self.queryset.filter(pk=pk))
-            .filter(ancestors_deleted_at__isnull=True)
-            .order_by("path")
-        )
+        queryset = self.queryset.tree(current_document, user)
+        queryset = queryset.annotate_user_roles(user)
+        queryset = queryset.annotate_is_favorite(user)
+        documents = list(queryset.order_by("path"))
 
-        # Get the highest readable ancestor
-        highest_readable = (
-            ancestors.readable_per_se(request.user).only("depth", "path").first()
+        highest_readable_depth = (
+            documents[0].highest_readable_depth if documents else None
         )
-        if highest_readable is None:
+        if highest_readable_depth is None:
             raise (
                 drf.exceptions.PermissionDenied()
                 if request.user.is_authenticated
                 else drf.exceptions.NotAuthenticated()
             )
+
+        # Compute cache for ancestors links to avoid many queries while computing
+        # abilities for his documents in the tree!
         paths_links_mapping = {}
         ancestors_links = []
-        children_clause = db.Q()
-        for ancestor in ancestors:
-            # Compute cache for ancestors links to avoid many queries while computing
-            # abilities for his documents in the tree!
-            ancestors_links.append(
-                {"link_reach": ancestor.link_reach, "link_role": ancestor.link_role}
-            )
-            paths_links_mapping[ancestor.path] = ancestors_links.copy()
-
-            if ancestor.depth < highest_readable.depth:
-                continue
-
-            children_clause |= db.Q(
-                path__startswith=ancestor.path, depth=ancestor.depth + 1
-            )
-
-        children = self.queryset.filter(children_clause, deleted_at__isnull=True)
+        for document in documents:
+            if current_document.path.startswith(document.path):
+                ancestors_links.append(
+                    {"link_reach": document.link_reach, "link_role": document.link_role}
+                )
+                paths_links_mapping[document.path] = ancestors_links.copy()
 
-        queryset = ancestors.filter(depth__gte=highest_readable.depth) | children
-        queryset = queryset.order_by("path")
-        queryset = queryset.annotate_user_roles(user)
-        queryset = queryset.annotate_is_favorite(user)
+        documents = [
+            document
+            for document in documents
+            if document.depth >= highest_readable_depth
+        ]
+        models.Document.prefetch_abilities(documents, user, paths_links_mapping)
+        models.Document.prefetch_nb_accesses(documents)
 
         # Pass ancestors' links paths mapping to the serializer as a context variable
         # in order to allow saving time while computing abilities on the instance
         serializer = self.get_serializer(
-            queryset,
+            documents,
             many=True,
             context={
                 "request": request,
@@ -897,7 +1063,9 @@ class DocumentViewSet(
             },
         )
         return drf.response.Response(
-            utils.nest_tree(serializer.data, self.queryset.model.steplen)
+            utils.nest_tree(
+                serializer.data, self.queryset.model.steplen, skip_sorting=True
+            )
         )
 
     @drf.decorators.action(
@@ -1001,7 +1169,7 @@ class DocumentViewSet(
         # document. Filter to get the minimum access date for the logged-in user
         access_queryset = models.DocumentAccess.objects.filter(
             db.Q(user=user) | db.Q(team__in=user.teams),
-            document__path=Left(db.Value(document.path), Length("document__path")),
+            document__path__in=document.get_ancestors_paths(),
         ).aggregate(min_date=db.Min("created_at"))
 
         # Handle the case where the user has no accesses
@@ -1041,7 +1209,7 @@ class DocumentViewSet(
             access.created_at
             for access in models.DocumentAccess.objects.filter(
                 db.Q(user=user) | db.Q(team__in=user.teams),
-                document__path=Left(db.Value(document.path), Length("document__path")),
+                document__path__in=document.get_ancestors_paths(),
             )
         )
 
@@ -1075,6 +1243,8 @@ class DocumentViewSet(
         serializer.is_valid(raise_exception=True)
 
         serializer.save()
+        # Decisions to serve attachments of the subtree depend on its link settings
+        document.invalidate_accesses_cache()
 
         # Notify collaboration server about the link updated
         CollaborationService().reset_connections(str(document.id))
@@ -1118,39 +1288,34 @@ class DocumentViewSet(
             status=drf.status.HTTP_200_OK,
         )
 
-    @drf.decorators.action(detail=True, methods=["post"], url_path="attachment-upload")
-    def attachment_upload(self, request, *args, **kwargs):
-        """Upload a file related to a given document"""
-        # Check permissions first
-        document = self.get_object()
-
-        # Validate metadata in payload
-        serializer = serializers.FileUploadSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        # Generate a generic yet unique filename to store the image in object storage
+    @staticmethod
+    def _prepare_attachment(document, user, validated_data):
+        """
+        Generate a generic yet unique key to store an attachment in object storage and
+        the metadata to store it with.
+        """
         file_id = uuid.uuid4()
-        ext = serializer.validated_data["expected_extension"]
+        ext = validated_data["expected_extension"]
 
         # Prepare metadata for storage
         extra_args = {
             "Metadata": {
-                "owner": str(request.user.id),
+                "owner": str(user.id),
                 "status": enums.DocumentAttachmentStatus.PROCESSING,
             },
-            "ContentType": serializer.validated_data["content_type"],
+            "ContentType": validated_data["content_type"],
         }
         file_unsafe = ""
-        if serializer.validated_data["is_unsafe"]:
+        if validated_data["is_unsafe"]:
             extra_args["Metadata"]["is_unsafe"] = "true"
             file_unsafe = "-unsafe"
 
         key = f"{document.key_base}/{enums.ATTACHMENTS_FOLDER:s}/{file_id!s}{file_unsafe}.{ext:s}"
 
-        file_name = serializer.validated_data["file_name"]
+        file_name = validated_data["file_name"]
         if (
-            not serializer.validated_data["content_type"].startswith("image/")
-            or serializer.validated_data["is_unsafe"]
+            not validated_data["content_type"].startswith("image/")
+            or validated_data["is_unsafe"]
         ):
             extra_args.update(
                 {"ContentDisposition": f'attachment; filename="{file_name:s}"'}
@@ -1160,12 +1325,14 @@ class DocumentViewSet(
                 {"ContentDisposition": f'inline; filename="{file_name:s}"'}
             )
 
-        file = serializer.validated_data["file"]
-        default_storage.connection.meta.client.upload_fileobj(
-            file, default_storage.bucket_name, key, ExtraArgs=extra_args
-        )
+        return key, extra_args
 
-        # Make the attachment readable by document readers
+    @staticmethod
+    def _register_attachment(document, key):
+        """
+        Make an uploaded attachment readable by document readers, analyse it and return
+        the url where its status can be checked.
+        """
         document.attachments.append(key)
         document.save()
 
@@ -1176,14 +1343,207 @@ class DocumentViewSet(
             kwargs={"pk": document.id},
         )
         parameters = urlencode({"key": key})
+        return f"{url:s}?{parameters:s}"
+
+    @drf.decorators.action(detail=True, methods=["post"], url_path="attachment-upload")
+    def attachment_upload(self, request, *args, **kwargs):
+        """Upload a file related to a given document"""
+        # Check permissions first
+        document = self.get_object()
+
+        # Validate metadata in payload
+        serializer = serializers.FileUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        key, extra_args = self._prepare_attachment(
+            document, request.user, serializer.validated_data
+        )
+
+        file = serializer.validated_data["file"]
+        default_storage.connection.meta.client.upload_fileobj(
+            file,
+            default_storage.bucket_name,
+            key,
+            ExtraArgs=extra_args,
+            Config=default_storage.transfer_config,
+        )
+
+        models.Attachment.objects.create(
+            key=key,
+            document=document,
+            creator=request.user if request.user.is_authenticated else None,
+            size=file.size,
+            content_type=serializer.validated_data["content_type"],
+        )
+
+        return drf.response.Response(
+            {"file": self._register_attachment(document, key)},
+            status=drf.status.HTTP_201_CREATED,
+        )
+
+    @drf.decorators.action(
+        detail=True, methods=["post"], url_path="attachment-upload-start"
+    )
+    def attachment_upload_start(self, request, *args, **kwargs):
+        """
+        Reserve a key for a file related to a given document and return presigned urls
+        to upload its parts directly to object storage, without going through the API.
+        The upload is then completed on the "attachment-upload-complete" endpoint.
+        """
+        document = self.get_object()
+
+        serializer = serializers.AttachmentUploadStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        key, extra_args = self._prepare_attachment(
+            document, request.user, serializer.validated_data
+        )
+
+        attachment = models.Attachment.objects.create(
+            key=key,
+            document=document,
+            creator=request.user if request.user.is_authenticated else None,
+            status=enums.DocumentAttachmentStatus.UPLOADING,
+            size=serializer.validated_data["size"],
+            content_type=serializer.validated_data["content_type"],
+        )
+
+        # Object storage requires parts of at least 5MB, except for the last one
+        part_size = max(settings.AWS_S3_MULTIPART_CHUNKSIZE, 5 * 2**20)
+        nb_parts = -(-serializer.validated_data["size"] // part_size)
+
+        s3_client = default_storage.connection.meta.client
+        try:
+            upload_id = s3_client.create_multipart_upload(
+                Bucket=default_storage.bucket_name, Key=key, **extra_args
+            )["UploadId"]
+            parts = [
+                {
+                    "part_number": part_number,
+                    "url": s3_client.generate_presigned_url(
+                        "upload_part",
+                        Params={
+                            "Bucket": default_storage.bucket_name,
+                            "Key": key,
+                            "UploadId": upload_id,
+                            "PartNumber": part_number,
+                        },
+                        ExpiresIn=settings.DOCUMENT_ATTACHMENT_UPLOAD_EXPIRATION,
+                    ),
+                }
+                for part_number in range(1, nb_parts + 1)
+            ]
+        except Exception:
+            attachment.abort_upload()
+            raise
 
         return drf.response.Response(
             {
-                "file": f"{url:s}?{parameters:s}",
+                "key": key,
+                "upload_id": upload_id,
+                "part_size": part_size,
+                "parts": parts,
             },
             status=drf.status.HTTP_201_CREATED,
         )
 
+    @drf.decorators.action(
+        detail=True, methods=["post"], url_path="attachment-upload-complete"
+    )
+    def attachment_upload_complete(self, request, *args, **kwargs):
+        """
+        Complete the upload of a file uploaded directly to object storage, check that its
+        content matches the type and size declared when its upload started and register
+        it as attachment of the document.
+        """
+        document = self.get_object()
+
+        serializer = serializers.AttachmentUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = serializer.validated_data["key"]
+
+        attachment = models.Attachment.objects.filter(
+            key=key,
+            document=document,
+            status=enums.DocumentAttachmentStatus.UPLOADING,
+        ).first()
+        # Claim the upload so that concurrent requests can't complete it again
+        if attachment is None or not models.Attachment.objects.filter(
+            pk=attachment.pk, status=enums.DocumentAttachmentStatus.UPLOADING
+        ).update(
+            status=enums.DocumentAttachmentStatus.PROCESSING,
+            updated_at=timezone.now(),
+        ):
+            raise drf.exceptions.ValidationError({"key": ["Upload not found."]})
+
+        s3_client = default_storage.connection.meta.client
+        try:
+            s3_client.complete_multipart_upload(
+                Bucket=default_storage.bucket_name,
+                Key=key,
+                UploadId=serializer.validated_data["upload_id"],
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                        for part in sorted(
+                            serializer.validated_data["parts"],
+                            key=lambda part: part["part_number"],
+                        )
+                    ]
+                },
+            )
+        except ClientError as err:
+            logger.warning("Failed to complete upload of %s: %s", key, err)
+            attachment.abort_upload()
+            raise drf.exceptions.ValidationError(
+                {"upload_id": ["Upload could not be completed."]}
+            ) from err
+
+        # Read the first few bytes to determine the MIME type accurately
+        try:
+            head = s3_client.get_object(
+                Bucket=default_storage.bucket_name, Key=key, Range="bytes=0-1023"
+            )
+        except ClientError as err:
+            # The file is missing or empty, which can't match what was declared
+            logger.warning("Failed to read uploaded file %s: %s", key, err)
+            size = mime_type = None
+        else:
+            size = int(head["ContentRange"].rpartition("/")[-1])
+            mime_type = magic.Magic(mime=True).from_buffer(head["Body"].read())
+
+        if size != attachment.size or mime_type != attachment.content_type:
+            s3_client.delete_object(Bucket=default_storage.bucket_name, Key=key)
+            attachment.delete()
+            raise drf.exceptions.ValidationError(
+                {"file": ["File does not match the type and size declared."]}
+            )
+
+        return drf.response.Response(
+            {"file": self._register_attachment(document, key)},
+            status=drf.status.HTTP_201_CREATED,
+        )
+
+    @staticmethod
+    def _get_attachment_status(key):
+        """
+        Return the processing status of an attachment. The status of files uploaded
+        before attachments were recorded is read in the metadata of their file in
+        object storage, or is an empty string if the file has none.
+        """
+        attachment_status = (
+            models.Attachment.objects.filter(key=key)
+            .values_list("status", flat=True)
+            .first()
+        )
+        if attachment_status is not None:
+            return attachment_status
+
+        head_resp = default_storage.connection.meta.client.head_object(
+            Bucket=default_storage.bucket_name, Key=key
+        )
+        return head_resp.get("Metadata", {}).get("status", "")
+
     def _auth_get_original_url(self, request):
         """
         Extracts and parses the original URL from the "HTTP_X_ORIGINAL_URL" header.
@@ -1239,42 +1599,43 @@ class DocumentViewSet(
         user = request.user
         key = f"{url_params['pk']:s}/{url_params['attachment']:s}"
 
-        # Look for a document to which the user has access and that includes this attachment
-        # We must look into all descendants of any document to which the user has access per se
-        readable_per_se_paths = (
-            self.queryset.readable_per_se(user)
-            .order_by("path")
-            .values_list("path", flat=True)
-        )
-
-        attachments_documents = (
-            self.queryset.filter(attachments__contains=[key])
-            .only("path")
-            .order_by("path")
-        )
-        readable_attachments_paths = filter_descendants(
-            [doc.path for doc in attachments_documents],
-            readable_per_se_paths,
-            skip_sorting=True,
-        )
+        # Whether the user can read the attachment and its status may be cached
+        slots, decisions = models.DocumentAttachment.get_cached_decisions(key, user)
+        new_decisions = {}
+
+        # Look for a document that includes this attachment and to which the user has
+        # access, directly or through one of its ancestors
+        is_readable = decisions.get("readable")
+        if is_readable is None:
+            is_readable = new_decisions["readable"] = (
+                models.DocumentAttachment.objects.filter(key=key)
+                .readable(user)
+                .exists()
+            )
 
-        if not readable_attachments_paths:
+        if not is_readable:
+            models.DocumentAttachment.cache_decisions(slots, new_decisions)
             logger.debug("User '%s' lacks permission for attachment", user)
             raise drf.exceptions.PermissionDenied()
 
         # Check if the attachment is ready
-        s3_client = default_storage.connection.meta.client
-        bucket_name = default_storage.bucket_name
-        try:
-            head_resp = s3_client.head_object(Bucket=bucket_name, Key=key)
-        except ClientError as err:
-            raise drf.exceptions.PermissionDenied() from err
-        metadata = head_resp.get("Metadata", {})
+        attachment_status = decisions.get("status")
+        if attachment_status is None:
+            try:
+                attachment_status = new_decisions["status"] = (
+                    self._get_attachment_status(key)
+                )
+            except ClientError as err:
+                models.DocumentAttachment.cache_decisions(slots, new_decisions)
+                raise drf.exceptions.PermissionDenied() from err
+
+        models.DocumentAttachment.cache_decisions(slots, new_decisions)
+
         # In order to be compatible with existing upload without `status` metadata,
         # we consider them as ready.
         if (
-            metadata.get("status", enums.DocumentAttachmentStatus.READY)
-            != enums.DocumentAttachmentStatus.READY
+            attachment_status
+            and attachment_status != enums.DocumentAttachmentStatus.READY
         ):
             raise drf.exceptions.PermissionDenied()
 
@@ -1304,22 +1665,25 @@ class DocumentViewSet(
             )
 
         # Check if the attachment is ready
-        s3_client = default_storage.connection.meta.client
-        bucket_name = default_storage.bucket_name
-        try:
-            head_resp = s3_client.head_object(Bucket=bucket_name, Key=key)
-        except ClientError as err:
-            logger.error("Client Error fetching file %s metadata: %s", key, err)
-            return drf.response.Response(
-                {"detail": "Media not found"},
-                status=drf.status.HTTP_404_NOT_FOUND,
+        slots, decisions = models.DocumentAttachment.get_cached_decisions(key)
+        attachment_status = decisions.get("status")
+        if attachment_status is None:
+            try:
+                attachment_status = self._get_attachment_status(key)
+            except ClientError as err:
+                logger.error("Client Error fetching file %s metadata: %s", key, err)
+                return drf.response.Response(
+                    {"detail": "Media not found"},
+                    status=drf.status.HTTP_404_NOT_FOUND,
+                )
+            models.DocumentAttachment.cache_decisions(
+                slots, {"status": attachment_status}
             )
-        metadata = head_resp.get("Metadata", {})
 
         body = {
-            "status": metadata.get("status", enums.DocumentAttachmentStatus.PROCESSING),
+            "status": attachment_status or enums.DocumentAttachmentStatus.PROCESSING,
         }
-        if metadata.get("status") == enums.DocumentAttachmentStatus.READY:
+        if attachment_status == enums.DocumentAttachmentStatus.READY:
             body = {
                 "status": enums.DocumentAttachmentStatus.READY,
                 "file": f"{settings.MEDIA_URL:s}{key:s}",
@@ -0,0 +1,89 @@
+"""
+Cache of the content of documents in front of object storage.
+
+Contents are addressed by the id of their document and their ETag (the MD5 hash of
+the content) so that an entry never needs to be invalidated: saving a new content
+changes the ETag stored on the document and thus the key it is looked up with.
+Entries are kept in a bounded in-process LRU tier and, optionally, in the shared
+cache so that other processes can benefit from them.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by the total size of its values.
+
+    Values are strings, which are measured by their length: the content of documents
+    is base64 encoded so it is also their size in bytes.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def get(self, key):
+        """Return the value stored for a key, marking it as recently used."""
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key, value, max_size):
+        """Store a value and evict the least recently used ones beyond max_size."""
+        if len(value) > max_size:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self.size += len(value)
+
+            while self.size > max_size:
+                _key, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+local_cache = LRUCache()
+
+
+def get_cache_key(document_id, etag):
+    """Generate the key under which the content of a document is cached."""
+    return f"document_{document_id!s}_content_{etag:s}"
+
+
+def get_content(document_id, etag):
+    """Return the content of a document for an ETag if it is cached in any tier."""
+    key = get_cache_key(document_id, etag)
+
+    content = local_cache.get(key)
+    if content is None and settings.DOCUMENT_CONTENT_CACHE_TIMEOUT > 0:
+        content = cache.get(key)
+        if content is not None:
+            local_cache.set(key, content, settings.DOCUMENT_CONTENT_CACHE_MAX_SIZE)
+
+    return content
+
+
+def set_content(document_id, etag, content):
+    """Store the content of a document for an ETag in all the enabled tiers."""
+    key = get_cache_key(document_id, etag)
+
+    local_cache.set(key, content, settings.DOCUMENT_CONTENT_CACHE_MAX_SIZE)
+    if settings.DOCUMENT_CONTENT_CACHE_TIMEOUT > 0:
+        cache.set(key, content, settings.DOCUMENT_CONTENT_CACHE_TIMEOUT)
@@ -44,5 +44,6 @@ class MoveNodePositionChoices(models.TextChoices):
 class DocumentAttachmentStatus(StrEnum):
     """Defines the possible statuses for an attachment."""
 
+    UPLOADING = "uploading"
     PROCESSING = "processing"
     READY = "ready"
@@ -3,11 +3,12 @@
 import logging
 
 from django.core.files.storage import default_storage
+from django.utils import timezone
 
 from lasuite.malware_detection.enums import ReportStatus
 
 from core.enums import DocumentAttachmentStatus
-from core.models import Document
+from core.models import Attachment, Document, DocumentAttachment
 
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("docs.security")
@@ -16,9 +17,18 @@ security_logger = logging.getLogger("docs.security")
 def malware_detection_callback(file_path, status, error_info, **kwargs):
     """Malware detection callback"""
 
+    # The status of the file changes whatever the verdict
+    DocumentAttachment.invalidate_cache([file_path])
+
     if status == ReportStatus.SAFE:
         logger.info("File %s is safe", file_path)
-        # Get existing metadata
+        if Attachment.objects.filter(key=file_path).update(
+            status=DocumentAttachmentStatus.READY, updated_at=timezone.now()
+        ):
+            return
+
+        # Files uploaded before attachments were recorded hold their status in the
+        # metadata of their file: get existing metadata
         s3_client = default_storage.connection.meta.client
         bucket_name = default_storage.bucket_name
         head_resp = s3_client.head_object(Bucket=bucket_name, Key=file_path)
@@ -50,3 +60,4 @@ def malware_detection_callback(file_path, status, error_info, **kwargs):
 
     # Delete the file from the storage
     default_storage.delete(file_path)
+    Attachment.objects.filter(key=file_path).delete()
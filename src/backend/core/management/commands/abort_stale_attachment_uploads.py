@@ -0,0 +1,45 @@
+"""
+Management command aborting the direct uploads of attachments that were started but
+never completed, so that their parts are not kept in object storage.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.enums import DocumentAttachmentStatus
+from core.models import Attachment
+
+
+class Command(BaseCommand):
+    """Abort the uploads of attachments started before a delay and not completed."""
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        """Define command arguments."""
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.DOCUMENT_ATTACHMENT_UPLOAD_EXPIRATION,
+            help=(
+                "Number of seconds after which an upload is stale, by default the "
+                "validity of the urls issued to upload its parts."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        stale_attachments = Attachment.objects.filter(
+            status=DocumentAttachmentStatus.UPLOADING,
+            created_at__lt=timezone.now() - timedelta(seconds=options["older_than"]),
+        )
+
+        count = 0
+        for attachment in stale_attachments.iterator():
+            attachment.abort_upload()
+            count += 1
+
+        self.stdout.write(f"[INFO] Aborted {count:d} stale uploads of attachments.")
@@ -0,0 +1,176 @@
+"""
+Management command comparing the query plans of ancestors lookups before and after
+expanding document paths into the explicit list of their ancestors' paths.
+"""
+
+from django.contrib.postgres.fields import ArrayField
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models.functions import Left, Length
+
+from core.models import (
+    AncestorsPaths,
+    Document,
+    DocumentAccess,
+    DocumentSubtreeRole,
+)
+
+BENCHMARK_TEAM = "benchmark"
+
+# Roots start with "Z" to avoid colliding with paths of existing documents
+CREATE_TREE_SQL = """
+WITH RECURSIVE tree (path, depth) AS (
+    SELECT 'Z' || lpad(step::text, %(root_steplen)s, '0'), 1
+    FROM generate_series(1, %(fanout)s) AS step
+    UNION ALL
+    SELECT tree.path || lpad(step::text, %(steplen)s, '0'), tree.depth + 1
+    FROM tree, generate_series(1, %(fanout)s) AS step
+    WHERE tree.depth < %(depth)s
+)
+INSERT INTO {document_table} (
+    id, created_at, updated_at, title, link_reach, link_role,
+    depth, numchild, path, has_deleted_children, content_etag
+)
+SELECT
+    gen_random_uuid(), now(), now(), 'Benchmark', 'restricted', 'reader',
+    depth, CASE WHEN depth < %(depth)s THEN %(fanout)s ELSE 0 END, path, false, ''
+FROM tree
+"""
+
+CREATE_ACCESSES_SQL = """
+INSERT INTO {access_table} (id, created_at, updated_at, team, role, document_id)
+SELECT gen_random_uuid(), now(), now(), %(team)s, 'reader', id
+FROM {document_table}
+WHERE path LIKE 'Z%%' AND depth <= %(access_depth)s
+"""
+
+CREATE_SUBTREE_ROLES_SQL = """
+INSERT INTO {subtree_role_table} (access_id, document_id, path, team, role)
+SELECT access.id, document.id, document.path, access.team, access.role
+FROM {access_table} AS access
+JOIN {document_table} AS document ON document.id = access.document_id
+WHERE access.team = %(team)s
+"""
+
+
+class Command(BaseCommand):
+    """
+    Create a synthetic tree of documents in a transaction that is rolled back, and
+    print the query plans of ancestors lookups with a prefix comparison (before) and
+    with the explicit list of ancestors' paths (after).
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        """Define command arguments."""
+        parser.add_argument(
+            "--fanout",
+            type=int,
+            default=10,
+            help="Number of children of each document in the tree.",
+        )
+        parser.add_argument(
+            "--depth",
+            type=int,
+            default=6,
+            help="Depth of the tree (1,111,110 documents with the default fanout).",
+        )
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        fanout = options["fanout"]
+        depth = options["depth"]
+
+        with transaction.atomic():
+            self.create_tree(fanout, depth)
+
+            document = Document.objects.filter(path__startswith="Z", depth=depth).last()
+            page = Document.objects.filter(path__startswith="Z", depth=depth)[:20]
+
+            self.compare(
+                "Roles of a user on a document (get_role)",
+                DocumentSubtreeRole.objects.filter(
+                    team__in=[BENCHMARK_TEAM],
+                    path=Left(models.Value(document.path), Length("path")),
+                ),
+                DocumentSubtreeRole.objects.filter(
+                    team__in=[BENCHMARK_TEAM],
+                    path__in=document.get_ancestors_paths(),
+                ),
+            )
+            self.compare(
+                "Accesses on a document and its ancestors (get_nb_accesses)",
+                DocumentAccess.objects.filter(
+                    document__path=Left(
+                        models.Value(document.path), Length("document__path")
+                    ),
+                ),
+                DocumentAccess.objects.filter(
+                    document__path__in=document.get_ancestors_paths(),
+                ),
+            )
+            self.compare(
+                "Roles of a user on a page of documents (annotate_user_roles)",
+                self.annotate_user_roles(
+                    page, Left(models.OuterRef("path"), Length("path"))
+                ),
+                self.annotate_user_roles(
+                    page,
+                    AncestorsPaths(
+                        models.OuterRef("path"),
+                        Document.steplen,
+                        Document._meta.get_field("path").max_length,  # noqa: SLF001
+                    ),
+                    lookup="in",
+                ),
+            )
+
+            transaction.set_rollback(True)
+
+    def create_tree(self, fanout, depth):
+        """Create a tree of documents with accesses on its first levels."""
+        tables = {
+            "document_table": Document._meta.db_table,  # noqa: SLF001
+            "access_table": DocumentAccess._meta.db_table,  # noqa: SLF001
+            "subtree_role_table": DocumentSubtreeRole._meta.db_table,  # noqa: SLF001
+        }
+        params = {
+            "fanout": fanout,
+            "depth": depth,
+            "steplen": Document.steplen,
+            "root_steplen": Document.steplen - 1,
+            "team": BENCHMARK_TEAM,
+            "access_depth": max(depth // 2, 1),
+        }
+
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_TREE_SQL.format(**tables), params)
+            self.stdout.write(f"[INFO] Created {cursor.rowcount:d} documents.")
+            cursor.execute(CREATE_ACCESSES_SQL.format(**tables), params)
+            self.stdout.write(f"[INFO] Created {cursor.rowcount:d} accesses.")
+            cursor.execute(CREATE_SUBTREE_ROLES_SQL.format(**tables), params)
+            for table in tables.values():
+                cursor.execute(f"ANALYZE {table:s}")
+
+    @staticmethod
+    def annotate_user_roles(queryset, paths, lookup="exact"):
+        """Annotate roles of the benchmark team as `annotate_user_roles` does."""
+        user_roles_subquery = DocumentSubtreeRole.objects.filter(
+            **{"team__in": [BENCHMARK_TEAM], f"path__{lookup:s}": paths}
+        ).values_list("role", flat=True)
+        return queryset.annotate(
+            user_roles=models.Func(
+                user_roles_subquery,
+                function="ARRAY",
+                output_field=ArrayField(base_field=models.CharField()),
+            )
+        )
+
+    def compare(self, title, queryset_before, queryset_after):
+        """Print the query plans of the same lookup before and after."""
+        self.stdout.write(f"\n=== {title:s} ===")
+        self.stdout.write("\n--- Before: comparison with a prefix of the path ---")
+        self.stdout.write(queryset_before.explain(analyze=True))
+        self.stdout.write("\n--- After: lookup on the ancestors' paths ---")
+        self.stdout.write(queryset_after.explain(analyze=True))
@@ -0,0 +1,135 @@
+"""
+Management command measuring the throughput of document creation with an increasing
+number of concurrent workers, before and after allocating paths without locks:
+- root documents, which locked the document table,
+- children of the same document, which locked the row of the parent.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from treebeard.mp_tree import MP_AddChildHandler, MP_AddRootHandler
+
+from core.models import Document
+
+BENCHMARK_TITLE = "Benchmark"
+
+
+class Command(BaseCommand):
+    """
+    Create documents from concurrent workers, each in its own transaction, and print
+    the number of documents created per second. Each creation waits for a while where
+    the request would upload the content of the document. Created documents are
+    deleted at the end.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        """Define command arguments."""
+        parser.add_argument(
+            "--workers",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4, 8],
+            help="Numbers of concurrent workers to measure.",
+        )
+        parser.add_argument(
+            "--documents",
+            type=int,
+            default=200,
+            help="Number of documents created for each number of workers.",
+        )
+        parser.add_argument(
+            "--hold",
+            type=float,
+            default=0.01,
+            help="Seconds standing for the upload of the content of each document.",
+        )
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        parent = Document.add_root(title=BENCHMARK_TITLE)
+        created_ids = [parent.id]
+
+        try:
+            for title, create in [
+                ("Roots before: table lock", self.create_root_locked),
+                ("Roots after: path sequence", self.create_root),
+                (
+                    "Children before: parent lock",
+                    lambda hold: self.create_child_locked(parent, hold),
+                ),
+                (
+                    "Children after: optimistic path",
+                    lambda hold: self.create_child(parent, hold),
+                ),
+            ]:
+                self.stdout.write(f"\n=== {title:s} ===")
+                for workers in options["workers"]:
+                    ids, duration = self.run(
+                        create, workers, options["documents"], options["hold"]
+                    )
+                    created_ids.extend(ids)
+                    self.stdout.write(
+                        f"{workers:d} workers: {len(ids) / duration:.1f} documents/s"
+                    )
+        finally:
+            Document.objects.filter(id__in=created_ids).delete()
+
+    @staticmethod
+    def run(create, workers, documents, hold):
+        """Create documents from concurrent workers and return their ids and duration."""
+
+        def work(count):
+            ids = []
+            try:
+                for _i in range(count):
+                    with transaction.atomic():
+                        ids.append(create(hold).id)
+            finally:
+                # Each worker thread has its own connection to the database
+                connection.close()
+            return ids
+
+        counts = [
+            documents // workers + (1 if index < documents % workers else 0)
+            for index in range(workers)
+        ]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            ids = [id_ for ids in executor.map(work, counts) for id_ in ids]
+        return ids, time.perf_counter() - start
+
+    @staticmethod
+    def create_root_locked(hold):
+        """Create a root document as before, behind a lock of the document table."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'LOCK TABLE "{Document._meta.db_table}" '  # noqa: SLF001
+                "IN SHARE ROW EXCLUSIVE MODE;"
+            )
+        time.sleep(hold)
+        return MP_AddRootHandler(Document, title=BENCHMARK_TITLE).process()
+
+    @staticmethod
+    def create_root(hold):
+        """Create a root document at a path allocated from the sequence."""
+        time.sleep(hold)
+        return Document.add_root(title=BENCHMARK_TITLE)
+
+    @staticmethod
+    def create_child_locked(parent, hold):
+        """Create a child document as before, behind a lock of the parent."""
+        locked_parent = Document.objects.select_for_update().get(pk=parent.pk)
+        time.sleep(hold)
+        return MP_AddChildHandler(locked_parent, title=BENCHMARK_TITLE).process()
+
+    @staticmethod
+    def create_child(parent, hold):
+        """Create a child document at a path allocated without lock."""
+        time.sleep(hold)
+        return parent.add_child(title=BENCHMARK_TITLE)
@@ -0,0 +1,92 @@
+"""
+Management command measuring the CPU time spent signing the authorization headers
+served by media_auth, before and after precomputing their signature:
+- before: a presigned url resolved by the client and a request signed by botocore,
+- after: a url built from a template and signed with the signing key of the day,
+- after, with headers memoized per object within a window of time.
+"""
+
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+import botocore
+
+from core.api import utils
+
+
+class Command(BaseCommand):
+    """
+    Sign the authorization headers of a set of attachment keys many times with each
+    method and print the number of signatures per second and the time per signature.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        """Define command arguments."""
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10000,
+            help="Number of headers signed with each method.",
+        )
+        parser.add_argument(
+            "--keys",
+            type=int,
+            default=100,
+            help="Number of distinct attachment keys signed in turn.",
+        )
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        keys = [
+            f"benchmark/attachments/{index:d}.png" for index in range(options["keys"])
+        ]
+
+        for title, sign, window in [
+            ("Before: presigned url signed by botocore", self.sign_with_botocore, 0),
+            ("After: template and cached signing key", self.sign, 0),
+            ("After: headers memoized for 60 seconds", self.sign, 60),
+        ]:
+            with override_settings(MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT=window):
+                duration = self.run(sign, keys, options["iterations"])
+            self.stdout.write(
+                f"{title:s}: {options['iterations'] / duration:.0f} signatures/s, "
+                f"{duration * 1e6 / options['iterations']:.1f}µs each"
+            )
+
+    @staticmethod
+    def run(sign, keys, iterations):
+        """Sign headers for the keys in turn and return the CPU time it took."""
+        start = time.process_time()
+        for index in range(iterations):
+            sign(keys[index % len(keys)])
+        return time.process_time() - start
+
+    @staticmethod
+    def sign(key):
+        """Sign headers as media_auth does."""
+        return utils.generate_s3_authorization_headers(key)
+
+    @staticmethod
+    def sign_with_botocore(key):
+        """Sign headers as media_auth did before precomputing their signature."""
+        url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
+            "get_object",
+            ExpiresIn=0,
+            Params={"Bucket": default_storage.bucket_name, "Key": key},
+        )
+        request = botocore.awsrequest.AWSRequest(method="get", url=url)
+
+        s3_client = default_storage.connection.meta.client
+        # pylint: disable=protected-access
+        credentials = s3_client._request_signer._credentials  # noqa: SLF001
+        frozen_credentials = credentials.get_frozen_credentials()
+        region = s3_client.meta.region_name
+        auth = botocore.auth.S3SigV4Auth(frozen_credentials, "s3", region)
+        auth.add_auth(request)
+
+        return request
@@ -0,0 +1,100 @@
+"""
+Management command importing a tree of Markdown documents in bulk from an NDJSON file,
+e.g. to migrate the pages of another wiki.
+"""
+
+import itertools
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.api.serializers import ImportDocumentSerializer
+from core.models import DuplicateEmailError, User
+from core.services.import_services import DocumentImporter, DocumentImportError
+
+
+class Command(BaseCommand):
+    """
+    Import documents from an NDJSON file with one document per line, as an object with
+    its "id" in the source of the import, the "id" of its "parent" (null for root
+    documents), its "title" and its Markdown "content". Parents must come before their
+    children. Running the command again with the same import key resumes the import.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        """Define command arguments."""
+        parser.add_argument(
+            "path", help="Path of the NDJSON file to import or - to read stdin."
+        )
+        parser.add_argument(
+            "--import-key",
+            help="Key under which documents are recorded (defaults to the path).",
+        )
+        parser.add_argument(
+            "--sub", help="Sub of the owner of the documents.", required=True
+        )
+        parser.add_argument(
+            "--email", help="Email of the owner of the documents.", required=True
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.DOCUMENT_IMPORT_BATCH_SIZE,
+            help="Number of documents created per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        try:
+            user = User.objects.get_user_by_sub_or_email(
+                options["sub"], options["email"]
+            )
+        except DuplicateEmailError as err:
+            raise CommandError(err.message) from err
+
+        importer = DocumentImporter(
+            options["import_key"] or options["path"], user=user, email=options["email"]
+        )
+
+        if options["path"] == "-":
+            self.import_lines(importer, sys.stdin, options["batch_size"])
+        else:
+            with open(options["path"], encoding="utf-8") as lines:
+                self.import_lines(importer, lines, options["batch_size"])
+
+    def import_lines(self, importer, lines, batch_size):
+        """Import documents from lines by batches, reporting progress after each."""
+        records = self.read_records(lines)
+
+        created = skipped = 0
+        while batch := list(itertools.islice(records, batch_size)):
+            try:
+                nb_created = importer.import_batch(batch)
+            except DocumentImportError as err:
+                raise CommandError(str(err)) from err
+
+            created += nb_created
+            skipped += len(batch) - nb_created
+            self.stdout.write(
+                f"[INFO] {created:d} documents created, {skipped:d} skipped."
+            )
+
+    @staticmethod
+    def read_records(lines):
+        """Yield the validated documents of NDJSON lines, skipping empty lines."""
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                serializer = ImportDocumentSerializer(data=json.loads(line))
+            except json.JSONDecodeError as err:
+                raise CommandError(f"Line {number:d} is not valid JSON.") from err
+
+            if not serializer.is_valid():
+                raise CommandError(f"Line {number:d} is invalid: {serializer.errors}")
+            yield serializer.validated_data
@@ -0,0 +1,28 @@
+"""
+Management command scheduling the upload of the contents of documents that are still
+waiting in the outbox, e.g. after their tasks were lost by the broker.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import DocumentContentUpload
+from core.tasks.documents import upload_document_content
+
+
+class Command(BaseCommand):
+    """Schedule the upload of all the contents waiting in the outbox."""
+
+    help = __doc__
+
+    def handle(self, *args, **options):
+        """Execute management command."""
+        documents_ids = DocumentContentUpload.objects.values_list(
+            "document_id", flat=True
+        )
+
+        count = 0
+        for document_id in documents_ids.iterator():
+            upload_document_content.delay(document_id)
+            count += 1
+
+        self.stdout.write(f"[INFO] Scheduled the upload of {count:d} contents.")
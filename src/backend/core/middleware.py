@@ -1,4 +1,6 @@
-"""Force session creation for all requests."""
+"""Middlewares for the core app."""
+
+from core.models import request_roles_cache
 
 
 class ForceSessionMiddleware:
@@ -19,3 +21,22 @@ class ForceSessionMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class RequestRolesCacheMiddleware:
+    """
+    Resolve the role of a user on a document at most once per request, however many
+    times permissions, abilities and serializers ask for it.
+    """
+
+    def __init__(self, get_response):
+        """Initialize the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Start with an empty cache of roles and drop it once the response is ready."""
+        token = request_roles_cache.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            request_roles_cache.reset(token)
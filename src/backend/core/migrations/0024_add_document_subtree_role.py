@@ -0,0 +1,116 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def create_subtree_roles(apps, schema_editor):
+    """Mirror all existing document accesses as subtree roles."""
+    DocumentAccess = apps.get_model("core", "DocumentAccess")
+    DocumentSubtreeRole = apps.get_model("core", "DocumentSubtreeRole")
+
+    accesses = DocumentAccess.objects.annotate(
+        path=F("document__path"),
+        ancestors_deleted_at=F("document__ancestors_deleted_at"),
+    ).values_list(
+        "id", "document_id", "path", "ancestors_deleted_at", "user_id", "team", "role"
+    )
+
+    DocumentSubtreeRole.objects.bulk_create(
+        (
+            DocumentSubtreeRole(
+                access_id=access_id,
+                document_id=document_id,
+                path=path,
+                ancestors_deleted_at=ancestors_deleted_at,
+                user_id=user_id,
+                team=team,
+                role=role,
+            )
+            for (
+                access_id,
+                document_id,
+                path,
+                ancestors_deleted_at,
+                user_id,
+                team,
+                role,
+            ) in accesses.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0023_remove_document_is_public_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentSubtreeRole",
+            fields=[
+                (
+                    "access",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="subtree_role",
+                        serialize=False,
+                        to="core.documentaccess",
+                    ),
+                ),
+                ("path", models.CharField(db_collation="C", max_length=252)),
+                ("ancestors_deleted_at", models.DateTimeField(blank=True, null=True)),
+                ("team", models.CharField(blank=True, max_length=100)),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("reader", "Reader"),
+                            ("editor", "Editor"),
+                            ("administrator", "Administrator"),
+                            ("owner", "Owner"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subtree_roles",
+                        to="core.document",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Document subtree role",
+                "verbose_name_plural": "Document subtree roles",
+                "db_table": "impress_document_subtree_role",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "path"], name="subtree_role_user_path_idx"
+                    ),
+                    models.Index(
+                        fields=["team", "path"], name="subtree_role_team_path_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            create_subtree_roles, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0024_add_document_subtree_role"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["depth", "path"], name="document_depth_path_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0025_add_document_depth_path_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="content_etag",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0026_add_document_content_etag"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentContentUpload",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="content_upload",
+                        serialize=False,
+                        to="core.document",
+                    ),
+                ),
+                ("etag", models.CharField(max_length=32)),
+                ("content", models.TextField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Document content upload",
+                "verbose_name_plural": "Document content uploads",
+                "db_table": "impress_document_content_upload",
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:55
+
+from django.db import migrations
+
+from treebeard.numconv import NumConv
+
+ROOT_PATH_SEQUENCE = "impress_document_root_path_seq"
+# Values of the sequence are multiplied by the step gap of documents to get steps
+STEP_GAP = 1024
+
+
+def initialize_root_path_sequence(apps, schema_editor):
+    """Start the sequence after the step of the last root document."""
+    Document = apps.get_model("core", "Document")
+
+    last_root_path = (
+        Document.objects.filter(depth=1)
+        .order_by("-path")
+        .values_list("path", flat=True)
+        .first()
+    )
+    if last_root_path:
+        alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+        step = NumConv(len(alphabet), alphabet).str2int(last_root_path)
+        # Steps below the step gap are followed by the first value of the sequence
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT setval(%s, %s, %s)",
+                [ROOT_PATH_SEQUENCE, max(step // STEP_GAP, 1), step >= STEP_GAP],
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0027_add_document_content_upload"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f"CREATE SEQUENCE IF NOT EXISTS {ROOT_PATH_SEQUENCE:s}",
+            reverse_sql=f"DROP SEQUENCE IF EXISTS {ROOT_PATH_SEQUENCE:s}",
+        ),
+        migrations.RunPython(
+            initialize_root_path_sequence, reverse_code=migrations.RunPython.noop
+        ),
+    ]
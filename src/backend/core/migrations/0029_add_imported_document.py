@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0028_add_document_root_path_sequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportedDocument",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="import_record",
+                        serialize=False,
+                        to="core.document",
+                    ),
+                ),
+                ("import_key", models.CharField(max_length=255)),
+                ("external_id", models.CharField(max_length=255)),
+            ],
+            options={
+                "verbose_name": "Imported document",
+                "verbose_name_plural": "Imported documents",
+                "db_table": "impress_imported_document",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("import_key", "external_id"),
+                        name="unique_imported_document",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0029_add_imported_document"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentAttachment",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attachment_keys",
+                        to="core.document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Document attachment",
+                "verbose_name_plural": "Document attachments",
+                "db_table": "impress_document_attachment",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("key", "document"), name="unique_document_attachment"
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO impress_document_attachment (document_id, key)
+            SELECT id, unnest(attachments) FROM impress_document
+            ON CONFLICT DO NOTHING
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0031_add_attachment"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attachment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("uploading", "uploading"),
+                    ("processing", "processing"),
+                    ("ready", "ready"),
+                ],
+                default="processing",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0032_alter_attachment_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentcontentupload",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
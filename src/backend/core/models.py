@@ -4,23 +4,28 @@ Declare and configure the models for the impress core application
 # pylint: disable=too-many-lines
 
 import hashlib
+import secrets
 import smtplib
 import uuid
+from contextvars import ContextVar
 from datetime import timedelta
+from functools import partial
 from logging import getLogger
 
 from django.conf import settings
 from django.contrib.auth import models as auth_models
 from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.postgres.expressions import ArraySubquery
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.sites.models import Site
 from django.core import mail, validators
 from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.mail import send_mail
-from django.db import models, transaction
-from django.db.models.functions import Left, Length
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import JSONObject, Substr
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -30,8 +35,10 @@ from django.utils.translation import gettext_lazy as _
 from botocore.exceptions import ClientError
 from rest_framework.exceptions import ValidationError
 from timezone_field import TimeZoneField
+from treebeard.exceptions import NodeAlreadySaved, PathOverflow
 from treebeard.mp_tree import MP_Node, MP_NodeManager, MP_NodeQuerySet
 
+from . import content_cache
 from .choices import (
     PRIVILEGED_ROLES,
     LinkReachChoices,
@@ -39,9 +46,18 @@ from .choices import (
     RoleChoices,
     get_equivalent_link_definition,
 )
+from .enums import DocumentAttachmentStatus
+from .utils import get_ancestors_paths
 
 logger = getLogger(__name__)
 
+# Roles resolved during the current request, keyed by (user id, document path).
+# It is only set while a request is handled (see `RequestRolesCacheMiddleware`).
+request_roles_cache = ContextVar("request_roles_cache", default=None)
+
+# Sequence from which the steps of the paths of root documents are allocated
+ROOT_PATH_SEQUENCE = "impress_document_root_path_seq"
+
 
 def get_trashbin_cutoff():
     """
@@ -57,6 +73,32 @@ def get_trashbin_cutoff():
     return timezone.now() - timedelta(days=settings.TRASHBIN_CUTOFF_DAYS)
 
 
+# The bitwise operators declared by Combinable don't apply to a list of paths
+# pylint: disable-next=abstract-method
+class AncestorsPaths(models.Func):
+    """
+    Expand a materialized path expression into the list of the paths of its ancestors,
+    including itself, to be used as the right-hand side of an `__in` lookup.
+
+    This is the SQL counterpart of `core.utils.get_ancestors_paths` for paths that are
+    only known by the database, e.g. `OuterRef("path")` in a subquery. As the depth
+    of the node is unknown, a prefix is generated for each possible depth: prefixes
+    longer than the path are equal to the path itself.
+    """
+
+    template = "(%(expressions)s)"
+    output_field = models.CharField()
+
+    def __init__(self, expression, steplen, max_length, **extra):
+        super().__init__(
+            *(
+                Substr(expression, 1, length)
+                for length in range(steplen, max_length + 1, steplen)
+            ),
+            **extra,
+        )
+
+
 class DuplicateEmailError(Exception):
     """Raised when an email is already associated with a pre-existing user."""
 
@@ -334,9 +376,13 @@ class DocumentQuerySet(MP_NodeQuerySet):
         output_field = ArrayField(base_field=models.CharField())
 
         if user.is_authenticated:
-            user_roles_subquery = DocumentAccess.objects.filter(
+            user_roles_subquery = DocumentSubtreeRole.objects.filter(
                 models.Q(user=user) | models.Q(team__in=user.teams),
-                document__path=Left(models.OuterRef("path"), Length("document__path")),
+                path__in=AncestorsPaths(
+                    models.OuterRef("path"),
+                    self.model.steplen,
+                    self.model.path.field.max_length,
+                ),
             ).values_list("role", flat=True)
 
             return self.annotate(
@@ -349,6 +395,74 @@ class DocumentQuerySet(MP_NodeQuerySet):
             user_roles=models.Value([], output_field=output_field),
         )
 
+    def filter_highest_ancestors(self):
+        """
+        Keep only the documents of which no ancestor is in the queryset, in the
+        database rather than by fetching all the paths.
+        """
+        ancestors = self.filter(
+            path__in=AncestorsPaths(
+                models.OuterRef("path"),
+                self.model.steplen,
+                self.model.path.field.max_length,
+            )
+        ).exclude(pk=models.OuterRef("pk"))
+        return self.filter(~models.Exists(ancestors))
+
+    def tree(self, document, user):
+        """
+        Filter the documents of the tree opened on a document, in a single query:
+        - the document and its ancestors that are not deleted,
+        - the children of these ancestors that are not deleted, below the highest
+          ancestor the user can read per se.
+
+        Documents are annotated with the depth of the highest readable ancestor as
+        `highest_readable_depth`, which is null if the user can read none of them.
+        Ancestors above it are kept to compute links inheritance.
+        """
+        ancestors_paths = document.get_ancestors_paths()
+        highest_readable_depth = models.Subquery(
+            self.model.objects.filter(
+                path__in=ancestors_paths, ancestors_deleted_at__isnull=True
+            )
+            .readable_per_se(user)
+            .order_by("depth")
+            .values("depth")[:1]
+        )
+
+        # Each clause is an index range scan on the children of one ancestor
+        tree_clause = models.Q(path__in=ancestors_paths)
+        for path in ancestors_paths:
+            tree_clause |= models.Q(
+                models.Q(depth__gt=highest_readable_depth),
+                depth=len(path) // self.model.steplen + 1,
+                path__range=self.model.get_children_path_interval(path),
+            )
+
+        return self.filter(tree_clause, ancestors_deleted_at__isnull=True).annotate(
+            highest_readable_depth=highest_readable_depth
+        )
+
+    def annotate_ancestors_links(self):
+        """
+        Annotate document queryset with the link definitions of the ancestors of each
+        document that are not deleted, from the root down.
+        """
+        ancestors = (
+            self.model.objects.filter(
+                path__in=AncestorsPaths(
+                    models.OuterRef("path"),
+                    self.model.steplen,
+                    self.model.path.field.max_length,
+                ),
+                ancestors_deleted_at__isnull=True,
+            )
+            .exclude(pk=models.OuterRef("pk"))
+            .order_by("path")
+            .values(link=JSONObject(link_reach="link_reach", link_role="link_role"))
+        )
+        return self.annotate(ancestors_links=ArraySubquery(ancestors))
+
 
 class DocumentManager(MP_NodeManager.from_queryset(DocumentQuerySet)):
     """
@@ -362,6 +476,8 @@ class DocumentManager(MP_NodeManager.from_queryset(DocumentQuerySet)):
 
 
 # pylint: disable=too-many-public-methods
+# Documents keep what is prefetched or computed for them on their instance
+# pylint: disable-next=too-many-instance-attributes
 class Document(MP_Node, BaseModel):
     """Pad document carrying the content."""
 
@@ -400,12 +516,15 @@ class Document(MP_Node, BaseModel):
         blank=True,
         null=True,
     )
+    # MD5 hash of the content, which is its ETag in object storage
+    content_etag = models.CharField(max_length=32, blank=True, editable=False)
 
     _content = None
 
     # Tree structure
     alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
     steplen = 7  # nb siblings max: 3,521,614,606,208
+    step_gap = 1024  # room left between siblings for documents added next to them
     node_order_by = []  # Manual ordering
 
     path = models.CharField(max_length=7 * 36, unique=True, db_collation="C")
@@ -426,6 +545,10 @@ class Document(MP_Node, BaseModel):
                 name="check_deleted_at_matches_ancestors_deleted_at_when_set",
             ),
         ]
+        indexes = [
+            # Children of a document are a range of paths at the next depth
+            models.Index(fields=["depth", "path"], name="document_depth_path_idx"),
+        ]
 
     def __str__(self):
         return str(self.title) if self.title else str(_("Untitled Document"))
@@ -435,36 +558,308 @@ class Document(MP_Node, BaseModel):
         super().__init__(*args, **kwargs)
         self._ancestors_link_definition = None
         self._computed_link_definition = None
+        self._prefetched_abilities = None
+        self._prefetched_nb_accesses = None
+        # Attachments loaded from the database, to detect their changes on save
+        self._saved_attachments = (
+            set(self.attachments or []) if "attachments" in self.__dict__ else None
+        )
 
     def save(self, *args, **kwargs):
-        """Write content to object storage only if _content has changed."""
-        super().save(*args, **kwargs)
+        """
+        Write content to object storage only if _content has changed, and save its ETag
+        along with the document so that it can be looked up in the content cache.
+
+        When DOCUMENT_CONTENT_WRITE_BEHIND is enabled, the content is saved in the
+        content uploads outbox along with the document instead, and uploaded to object
+        storage by a celery task once the transaction is committed.
+
+        The index of attachments is updated when they have changed.
+        """
+        has_changed = False
+        is_adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        has_attachments_changed = (
+            "attachments" not in self.get_deferred_fields()
+            and (update_fields is None or "attachments" in update_fields)
+            and set(self.attachments or [])
+            != (set() if is_adding else self._saved_attachments)
+        )
 
         if self._content:
-            file_key = self.file_key
             bytes_content = self._content.encode("utf-8")
+            etag = hashlib.md5(bytes_content).hexdigest()  # noqa: S324
+
+            if etag != self.content_etag:
+                has_changed = True
+                if not settings.DOCUMENT_CONTENT_WRITE_BEHIND:
+                    # The ETag of documents saved before it was stored with them
+                    # must be compared with the one in object storage
+                    self.upload_content(
+                        bytes_content,
+                        etag,
+                        check_stored=not (is_adding or self.content_etag),
+                    )
 
-            # Attempt to directly check if the object exists using the storage client.
-            try:
-                response = default_storage.connection.meta.client.head_object(
-                    Bucket=default_storage.bucket_name, Key=file_key
+                self.content_etag = etag
+                if kwargs.get("update_fields") is not None:
+                    kwargs["update_fields"] = {*kwargs["update_fields"], "content_etag"}
+
+            content_cache.set_content(self.pk, etag, self._content)
+
+        super().save(*args, **kwargs)
+
+        if has_attachments_changed:
+            DocumentAttachment.objects.sync_document(
+                self, set() if is_adding else self._saved_attachments
+            )
+            self._saved_attachments = set(self.attachments or [])
+
+        # A document being added may have got its ETag during a previous attempt to
+        # save it at a path that was taken (see `_save_at_free_path`)
+        if (
+            settings.DOCUMENT_CONTENT_WRITE_BEHIND
+            and self._content
+            and (has_changed or is_adding)
+        ):
+            DocumentContentUpload.objects.enqueue(self)
+
+    def upload_content(self, bytes_content, etag, check_stored=True):
+        """
+        Upload content to object storage, unless check_stored is set and the content
+        stored there already has the same ETag.
+        """
+        if check_stored and self.get_stored_content_etag() == etag:
+            return
+        default_storage.save(self.file_key, ContentFile(bytes_content))
+
+    def get_stored_content_etag(self):
+        """Return the ETag of the content in object storage or None if there is none."""
+        try:
+            response = default_storage.connection.meta.client.head_object(
+                Bucket=default_storage.bucket_name, Key=self.file_key
+            )
+        except ClientError as excpt:
+            if excpt.response["Error"]["Code"] == "404":
+                return None
+            raise
+        return response["ETag"].strip('"')
+
+    @classmethod
+    def _get_document_to_add(cls, kwargs):
+        """Return the unsaved document to add to the tree, as treebeard does."""
+        if len(kwargs) == 1 and "instance" in kwargs:
+            document = kwargs["instance"]
+            # The state of model instances is documented by Django
+            # pylint: disable-next=protected-access
+            if not document._state.adding:  # noqa: SLF001
+                raise NodeAlreadySaved(
+                    "Attempted to add a tree node that is already in the database"
                 )
-            except ClientError as excpt:
-                # If the error is a 404, the object doesn't exist, so we should create it.
-                if excpt.response["Error"]["Code"] == "404":
-                    has_changed = True
-                else:
+            return document
+        return cls(**kwargs)
+
+    @classmethod
+    def get_step_path(cls, parent_path, step):
+        """Build the path of the node at a step below a parent path."""
+        if step >= len(cls.alphabet) ** cls.steplen:
+            raise PathOverflow(f"Path Overflow from: '{parent_path:s}'")
+        return parent_path + cls._int2str(step).rjust(cls.steplen, cls.alphabet[0])
+
+    @classmethod
+    def get_path_step(cls, path):
+        """Return the last step of a path as an integer."""
+        return cls._str2int(path[-cls.steplen :])
+
+    @classmethod
+    def get_children_path_interval(cls, path):
+        """Return the interval of the paths of the children of a path."""
+        return cls._get_children_path_interval(path)
+
+    @classmethod
+    def _save_at_free_path(cls, document, get_path, attempts=10):
+        """
+        Save a new document at the path returned by `get_path` for the number of the
+        attempt, asking for another one if another transaction took this path first
+        (paths are unique). Returns False without saving if `get_path` returns None
+        because no path is free.
+        """
+        for attempt in range(1, attempts + 1):
+            document.path = get_path(attempt)
+            if document.path is None:
+                return False
+
+            try:
+                with transaction.atomic():
+                    document.save()
+            except (IntegrityError, DjangoValidationError):
+                if (
+                    attempt == attempts
+                    or not cls.objects.filter(path=document.path).exists()
+                ):
                     raise
             else:
-                # Compare the existing ETag with the MD5 hash of the new content.
-                has_changed = (
-                    response["ETag"].strip('"')
-                    != hashlib.md5(bytes_content).hexdigest()  # noqa: S324
+                return True
+
+        return False  # pragma: no cover
+
+    @classmethod
+    def add_root(cls, **kwargs):
+        """
+        Add a root document at a path allocated by `get_next_root_path` instead of
+        following the last root like treebeard, so that root documents can be created
+        concurrently without locking the document table. Another path is allocated if
+        the path was taken in the meantime, e.g. by a document moved to the root level.
+        """
+        document = cls._get_document_to_add(kwargs)
+        document.depth = 1
+        cls._save_at_free_path(document, lambda _attempt: cls.get_next_root_path())
+        return document
+
+    @classmethod
+    def get_next_root_path(cls):
+        """Allocate the path of a new root document (see `get_next_root_paths`)."""
+        return cls.get_next_root_paths(1)[0]
+
+    @classmethod
+    def get_next_root_paths(cls, count):
+        """
+        Allocate the paths of new root documents from a database sequence: the values
+        of a sequence are never handed out twice, even to concurrent transactions.
+        Steps are spaced by `step_gap` to leave room for documents added next to them.
+
+        The sequence catches up with roots placed after it by treebeard, e.g. when a
+        document is moved to the root level. Catch-ups are serialized by a lock and
+        never move the sequence backwards, so that concurrent ones can't hand out the
+        same values again.
+        """
+        query = "SELECT nextval(%s) FROM generate_series(1, %s)"
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(query, [ROOT_PATH_SEQUENCE, count])
+            values = sorted(value for (value,) in cursor.fetchall())
+
+            last_root_path = (
+                cls.objects.filter(depth=1)
+                .order_by("-path")
+                .values_list("path", flat=True)
+                .first()
+            )
+            if last_root_path and cls.get_path_step(last_root_path) >= (
+                values[0] * cls.step_gap
+            ):
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext(%s))", [ROOT_PATH_SEQUENCE]
                 )
+                cursor.execute(
+                    "SELECT setval(%s, GREATEST(pg_sequence_last_value(%s::regclass), %s))",
+                    [
+                        ROOT_PATH_SEQUENCE,
+                        ROOT_PATH_SEQUENCE,
+                        cls.get_path_step(last_root_path) // cls.step_gap,
+                    ],
+                )
+                cursor.execute(query, [ROOT_PATH_SEQUENCE, count])
+                values = sorted(value for (value,) in cursor.fetchall())
 
-            if has_changed:
-                content_file = ContentFile(bytes_content)
-                default_storage.save(file_key, content_file)
+        return [cls.get_step_path("", value * cls.step_gap) for value in values]
+
+    def get_last_child_step(self):
+        """Return the step of the last child of this document, 0 if it has none."""
+        last_child_path = (
+            self._meta.model.objects.filter(
+                depth=self.depth + 1,
+                path__range=self._get_children_path_interval(self.path),
+            )
+            .order_by("-path")
+            .values_list("path", flat=True)
+            .first()
+        )
+        return self.get_path_step(last_child_path) if last_child_path else 0
+
+    def add_child(self, **kwargs):
+        """
+        Add a child document after the last child, `step_gap` steps after it, without
+        locking this document: if a concurrent transaction took the path first, a
+        random step within the gap is tried so that concurrent transactions retrying
+        at the same time don't collide again. The number of children is incremented
+        last so that the lock on the row of this document is held as briefly as
+        possible.
+        """
+        document = self._get_document_to_add(kwargs)
+        document.depth = self.depth + 1
+
+        def get_path(attempt):
+            last_step = self.get_last_child_step()
+            gap = (
+                self.step_gap if attempt == 1 else secrets.randbelow(self.step_gap) + 1
+            )
+            return self.get_step_path(self.path, last_step + gap)
+
+        self._save_at_free_path(document, get_path)
+
+        self._meta.model.objects.filter(pk=self.pk).update(
+            numchild=models.F("numchild") + 1
+        )
+        self.numchild += 1
+        return document
+
+    def add_sibling(self, pos=None, **kwargs):
+        """
+        Add a sibling document right or left of this one at a step halfway to its
+        neighbour instead of shifting the following siblings like treebeard, which
+        rewrites their paths and those of all their descendants. Treebeard is only
+        used when there is no free step left between the two documents or for other
+        positions, after which the subtree roles of the shifted siblings are resynced.
+        """
+        pos = self._prepare_pos_var_for_add_sibling(pos)
+        if pos not in ("left", "right", "last-sibling"):
+            document = super().add_sibling(pos, **kwargs)
+            document.sync_shifted_siblings()
+            return document
+
+        siblings = self.get_siblings()
+        if pos == "last-sibling" or (
+            pos == "right" and not siblings.filter(path__gt=self.path).exists()
+        ):
+            if self.is_root():
+                return self.add_root(**kwargs)
+            return self.get_parent().add_child(**kwargs)
+
+        document = self._get_document_to_add(kwargs)
+        document.depth = self.depth
+        parent_path = self.path[: -self.steplen]
+        step = self._get_lastpos_in_path()
+
+        def get_path(_attempt):
+            if pos == "right":
+                neighbour_path = (
+                    siblings.filter(path__gt=self.path)
+                    .order_by("path")
+                    .values_list("path", flat=True)
+                    .first()
+                )
+            else:
+                neighbour_path = (
+                    siblings.filter(path__lt=self.path)
+                    .order_by("-path")
+                    .values_list("path", flat=True)
+                    .first()
+                )
+            neighbour_step = self.get_path_step(neighbour_path) if neighbour_path else 0
+            if abs(neighbour_step - step) < 2:
+                return None
+            return self.get_step_path(parent_path, (neighbour_step + step) // 2)
+
+        if not self._save_at_free_path(document, get_path):
+            document = super().add_sibling(pos, instance=document)
+            document.sync_shifted_siblings()
+            return document
+
+        if parent_path:
+            self._meta.model.objects.filter(path=parent_path).update(
+                numchild=models.F("numchild") + 1
+            )
+        return document
 
     def is_leaf(self):
         """
@@ -472,6 +867,51 @@ class Document(MP_Node, BaseModel):
         """
         return not self.has_deleted_children and self.numchild == 0
 
+    @transaction.atomic
+    def move(self, target, pos=None):
+        """
+        Move the document and update the paths denormalized on the subtree roles
+        of the document and its descendants.
+
+        Roles, numbers of accesses and decisions to serve attachments cached for the
+        subtree are keyed by the versions of the paths of its ancestors: the version of
+        its subtree is renewed at its former path and at its new path, which it may
+        have had before if it is moved back under a former parent.
+        """
+        self.invalidate_accesses_cache()
+        super().move(target, pos=pos)
+
+        moved = self._meta.model.objects.only("path", "depth").get(pk=self.pk)
+        DocumentSubtreeRole.objects.sync_subtree(moved.path)
+        moved.invalidate_accesses_cache()
+        moved.sync_shifted_siblings()
+
+    def sync_shifted_siblings(self):
+        """
+        Refresh the subtree roles and renew the accesses versions of the siblings that
+        treebeard shifted one step right to make room for this document, along with
+        their descendants.
+
+        Treebeard shifts the siblings following the new path of the document up to the
+        first hole between their steps, so the former path of each shifted sibling is
+        the path of the document or of the sibling before it.
+        """
+        paths = [self.path]
+        siblings_paths = (
+            self.get_siblings()
+            .filter(path__gt=self.path)
+            .order_by("path")
+            .values_list("path", flat=True)
+        )
+        for path in siblings_paths.iterator():
+            if self.get_path_step(path) != self.get_path_step(paths[-1]) + 1:
+                break
+            paths.append(path)
+
+        if len(paths) > 1:
+            DocumentSubtreeRole.objects.sync_subtree(paths[1], paths[-1])
+            self.invalidate_subtrees_accesses_cache(paths[1:])
+
     @property
     def key_base(self):
         """Key base of the location where the document is stored in object storage."""
@@ -488,14 +928,33 @@ class Document(MP_Node, BaseModel):
 
     @property
     def content(self):
-        """Return the json content from object storage if available"""
+        """Return the json content from the content cache or object storage if available"""
+        if self._content is None and self.id and self.content_etag:
+            self._content = content_cache.get_content(self.pk, self.content_etag)
+
+            # Content saved with write behind may not be uploaded yet
+            if self._content is None and settings.DOCUMENT_CONTENT_WRITE_BEHIND:
+                self._content = (
+                    DocumentContentUpload.objects.filter(
+                        document_id=self.pk, etag=self.content_etag
+                    )
+                    .values_list("content", flat=True)
+                    .first()
+                )
+
         if self._content is None and self.id:
             try:
                 response = self.get_content_response()
             except (FileNotFoundError, ClientError):
                 pass
             else:
-                self._content = response["Body"].read().decode("utf-8")
+                bytes_content = response["Body"].read()
+                self._content = bytes_content.decode("utf-8")
+                content_cache.set_content(
+                    self.pk,
+                    hashlib.md5(bytes_content).hexdigest(),  # noqa: S324
+                    self._content,
+                )
         return self._content
 
     @content.setter
@@ -580,9 +1039,54 @@ class Document(MP_Node, BaseModel):
             Bucket=default_storage.bucket_name, Key=self.file_key, VersionId=version_id
         )
 
-    def get_nb_accesses_cache_key(self):
-        """Generate a unique cache key for each document."""
-        return f"document_{self.id!s}_nb_accesses"
+    @staticmethod
+    def get_accesses_version_cache_key(path):
+        """Generate the cache key holding the accesses version of a subtree."""
+        return f"document_{path:s}_accesses_version"
+
+    @classmethod
+    def get_accesses_versions(cls, paths):
+        """
+        Return the accesses version of the subtree of each path passed in argument.
+
+        A version is a random token that is renewed whenever accesses change in the
+        subtree, so that invalidating the cache of all the documents in a subtree only
+        requires writing one key. It versions the cached number of accesses and roles,
+        and the decisions to serve attachments, for which it is also renewed when link
+        settings change. Missing versions are initialized atomically. Versions never
+        expire so that values cached on them live as long as their own timeout.
+        """
+        keys = {cls.get_accesses_version_cache_key(path): path for path in paths}
+        versions = cache.get_many(keys.keys())
+
+        for key in keys.keys() - versions.keys():
+            version = uuid.uuid4().hex
+            versions[key] = version if cache.add(key, version, None) else cache.get(key)
+
+        return {path: versions[key] for key, path in keys.items()}
+
+    def get_nb_accesses_cache_key(self, versions=None):
+        """
+        Generate a cache key for the number of accesses of the document, that changes
+        as soon as the version of the subtree of the document or of one of its
+        ancestors is renewed.
+        """
+        return (
+            f"document_{self.id!s}_nb_accesses_{self._get_accesses_digest(versions):s}"
+        )
+
+    def _get_accesses_digest(self, versions=None, extra=()):
+        """
+        Digest the accesses versions of the document and its ancestors, along with
+        the extra strings passed in argument.
+        """
+        paths = self.get_ancestors_paths()
+        if versions is None:
+            versions = self.get_accesses_versions(paths)
+
+        return hashlib.md5(  # noqa: S324
+            ":".join([*(versions[path] for path in paths), *extra]).encode()
+        ).hexdigest()
 
     def get_nb_accesses(self):
         """
@@ -590,22 +1094,90 @@ class Document(MP_Node, BaseModel):
         - directly attached to the document
         - attached to any of the document's ancestors
         """
-        cache_key = self.get_nb_accesses_cache_key()
-        nb_accesses = cache.get(cache_key)
+        if self._prefetched_nb_accesses is not None:
+            return self._prefetched_nb_accesses
 
-        if nb_accesses is None:
-            nb_accesses = (
-                DocumentAccess.objects.filter(document=self).count(),
-                DocumentAccess.objects.filter(
-                    document__path=Left(
-                        models.Value(self.path), Length("document__path")
+        return self.resolve_nb_accesses([self])[self.pk]
+
+    @classmethod
+    def prefetch_nb_accesses(cls, documents):
+        """
+        Resolve the number of accesses of many documents at once and set it on each
+        document so that `get_nb_accesses` does not resolve it again.
+        """
+        documents = list(documents)
+        nb_accesses = cls.resolve_nb_accesses(documents)
+        for document in documents:
+            document.set_nb_accesses(nb_accesses[document.pk])
+
+    @classmethod
+    def resolve_nb_accesses(cls, documents):
+        """
+        Return the number of accesses of each document passed in argument, by id.
+
+        Cached values are fetched in one round-trip and the missing ones are computed
+        with a single query grouping accesses by the path of their document, among
+        the paths of the documents and of their ancestors.
+        """
+        documents = list(documents)
+        paths = {
+            path for document in documents for path in document.get_ancestors_paths()
+        }
+        versions = cls.get_accesses_versions(paths)
+        cache_keys = {
+            document.pk: document.get_nb_accesses_cache_key(versions)
+            for document in documents
+        }
+        cached_nb_accesses = cache.get_many(cache_keys.values())
+
+        missing_documents = [
+            document
+            for document in documents
+            if cache_keys[document.pk] not in cached_nb_accesses
+        ]
+        if missing_documents:
+            paths = {
+                path
+                for document in missing_documents
+                for path in document.get_ancestors_paths()
+            }
+            accesses_per_path = (
+                DocumentSubtreeRole.objects.filter(path__in=paths)
+                .values("path")
+                .annotate(
+                    nb_accesses=models.Count("pk"),
+                    nb_accesses_alive=models.Count(
+                        "pk", filter=models.Q(ancestors_deleted_at__isnull=True)
                     ),
-                    document__ancestors_deleted_at__isnull=True,
-                ).count(),
+                )
+                .values_list("path", "nb_accesses", "nb_accesses_alive")
             )
-            cache.set(cache_key, nb_accesses)
+            counts_per_path = {
+                path: (nb_accesses, nb_accesses_alive)
+                for path, nb_accesses, nb_accesses_alive in accesses_per_path
+            }
+
+            missing_nb_accesses = {
+                cache_keys[document.pk]: (
+                    counts_per_path.get(document.path, (0, 0))[0],
+                    sum(
+                        counts_per_path.get(path, (0, 0))[1]
+                        for path in document.get_ancestors_paths()
+                    ),
+                )
+                for document in missing_documents
+            }
+            cache.set_many(missing_nb_accesses)
+            cached_nb_accesses.update(missing_nb_accesses)
+
+        return {
+            document.pk: cached_nb_accesses[cache_keys[document.pk]]
+            for document in documents
+        }
 
-        return nb_accesses
+    def set_nb_accesses(self, nb_accesses):
+        """Set the number of accesses of the document, resolved in bulk."""
+        self._prefetched_nb_accesses = nb_accesses
 
     @property
     def nb_accesses_direct(self):
@@ -617,33 +1189,96 @@ class Document(MP_Node, BaseModel):
         """Returns the number of accesses related to the document or one of its ancestors."""
         return self.get_nb_accesses()[1]
 
-    def invalidate_nb_accesses_cache(self):
+    def invalidate_accesses_cache(self):
         """
-        Invalidate the cache for number of accesses, including on affected descendants.
-        Args:
-            path: can optionally be passed as argument (useful when invalidating cache for a
-                document we just deleted)
+        Invalidate the cache for number of accesses and roles, including on affected
+        descendants, by renewing the version of the document's subtree.
+
+        The version is renewed again once the transaction is committed so that values
+        computed by concurrent requests before the changes are visible can not be used.
+        Roles already resolved in the subtree during the current request are dropped.
+        """
+        self.invalidate_subtrees_accesses_cache([self.path])
+
+    @classmethod
+    def invalidate_subtrees_accesses_cache(cls, paths):
         """
+        Invalidate the cache for number of accesses and roles of the subtrees at the
+        paths passed in argument (see `invalidate_accesses_cache`).
+        """
+        cache_keys = [cls.get_accesses_version_cache_key(path) for path in paths]
+        cache.set_many({cache_key: uuid.uuid4().hex for cache_key in cache_keys}, None)
+        transaction.on_commit(
+            lambda: cache.set_many(
+                {cache_key: uuid.uuid4().hex for cache_key in cache_keys}, None
+            )
+        )
 
-        for document in Document.objects.filter(path__startswith=self.path).only("id"):
-            cache_key = document.get_nb_accesses_cache_key()
-            cache.delete(cache_key)
+        request_roles = request_roles_cache.get()
+        if request_roles:
+            prefixes = tuple(paths)
+            for key in [key for key in request_roles if key[1].startswith(prefixes)]:
+                del request_roles[key]
+
+    def get_role_cache_key(self, user):
+        """
+        Generate a cache key for the role of a user on the document, that changes as
+        soon as the version of the subtree of the document or of one of its ancestors
+        is renewed, or as soon as the teams of the user change.
+        """
+        digest = self._get_accesses_digest(extra=sorted(user.teams))
+        return f"document_{self.id!s}_role_{user.pk!s}_{digest:s}"
 
     def get_role(self, user):
-        """Return the roles a user has on a document."""
+        """
+        Return the roles a user has on a document.
+
+        Unless roles were annotated on the queryset, the role is resolved once per
+        request and, if the DOCUMENT_ROLES_CACHE_TIMEOUT setting is set, shared between
+        requests for that many seconds.
+        """
         if not user.is_authenticated:
             return None
 
         try:
-            roles = self.user_roles or []
+            return RoleChoices.max(*(self.user_roles or []))
         except AttributeError:
-            roles = DocumentAccess.objects.filter(
-                models.Q(user=user) | models.Q(team__in=user.teams),
-                document__path=Left(models.Value(self.path), Length("document__path")),
-            ).values_list("role", flat=True)
+            pass
+
+        request_roles = request_roles_cache.get()
+        request_key = (user.pk, self.path)
+        if request_roles is not None and request_key in request_roles:
+            return request_roles[request_key]
+
+        timeout = settings.DOCUMENT_ROLES_CACHE_TIMEOUT
+        if timeout:
+            cache_key = self.get_role_cache_key(user)
+            # An empty string is cached when the user has no role
+            role = cache.get(cache_key)
+            if role is None:
+                role = self.compute_role(user) or ""
+                cache.set(cache_key, role, timeout)
+            role = role or None
+        else:
+            role = self.compute_role(user)
 
+        if request_roles is not None:
+            request_roles[request_key] = role
+
+        return role
+
+    def compute_role(self, user):
+        """Resolve the role of a user on the document from the database."""
+        roles = DocumentSubtreeRole.objects.filter(
+            models.Q(user=user) | models.Q(team__in=user.teams),
+            path__in=self.get_ancestors_paths(),
+        ).values_list("role", flat=True)
         return RoleChoices.max(*roles)
 
+    def get_ancestors_paths(self, include_self=True):
+        """Return the paths of the document's ancestors, from the root down."""
+        return get_ancestors_paths(self.path, self.steplen, include_self=include_self)
+
     def compute_ancestors_links_paths_mapping(self):
         """
         Compute the ancestors links for the current document up to the highest readable ancestor.
@@ -675,6 +1310,13 @@ class Document(MP_Node, BaseModel):
         if getattr(self, "_ancestors_link_definition", None) is None:
             if self.depth <= 1:
                 ancestors_links = []
+            elif hasattr(self, "ancestors_links"):
+                # Links are only inherited if none of the ancestors is deleted
+                ancestors_links = (
+                    self.ancestors_links
+                    if len(self.ancestors_links) == self.depth - 1
+                    else []
+                )
             else:
                 mapping = self.compute_ancestors_links_paths_mapping()
                 ancestors_links = mapping.get(self.path[: -self.steplen], [])
@@ -721,13 +1363,95 @@ class Document(MP_Node, BaseModel):
         """Actual link role on the document."""
         return self.computed_link_definition["link_role"]
 
+    @classmethod
+    def get_paths_links_mapping(cls, paths):
+        """
+        Compute the ancestors links of many documents at once, in a single query.
+
+        The paths of all ancestors are derived from the documents' paths so that
+        their link definitions can be fetched with one `path__in` lookup. Returns
+        a mapping of each ancestor's path to the list of link definitions from the
+        root down to this ancestor, as `compute_ancestors_links_paths_mapping` does.
+        """
+        ancestors_paths = {
+            ancestor_path
+            for path in paths
+            for ancestor_path in get_ancestors_paths(
+                path, cls.steplen, include_self=False
+            )
+        }
+        if not ancestors_paths:
+            return {}
+
+        ancestors = (
+            cls.objects.filter(
+                path__in=ancestors_paths, ancestors_deleted_at__isnull=True
+            )
+            .order_by("path")
+            .values_list("path", "link_reach", "link_role")
+        )
+
+        paths_links_mapping = {}
+        for path, link_reach, link_role in ancestors:
+            paths_links_mapping[path] = [
+                *paths_links_mapping.get(path[: -cls.steplen], []),
+                {"link_reach": link_reach, "link_role": link_role},
+            ]
+
+        return paths_links_mapping
+
+    @classmethod
+    def prefetch_abilities(cls, documents, user, paths_links_mapping=None):
+        """
+        Compute abilities of a user on many documents at once and set them on each
+        document so that `get_abilities` does not compute them again.
+
+        Ancestors link definitions are resolved in one query unless a mapping is
+        passed and abilities are computed only once per distinct combination of
+        role, link definitions and deletion status among the documents.
+        """
+        if paths_links_mapping is None:
+            paths_links_mapping = cls.get_paths_links_mapping(
+                document.path for document in documents
+            )
+
+        abilities_per_key = {}
+        for document in documents:
+            links = paths_links_mapping.get(document.path[: -cls.steplen], [])
+            document.ancestors_link_definition = get_equivalent_link_definition(links)
+
+            role = document.get_role(user)
+            key = (
+                role,
+                document.ancestors_link_reach,
+                document.ancestors_link_role,
+                document.link_reach,
+                document.link_role,
+                bool(document.ancestors_deleted_at),
+            )
+            if key not in abilities_per_key:
+                abilities_per_key[key] = document.compute_abilities(role, user)
+
+            document.set_abilities(user, abilities_per_key[key])
+
+    def set_abilities(self, user, abilities):
+        """Set abilities of a user on the document, precomputed in bulk."""
+        self._prefetched_abilities = (user, abilities)
+
     def get_abilities(self, user):
         """
         Compute and return abilities for a given user on the document.
         """
-        # First get the role based on specific access
-        role = self.get_role(user)
+        if self._prefetched_abilities and self._prefetched_abilities[0] == user:
+            return self._prefetched_abilities[1]
+
+        return self.compute_abilities(self.get_role(user), user)
 
+    def compute_abilities(self, role, user):
+        """
+        Compute abilities on the document for a user holding the role passed in
+        argument, based on specific accesses to the document or its ancestors.
+        """
         # Characteristics that are based only on specific access
         is_owner = role == RoleChoices.OWNER
         is_deleted = self.ancestors_deleted_at and not is_owner
@@ -889,7 +1613,7 @@ class Document(MP_Node, BaseModel):
 
         self.ancestors_deleted_at = self.deleted_at = timezone.now()
         self.save()
-        self.invalidate_nb_accesses_cache()
+        self.invalidate_accesses_cache()
 
         if self.depth > 1:
             self._meta.model.objects.filter(pk=self.get_parent().pk).update(
@@ -901,6 +1625,7 @@ class Document(MP_Node, BaseModel):
         self.get_descendants().filter(ancestors_deleted_at__isnull=True).update(
             ancestors_deleted_at=self.ancestors_deleted_at
         )
+        DocumentSubtreeRole.objects.sync_subtree(self.path)
 
     @transaction.atomic
     def restore(self):
@@ -932,12 +1657,13 @@ class Document(MP_Node, BaseModel):
         )
         self.ancestors_deleted_at = ancestors_deleted_at
         self.save(update_fields=["deleted_at", "ancestors_deleted_at"])
-        self.invalidate_nb_accesses_cache()
+        self.invalidate_accesses_cache()
 
         self.get_descendants().exclude(
             models.Q(deleted_at__isnull=False)
             | models.Q(ancestors_deleted_at__lt=current_deleted_at)
         ).update(ancestors_deleted_at=self.ancestors_deleted_at)
+        DocumentSubtreeRole.objects.sync_subtree(self.path)
 
         if self.depth > 1:
             self._meta.model.objects.filter(pk=self.get_parent().pk).update(
@@ -1008,6 +1734,20 @@ class DocumentFavorite(BaseModel):
         return f"{self.user!s} favorite on document {self.document!s}"
 
 
+class DocumentAccessQuerySet(models.QuerySet):
+    """Custom queryset for the DocumentAccess model."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Keep subtree roles in sync with accesses created in bulk and invalidate the
+        accesses cache of their documents.
+        """
+        objs = super().bulk_create(objs, *args, **kwargs)
+        for document in DocumentSubtreeRole.objects.sync_accesses(objs):
+            document.invalidate_accesses_cache()
+        return objs
+
+
 class DocumentAccess(BaseAccess):
     """Relation model to give access to a document for a user or a team with a role."""
 
@@ -1017,6 +1757,8 @@ class DocumentAccess(BaseAccess):
         related_name="accesses",
     )
 
+    objects = DocumentAccessQuerySet.as_manager()
+
     class Meta:
         db_table = "impress_document_access"
         ordering = ("-created_at",)
@@ -1047,9 +1789,13 @@ class DocumentAccess(BaseAccess):
         return f"{self.user!s} is {self.role:s} in document {self.document!s}"
 
     def save(self, *args, **kwargs):
-        """Override save to clear the document's cache for number of accesses."""
+        """
+        Override save to update the subtree role of the access and clear the
+        document's cache for number of accesses.
+        """
         super().save(*args, **kwargs)
-        self.document.invalidate_nb_accesses_cache()
+        DocumentSubtreeRole.objects.sync_accesses([self])
+        self.document.invalidate_accesses_cache()
 
     @property
     def target_key(self):
@@ -1059,7 +1805,7 @@ class DocumentAccess(BaseAccess):
     def delete(self, *args, **kwargs):
         """Override delete to clear the document's cache for number of accesses."""
         super().delete(*args, **kwargs)
-        self.document.invalidate_nb_accesses_cache()
+        self.document.invalidate_accesses_cache()
 
     def set_user_roles_tuple(self, ancestors_role, current_role):
         """
@@ -1169,6 +1915,504 @@ class DocumentAccess(BaseAccess):
         }
 
 
+class DocumentSubtreeRoleManager(models.Manager):
+    """Manager keeping subtree roles in sync with document accesses."""
+
+    def sync_accesses(self, accesses):
+        """
+        Create or update the subtree roles mirroring the given document accesses and
+        return the documents of the accesses, with their path loaded.
+        Subtree roles of deleted accesses are removed by cascade.
+        """
+        accesses = [access for access in accesses if access.pk]
+        if not accesses:
+            return []
+
+        documents = Document.objects.only("path", "ancestors_deleted_at").in_bulk(
+            {access.document_id for access in accesses}
+        )
+
+        self.bulk_create(
+            [
+                self.model(
+                    access_id=access.pk,
+                    document_id=access.document_id,
+                    path=documents[access.document_id].path,
+                    ancestors_deleted_at=documents[
+                        access.document_id
+                    ].ancestors_deleted_at,
+                    user_id=access.user_id,
+                    team=access.team,
+                    role=access.role,
+                )
+                for access in accesses
+                if access.document_id in documents
+            ],
+            update_conflicts=True,
+            unique_fields=["access"],
+            update_fields=[
+                "document",
+                "path",
+                "ancestors_deleted_at",
+                "user",
+                "team",
+                "role",
+            ],
+        )
+        return list(documents.values())
+
+    def sync_subtree(self, path, last_path=None):
+        """
+        Refresh the document path and deletion date denormalized on the subtree roles
+        of the document at the given path and of all its descendants, or of the
+        documents at the paths from `path` to `last_path` and of all their descendants.
+        """
+        last_path = last_path or path
+        documents = Document.objects.filter(pk=models.OuterRef("document_id"))
+        self.filter(
+            models.Q(document__path__range=(path, last_path))
+            | models.Q(document__path__startswith=last_path)
+        ).update(
+            path=models.Subquery(documents.values("path")[:1]),
+            ancestors_deleted_at=models.Subquery(
+                documents.values("ancestors_deleted_at")[:1]
+            ),
+        )
+
+
+class DocumentSubtreeRole(models.Model):
+    """
+    Denormalized copy of a document access, keyed by the path of the document it
+    targets. Each row gives a user or a team a role on a whole document subtree so
+    that the roles on a document and its ancestors can be resolved by prefix on a
+    single indexed table, without joining the document table.
+
+    Rows are maintained by `DocumentAccess.save`, `DocumentAccess.objects.bulk_create`,
+    `Document.move`, `Document.soft_delete` and `Document.restore`. They are deleted
+    by cascade along with their access.
+    """
+
+    access = models.OneToOneField(
+        DocumentAccess,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="subtree_role",
+    )
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name="subtree_roles",
+    )
+    path = models.CharField(max_length=7 * 36, db_collation="C")
+    ancestors_deleted_at = models.DateTimeField(null=True, blank=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    team = models.CharField(max_length=100, blank=True)
+    role = models.CharField(max_length=20, choices=RoleChoices.choices)
+
+    objects = DocumentSubtreeRoleManager()
+
+    class Meta:
+        db_table = "impress_document_subtree_role"
+        verbose_name = _("Document subtree role")
+        verbose_name_plural = _("Document subtree roles")
+        indexes = [
+            models.Index(fields=["user", "path"], name="subtree_role_user_path_idx"),
+            models.Index(fields=["team", "path"], name="subtree_role_team_path_idx"),
+        ]
+
+    def __str__(self):
+        target = f"user:{self.user_id!s}" if self.user_id else f"team:{self.team:s}"
+        return f"{target:s} is {self.role:s} on subtree {self.path:s}"
+
+
+class DocumentAttachmentQuerySet(models.QuerySet):
+    """Queryset of the index of attachments."""
+
+    def sync_document(self, document, indexed_keys=None):
+        """
+        Index the attachments of a document as they are saved on it, and invalidate
+        the decisions cached on the keys added and removed. When the keys already
+        indexed are given, only the keys added and removed are written.
+        """
+        keys = set(document.attachments or [])
+        if indexed_keys is None:
+            self.filter(document=document).exclude(key__in=keys).delete()
+            indexed_keys = set()
+        elif removed_keys := indexed_keys - keys:
+            self.filter(document=document, key__in=removed_keys).delete()
+
+        if added_keys := keys - indexed_keys:
+            self.bulk_create(
+                [self.model(document=document, key=key) for key in added_keys],
+                ignore_conflicts=True,
+            )
+
+        self.model.invalidate_cache(keys ^ indexed_keys)
+
+    def readable(self, user):
+        """
+        Filter the attachments of documents that the given user can read, because the
+        document or one of its ancestors is reachable by link or gives the user a role.
+        Each check is an index lookup on the paths of the ancestors of the document.
+        """
+        ancestors_paths = AncestorsPaths(
+            models.OuterRef("document__path"),
+            Document.steplen,
+            Document._meta.get_field("path").max_length,  # noqa: SLF001
+        )
+
+        if not user.is_authenticated:
+            return self.filter(
+                models.Exists(
+                    Document.objects.filter(
+                        path__in=ancestors_paths, link_reach=LinkReachChoices.PUBLIC
+                    )
+                )
+            )
+
+        return self.filter(
+            models.Exists(
+                Document.objects.filter(path__in=ancestors_paths).exclude(
+                    link_reach=LinkReachChoices.RESTRICTED
+                )
+            )
+            | models.Exists(
+                DocumentSubtreeRole.objects.filter(
+                    models.Q(user=user) | models.Q(team__in=user.teams),
+                    path__in=ancestors_paths,
+                )
+            )
+        )
+
+
+class DocumentAttachment(models.Model):
+    """
+    Index of the attachments of documents by their key in object storage, so that the
+    documents including an attachment are found without scanning the attachments
+    array of all documents.
+
+    Rows are maintained by `Document.save` whenever the attachments of a document
+    change, which covers `DocumentSerializer.save`, `attachment_upload`, `duplicate`
+    and `malware_detection_callback`. They are deleted by cascade along with their
+    document.
+    """
+
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.CASCADE,
+        related_name="attachment_keys",
+    )
+    key = models.CharField(max_length=255)
+
+    objects = DocumentAttachmentQuerySet.as_manager()
+
+    class Meta:
+        db_table = "impress_document_attachment"
+        verbose_name = _("Document attachment")
+        verbose_name_plural = _("Document attachments")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key", "document"],
+                name="unique_document_attachment",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.key:s} attached to document {self.document_id!s}"
+
+    @staticmethod
+    def get_version_cache_key(key):
+        """Generate the cache key holding the version of the decisions on an attachment."""
+        return f"attachment_{key:s}_version"
+
+    @classmethod
+    def get_cached_decisions(cls, key, user=None):
+        """
+        Return the decisions cached on an attachment: its "status" and, if a user is
+        given, whether it is "readable" by the user. They are returned along with the
+        slots where new decisions are cached, holding the versions they are made with.
+
+        Decisions are only used while the versions they were made with are current:
+        the version of the attachment, a random token renewed whenever the documents
+        including it change, and for "readable" the accesses versions of these
+        documents and of their ancestors (see `Document.get_accesses_versions`).
+        Invalidating decisions thus never requires looking up the attachments
+        concerned. Missing versions are initialized atomically.
+        """
+        if settings.MEDIA_AUTH_CACHE_TIMEOUT <= 0:
+            return {}, {}
+
+        decision_keys = {"status": f"attachment_{key:s}_status"}
+        if user is not None and user.is_authenticated:
+            teams = ":".join(sorted(user.teams))
+            digest = hashlib.md5(teams.encode()).hexdigest()  # noqa: S324
+            decision_keys["readable"] = (
+                f"attachment_{key:s}_user_{user.pk!s}_{digest:s}"
+            )
+        elif user is not None:
+            decision_keys["readable"] = f"attachment_{key:s}_anonymous"
+
+        version_key = cls.get_version_cache_key(key)
+        cached = cache.get_many([version_key, *decision_keys.values()])
+        version = cached.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(version_key, version, None):
+                version = cache.get(version_key)
+
+        decisions = {}
+        for name, decision_key in decision_keys.items():
+            if decision_key not in cached:
+                continue
+            versions, decision = cached[decision_key]
+            if versions[0] != version:
+                continue
+            if name == "readable" and (
+                Document.get_accesses_versions(versions[1]) != versions[1]
+            ):
+                continue
+            decisions[name] = decision
+
+        slots = {
+            name: (decision_key, (version,))
+            for name, decision_key in decision_keys.items()
+        }
+        if "readable" in slots and "readable" not in decisions:
+            paths = {
+                path
+                for document_path in cls.objects.filter(key=key).values_list(
+                    "document__path", flat=True
+                )
+                for path in get_ancestors_paths(document_path, Document.steplen)
+            }
+            slots["readable"] = (
+                decision_keys["readable"],
+                (version, Document.get_accesses_versions(paths)),
+            )
+        return slots, decisions
+
+    @staticmethod
+    def cache_decisions(slots, decisions):
+        """
+        Cache decisions in the slots returned by `get_cached_decisions`, under the
+        versions they were made with, during MEDIA_AUTH_CACHE_TIMEOUT seconds.
+        """
+        entries = {
+            slots[name][0]: (slots[name][1], decision)
+            for name, decision in decisions.items()
+            if name in slots and slots[name][1][0] is not None
+        }
+        if entries:
+            cache.set_many(entries, settings.MEDIA_AUTH_CACHE_TIMEOUT)
+
+    @classmethod
+    def invalidate_cache(cls, keys):
+        """
+        Invalidate the decisions cached on attachments by renewing their version.
+
+        The versions are renewed again once the transaction is committed so that
+        decisions made by concurrent requests before the changes are visible can not
+        be used.
+        """
+        if settings.MEDIA_AUTH_CACHE_TIMEOUT <= 0 or not keys:
+            return
+
+        def renew_versions():
+            cache.set_many(
+                {cls.get_version_cache_key(key): uuid.uuid4().hex for key in keys},
+                None,
+            )
+
+        renew_versions()
+        transaction.on_commit(renew_versions)
+
+
+class Attachment(BaseModel):
+    """
+    A file uploaded as attachment of a document, with its processing status, so that
+    the readiness of an attachment is known without reading the metadata of its file
+    in object storage. An attachment is ready once the malware detection found it safe.
+    Files uploaded directly to object storage are uploading until their upload is
+    completed and their content checked.
+
+    Files uploaded before attachments were recorded have no record: their status is
+    still read in the metadata of their file.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.SET_NULL,
+        related_name="uploaded_attachments",
+        null=True,
+        blank=True,
+    )
+    creator = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="attachments",
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[(status.value, status.value) for status in DocumentAttachmentStatus],
+        default=DocumentAttachmentStatus.PROCESSING.value,
+    )
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = "impress_attachment"
+        verbose_name = _("Attachment")
+        verbose_name_plural = _("Attachments")
+
+    def __str__(self):
+        return f"{self.key:s} ({self.status:s})"
+
+    def abort_upload(self):
+        """
+        Abort the multipart uploads of the file of the attachment in object storage, so
+        that the parts already uploaded are not kept, and delete the attachment.
+        """
+        s3_client = default_storage.connection.meta.client
+        response = s3_client.list_multipart_uploads(
+            Bucket=default_storage.bucket_name, Prefix=self.key
+        )
+        for upload in response.get("Uploads", []):
+            if upload["Key"] == self.key:
+                s3_client.abort_multipart_upload(
+                    Bucket=default_storage.bucket_name,
+                    Key=self.key,
+                    UploadId=upload["UploadId"],
+                )
+        self.delete()
+
+
+class DocumentContentUploadManager(models.Manager):
+    """Manager of the outbox of contents waiting to be uploaded to object storage."""
+
+    def enqueue(self, *documents):
+        """
+        Save the contents of documents in the outbox, replacing any content of the same
+        documents that was not uploaded yet, and schedule their upload once the
+        transaction is committed. Successive saves of a document are coalesced in a
+        single upload.
+        """
+        # Tasks import models so they can't be imported at the top of this module
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from core.tasks.documents import upload_document_content  # noqa: PLC0415
+
+        if not documents:
+            return
+
+        self.bulk_create(
+            [
+                self.model(
+                    document=document,
+                    etag=document.content_etag,
+                    content=document.content,
+                )
+                for document in documents
+            ],
+            update_conflicts=True,
+            unique_fields=["document"],
+            update_fields=["etag", "content", "updated_at"],
+        )
+        for document in documents:
+            transaction.on_commit(
+                partial(
+                    upload_document_content.apply_async,
+                    (document.pk,),
+                    countdown=settings.DOCUMENT_CONTENT_WRITE_BEHIND_DELAY,
+                )
+            )
+
+
+class DocumentContentUpload(models.Model):
+    """
+    Outbox of the contents of documents saved with write behind, waiting to be uploaded
+    to object storage by a celery task. There is at most one row per document, holding
+    its latest content, which is removed once uploaded. The row is claimed by the task
+    uploading it so that uploads of a document are never run concurrently.
+    """
+
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="content_upload",
+    )
+    etag = models.CharField(max_length=32)
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DocumentContentUploadManager()
+
+    class Meta:
+        db_table = "impress_document_content_upload"
+        verbose_name = _("Document content upload")
+        verbose_name_plural = _("Document content uploads")
+
+    def __str__(self):
+        return f"content {self.etag:s} of document {self.document_id!s}"
+
+    def is_claimed(self):
+        """
+        Return True if an upload of the content started less than
+        DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT seconds ago. Older claims are
+        considered abandoned, e.g. by a worker that was stopped.
+        """
+        return self.claimed_at is not None and self.claimed_at > (
+            timezone.now()
+            - timedelta(seconds=settings.DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT)
+        )
+
+    def release(self):
+        """Release the claim on the content, unless another upload took it over."""
+        self._meta.model.objects.filter(pk=self.pk, claimed_at=self.claimed_at).update(
+            claimed_at=None
+        )
+
+
+class ImportedDocument(models.Model):
+    """
+    Record of a document created by a bulk import, under the identifier it had in the
+    source of the import, so that an interrupted import can be resumed: documents
+    already imported are skipped and used as parents of the next ones.
+    """
+
+    document = models.OneToOneField(
+        Document,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="import_record",
+    )
+    import_key = models.CharField(max_length=255)
+    external_id = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = "impress_imported_document"
+        verbose_name = _("Imported document")
+        verbose_name_plural = _("Imported documents")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["import_key", "external_id"],
+                name="unique_imported_document",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.external_id:s} imported as document {self.document_id!s}"
+
+
 class DocumentAskForAccess(BaseModel):
     """Relation model to ask for access to a document."""
 
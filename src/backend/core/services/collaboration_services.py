@@ -1,10 +1,41 @@
 """Collaboration services."""
 
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from functools import cache as memoize
+
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
 
 import requests
 
+logger = logging.getLogger(__name__)
+
+# Shared between processes so that they all stop calling a failing server together
+CIRCUIT_OPEN_CACHE_KEY = "collaboration:circuit-open"
+FAILURES_CACHE_KEY = "collaboration:failures"
+
+# Lookups of connection info in progress in this process, by their cache key
+connection_info_lookups = {}
+connection_info_lookups_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.HTTPError):
+    """Raised without calling the collaboration server while it is considered down."""
+
+
+@memoize
+def get_session():
+    """
+    Return the HTTP session shared by all calls to the collaboration server in this
+    process, so that connections are kept alive and reused.
+    """
+    return requests.Session()
+
 
 class CollaborationService:
     """Service class for Collaboration related operations."""
@@ -14,27 +45,118 @@ class CollaborationService:
         if settings.COLLABORATION_API_URL is None:
             raise ImproperlyConfigured("Collaboration configuration not set")
 
+    def _request(self, method, endpoint, error_message, **kwargs):
+        """
+        Call an endpoint of the collaboration server on a pooled connection, logging
+        the latency and failures of each call.
+
+        After COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD consecutive failures, calls
+        fail fast without reaching the server for the following
+        COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT seconds.
+        """
+        if cache.get(CIRCUIT_OPEN_CACHE_KEY):
+            logger.warning(
+                "Collaboration server call to %s skipped: circuit open", endpoint
+            )
+            raise CircuitOpenError(f"{error_message:s} Circuit open.")
+
+        start = time.perf_counter()
+        try:
+            response = get_session().request(
+                method,
+                f"{settings.COLLABORATION_API_URL}{endpoint:s}/",
+                timeout=settings.COLLABORATION_API_TIMEOUT,
+                **kwargs,
+            )
+        except requests.RequestException as e:
+            logger.warning(
+                "Collaboration server call to %s failed after %.3fs: %s",
+                endpoint,
+                time.perf_counter() - start,
+                e,
+            )
+            self._record_failure()
+            raise requests.HTTPError(error_message) from e
+
+        logger.debug(
+            "Collaboration server call to %s returned %d in %.3fs",
+            endpoint,
+            response.status_code,
+            time.perf_counter() - start,
+        )
+        if response.status_code >= 500:
+            self._record_failure()
+        elif cache.get(FAILURES_CACHE_KEY):
+            cache.delete(FAILURES_CACHE_KEY)
+        return response
+
+    @staticmethod
+    def _record_failure():
+        """
+        Count a consecutive failure and open the circuit beyond the threshold. Failures
+        are forgotten after COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT seconds.
+        """
+        timeout = settings.COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT
+        failures = 1
+        if not cache.add(FAILURES_CACHE_KEY, failures, timeout):
+            try:
+                failures = cache.incr(FAILURES_CACHE_KEY)
+            except ValueError:
+                # The counter expired or was evicted since it was added
+                cache.set(FAILURES_CACHE_KEY, failures, timeout)
+
+        if failures >= settings.COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD:
+            logger.error(
+                "Collaboration server circuit opened after %d consecutive failures",
+                failures,
+            )
+            cache.set(
+                CIRCUIT_OPEN_CACHE_KEY,
+                True,
+                settings.COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT,
+            )
+
     def reset_connections(self, room, user_id=None):
         """
         Reset connections of a room in the collaboration server.
         Resetting a connection means that the user will be disconnected and will
         have to reconnect to the collaboration server, with updated rights.
+
+        When COLLABORATION_RESET_CONNECTIONS_ASYNC is enabled, the reset is sent by a
+        celery task once the transaction is committed, without waiting for it.
         """
-        endpoint = "reset-connections"
+        if settings.COLLABORATION_RESET_CONNECTIONS_ASYNC:
+            # Tasks import services so they can't be imported at the top of this module
+            # pylint: disable-next=import-outside-toplevel,cyclic-import
+            from core.tasks.collaboration import (  # noqa: PLC0415
+                reset_collaboration_connections,
+            )
 
-        # room is necessary as a parameter, it is easier to stick to the
-        # same pod thanks to a parameter
-        endpoint_url = f"{settings.COLLABORATION_API_URL}{endpoint}/?room={room}"
+            transaction.on_commit(
+                lambda: reset_collaboration_connections.delay(room, user_id)
+            )
+            return
+
+        self.send_reset_connections(room, user_id)
+
+    def send_reset_connections(self, room, user_id=None):
+        """Ask the collaboration server to reset connections of a room right away."""
+        endpoint = "reset-connections"
 
         # Note: Collaboration microservice accepts only raw token, which is not recommended
         headers = {"Authorization": settings.COLLABORATION_SERVER_SECRET}
         if user_id:
             headers["X-User-Id"] = user_id
 
-        try:
-            response = requests.post(endpoint_url, headers=headers, timeout=10)
-        except requests.RequestException as e:
-            raise requests.HTTPError("Failed to notify WebSocket server.") from e
+        # room is necessary as a parameter, it is easier to stick to the
+        # same pod thanks to a parameter
+        response = self._request(
+            "post",
+            endpoint,
+            "Failed to notify WebSocket server.",
+            headers=headers,
+            params={"room": room},
+        )
 
         if response.status_code != 200:
             raise requests.HTTPError(
@@ -44,23 +166,69 @@ class CollaborationService:
 
     def get_document_connection_info(self, room, session_key):
         """
-        Get the connection info for a document.
+        Get the connection info for a document, cached during
+        COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT seconds: the info of the session
+        and the number of connections to the room, so that a room without connections
+        is answered without calling the collaboration server for any session.
+
+        Concurrent lookups of the same info in this process share a single call.
+        """
+        room_cache_key = f"collaboration:connections:{room!s}"
+        session_cache_key = f"{room_cache_key:s}:{session_key!s}"
+        timeout = settings.COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT
+
+        if timeout > 0:
+            cached = cache.get_many([room_cache_key, session_cache_key])
+            if session_cache_key in cached:
+                return tuple(cached[session_cache_key])
+            if cached.get(room_cache_key) == 0:
+                return 0, False
+
+        with connection_info_lookups_lock:
+            lookup = connection_info_lookups.get(session_cache_key)
+            is_owner = lookup is None
+            if is_owner:
+                lookup = connection_info_lookups[session_cache_key] = Future()
+
+        if not is_owner:
+            return lookup.result()
+
+        try:
+            count, exists = self.fetch_document_connection_info(room, session_key)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            lookup.set_exception(e)
+            raise
+        else:
+            lookup.set_result((count, exists))
+        finally:
+            with connection_info_lookups_lock:
+                del connection_info_lookups[session_cache_key]
+
+        if timeout > 0:
+            cache.set_many(
+                {room_cache_key: count, session_cache_key: (count, exists)}, timeout
+            )
+        return count, exists
+
+    def fetch_document_connection_info(self, room, session_key):
+        """
+        Get the connection info for a document from the collaboration server.
         """
         endpoint = "get-connections"
         querystring = {
             "room": room,
             "sessionKey": session_key,
         }
-        endpoint_url = f"{settings.COLLABORATION_API_URL}{endpoint}/"
 
         headers = {"Authorization": settings.COLLABORATION_SERVER_SECRET}
 
-        try:
-            response = requests.get(
-                endpoint_url, headers=headers, params=querystring, timeout=10
-            )
-        except requests.RequestException as e:
-            raise requests.HTTPError("Failed to get document connection info.") from e
+        response = self._request(
+            "get",
+            endpoint,
+            "Failed to get document connection info.",
+            headers=headers,
+            params=querystring,
+        )
 
         if response.status_code == 200:
             result = response.json()
@@ -1,10 +1,21 @@
 """Converter services."""
 
+import asyncio
+import hashlib
+import time
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 
 from django.conf import settings
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from core.content_cache import LRUCache
+
+# Contents converted in this process, keyed by the MD5 hash of their Markdown text
+conversion_cache = LRUCache()
 
 
 class ConversionError(Exception):
@@ -19,6 +30,21 @@ class ServiceUnavailableError(ConversionError):
     """Raised when the conversion service is unavailable."""
 
 
+@cache
+def get_session():
+    """
+    Return the HTTP session shared by all conversions in this process, so that
+    connections to the conversion service are kept alive and reused.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=settings.CONVERSION_API_POOL_SIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 class YdocConverter:
     """Service class for conversion-related operations."""
 
@@ -29,13 +55,48 @@ class YdocConverter:
         return f"Bearer {settings.Y_PROVIDER_API_KEY}"
 
     def convert(self, text):
-        """Convert a Markdown text into our internal format using an external microservice."""
+        """
+        Convert a Markdown text into our internal format using an external microservice.
+        Results are cached by the hash of the text and the conversion is retried with an
+        exponential backoff while the service is unavailable: on connection errors,
+        timeouts and server errors, but not on client errors, which are permanent.
+        """
 
         if not text:
             raise ValidationError("Input text cannot be empty")
 
+        key = hashlib.md5(text.encode("utf-8")).hexdigest()  # noqa: S324
+        content = conversion_cache.get(key)
+        if content is not None:
+            return content
+
+        for attempt in range(settings.CONVERSION_API_RETRIES + 1):
+            try:
+                content = self._request(text)
+            except ServiceUnavailableError:
+                if attempt == settings.CONVERSION_API_RETRIES:
+                    raise
+                time.sleep(settings.CONVERSION_API_RETRY_BACKOFF * 2**attempt)
+            else:
+                break
+
+        conversion_cache.set(key, content, settings.CONVERSION_CACHE_MAX_SIZE)
+        return content
+
+    def convert_many(self, texts, max_workers=None):
+        """
+        Convert Markdown texts concurrently, with at most `max_workers` requests to the
+        conversion service at the same time, and return their contents in order.
+        """
+        with ThreadPoolExecutor(
+            max_workers=max_workers or settings.CONVERSION_API_MAX_CONCURRENCY
+        ) as executor:
+            return list(executor.map(self.convert, texts))
+
+    def _request(self, text):
+        """Send a Markdown text to the conversion service on a pooled connection."""
         try:
-            response = requests.post(
+            response = get_session().post(
                 f"{settings.Y_PROVIDER_API_BASE_URL}{settings.CONVERSION_API_ENDPOINT}/",
                 data=text,
                 headers={
@@ -48,6 +109,30 @@ class YdocConverter:
             response.raise_for_status()
             return b64encode(response.content).decode("utf-8")
         except requests.RequestException as err:
+            if err.response is not None and err.response.status_code < 500:
+                raise ConversionError(
+                    f"Conversion service refused the request: {err.response.status_code:d}"
+                ) from err
             raise ServiceUnavailableError(
                 "Failed to connect to conversion service",
             ) from err
+
+
+class AsyncYdocConverter:
+    """
+    Asyncio variant of the converter, running conversions on the pooled client in
+    threads with at most CONVERSION_API_MAX_CONCURRENCY of them at the same time.
+    """
+
+    def __init__(self):
+        self.converter = YdocConverter()
+        self.semaphore = asyncio.Semaphore(settings.CONVERSION_API_MAX_CONCURRENCY)
+
+    async def convert(self, text):
+        """Convert a Markdown text into our internal format."""
+        async with self.semaphore:
+            return await asyncio.to_thread(self.converter.convert, text)
+
+    async def convert_many(self, texts):
+        """Convert Markdown texts concurrently and return their contents in order."""
+        return await asyncio.gather(*(self.convert(text) for text in texts))
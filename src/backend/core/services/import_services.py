@@ -0,0 +1,273 @@
+"""Import services."""
+
+import hashlib
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db import models as db
+
+from core import content_cache, models
+from core.services.converter_services import ConversionError, YdocConverter
+
+
+class DocumentImportError(Exception):
+    """Raised when documents can't be imported."""
+
+
+class DocumentImporter:
+    """
+    Import a tree of Markdown documents in bulk on behalf of an owner, who is given the
+    owner role on the root documents of the import or is invited to them.
+
+    Documents are records with the "id" identifying them in the source of the import,
+    the "id" of their "parent" (None for root documents), a "title" and a Markdown
+    "content". Parents must come before their children. Records are imported by
+    batches, each in its own transaction, and recorded under the import key so that
+    an interrupted import is resumed by importing the same records again.
+    """
+
+    def __init__(self, import_key, user=None, email=None):
+        self.import_key = import_key
+        self.user = user
+        self.email = email
+        self.converter = YdocConverter()
+        # Path, depth and step of the last child of the parents, by their "id"
+        self._parents = {}
+
+    def import_documents(self, records, batch_size=None):
+        """
+        Import records by batches and return the numbers of documents created and of
+        documents skipped because they were already imported.
+        """
+        batch_size = batch_size or settings.DOCUMENT_IMPORT_BATCH_SIZE
+        records = iter(records)
+
+        created = skipped = 0
+        while batch := list(itertools.islice(records, batch_size)):
+            nb_created = self.import_batch(batch)
+            created += nb_created
+            skipped += len(batch) - nb_created
+        return created, skipped
+
+    def import_batch(self, records, attempts=10):
+        """
+        Import a batch of records and return the number of documents created:
+        - contents are converted concurrently before the transaction is opened,
+        - paths are allocated in bulk, following the last child of each parent,
+        - documents, accesses and import records are created in bulk,
+        - contents are uploaded to object storage concurrently once the transaction
+          is committed, or saved in the outbox of content uploads with write behind.
+
+        If another transaction took one of the paths allocated in the meantime, e.g. by
+        adding a child to one of the parents, paths are allocated again after the last
+        children of the parents, like `Document.add_child` does.
+        """
+        imported_ids = set(
+            models.ImportedDocument.objects.filter(
+                import_key=self.import_key,
+                external_id__in=[record["id"] for record in records],
+            ).values_list("external_id", flat=True)
+        )
+        records = [record for record in records if record["id"] not in imported_ids]
+        if not records:
+            return 0
+
+        parents_ids = {record.get("parent") for record in records} - {None}
+        contents = self._convert(records)
+
+        for attempt in range(1, attempts + 1):
+            self._load_parents(parents_ids)
+            documents, nb_children = self._build_documents(records, contents)
+            try:
+                with_content = self._create_documents(documents, nb_children)
+            except IntegrityError:
+                # Parents are loaded again with their last child on the next attempt
+                for external_id in parents_ids | documents.keys():
+                    self._parents.pop(external_id, None)
+                if (
+                    attempt == attempts
+                    or not models.Document.objects.filter(
+                        path__in=[document.path for document in documents.values()]
+                    ).exists()
+                ):
+                    raise
+            else:
+                break
+
+        for document in with_content:
+            content_cache.set_content(
+                document.pk, document.content_etag, document.content
+            )
+
+        return len(documents)
+
+    @transaction.atomic
+    def _create_documents(self, documents, nb_children):
+        """
+        Create the documents built for a batch along with their accesses or
+        invitations and their import records, and return the documents with content.
+        """
+        models.Document.objects.bulk_create(documents.values())
+        for path, count in nb_children.items():
+            models.Document.objects.filter(path=path).update(
+                numchild=db.F("numchild") + count
+            )
+
+        roots = [document for document in documents.values() if document.depth == 1]
+        if self.user:
+            models.DocumentAccess.objects.bulk_create(
+                [
+                    models.DocumentAccess(
+                        document=document,
+                        user=self.user,
+                        role=models.RoleChoices.OWNER,
+                    )
+                    for document in roots
+                ]
+            )
+        else:
+            models.Invitation.objects.bulk_create(
+                [
+                    models.Invitation(
+                        document=document,
+                        email=self.email,
+                        role=models.RoleChoices.OWNER,
+                    )
+                    for document in roots
+                ]
+            )
+
+        models.ImportedDocument.objects.bulk_create(
+            [
+                models.ImportedDocument(
+                    document=document,
+                    import_key=self.import_key,
+                    external_id=external_id,
+                )
+                for external_id, document in documents.items()
+            ]
+        )
+
+        # Side effects of saving the contents with `Document.save`, which bulk
+        # creation skips. Imported documents have no attachments to index.
+        with_content = [
+            document for document in documents.values() if document.content_etag
+        ]
+        if settings.DOCUMENT_CONTENT_WRITE_BEHIND:
+            models.DocumentContentUpload.objects.enqueue(*with_content)
+        else:
+            transaction.on_commit(partial(self._upload, with_content))
+
+        return with_content
+
+    def _load_parents(self, parents_ids):
+        """Load the parents that were imported by a previous batch or run."""
+        for imported_document in models.ImportedDocument.objects.filter(
+            import_key=self.import_key,
+            external_id__in=parents_ids - self._parents.keys(),
+        ).select_related("document"):
+            document = imported_document.document
+            self._parents[imported_document.external_id] = [
+                document.path,
+                document.depth,
+                document.get_last_child_step(),
+            ]
+
+    def _convert(self, records):
+        """
+        Convert the Markdown contents of records into our internal format concurrently
+        and return them in order, None for records without content.
+        """
+        texts = [record["content"] for record in records if record.get("content")]
+        try:
+            converted = iter(
+                self.converter.convert_many(
+                    texts, max_workers=settings.DOCUMENT_IMPORT_CONVERSION_WORKERS
+                )
+            )
+        except ConversionError as err:
+            raise DocumentImportError(
+                "Could not convert content of documents."
+            ) from err
+
+        return [
+            next(converted) if record.get("content") else None for record in records
+        ]
+
+    def _build_documents(self, records, contents):
+        """
+        Build the documents of records at paths allocated by steps of `step_gap`, like
+        `add_root` and `add_child`, and return them by their "id" along with the number
+        of children added to each parent imported before, by path.
+        """
+        nb_roots = sum(1 for record in records if not record.get("parent"))
+        roots_paths = iter(
+            models.Document.get_next_root_paths(nb_roots) if nb_roots else []
+        )
+
+        documents = {}
+        nb_children = Counter()
+        for record, content in zip(records, contents, strict=True):
+            if record["id"] in documents:
+                raise DocumentImportError(
+                    f'Document "{record["id"]!s}" is imported twice.'
+                )
+
+            parent_id = record.get("parent")
+            if parent_id:
+                try:
+                    parent = self._parents[parent_id]
+                except KeyError as err:
+                    raise DocumentImportError(
+                        f'Parent "{parent_id!s}" of document "{record["id"]!s}" '
+                        "must be imported before it."
+                    ) from err
+                parent[2] += models.Document.step_gap
+                path = models.Document.get_step_path(parent[0], parent[2])
+                depth = parent[1] + 1
+                if parent_id in documents:
+                    documents[parent_id].numchild += 1
+                else:
+                    nb_children[parent[0]] += 1
+            else:
+                path = next(roots_paths)
+                depth = 1
+
+            document = models.Document(
+                title=record.get("title"),
+                creator=self.user,
+                path=path,
+                depth=depth,
+                numchild=0,
+            )
+            if content:
+                document.content = content
+                document.content_etag = hashlib.md5(  # noqa: S324
+                    content.encode("utf-8")
+                ).hexdigest()
+
+            documents[record["id"]] = document
+            self._parents[record["id"]] = [path, depth, 0]
+
+        return documents, nb_children
+
+    @staticmethod
+    def _upload(documents):
+        """Upload the contents of documents to object storage concurrently."""
+        with ThreadPoolExecutor(
+            max_workers=settings.DOCUMENT_IMPORT_UPLOAD_WORKERS
+        ) as executor:
+            list(
+                executor.map(
+                    lambda document: document.upload_content(
+                        document.content.encode("utf-8"),
+                        document.content_etag,
+                        check_stored=False,
+                    ),
+                    documents,
+                )
+            )
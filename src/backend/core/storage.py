@@ -0,0 +1,96 @@
+"""
+Object storage backend for the impress core app.
+
+All calls to object storage go through the client of the default storage, so it is
+configured here from settings: connection pool, keep-alive, retries, timeouts and
+multipart transfers. Failed calls are logged, as well as the latency of each call by
+operation to size them when AWS_S3_LOG_LATENCY is enabled.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from storages.backends.s3 import S3Storage as BaseS3Storage
+
+logger = logging.getLogger(__name__)
+
+
+# Objects in object storage have no local path nor access and creation times
+# pylint: disable-next=abstract-method
+class S3Storage(BaseS3Storage):
+    """S3 storage with a tuned and instrumented client."""
+
+    def get_default_settings(self):
+        """
+        Configure the client and transfers from settings unless they are given with
+        AWS_S3_CLIENT_CONFIG and AWS_S3_TRANSFER_CONFIG.
+        """
+        default_settings = super().get_default_settings()
+
+        if default_settings["client_config"] is None:
+            default_settings["client_config"] = Config(
+                s3={"addressing_style": default_settings["addressing_style"]},
+                signature_version=default_settings["signature_version"],
+                proxies=default_settings["proxies"],
+                max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=settings.AWS_S3_TCP_KEEPALIVE,
+                connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+                read_timeout=settings.AWS_S3_READ_TIMEOUT,
+                retries={
+                    "mode": settings.AWS_S3_RETRY_MODE,
+                    "total_max_attempts": settings.AWS_S3_MAX_ATTEMPTS,
+                },
+            )
+
+        if default_settings["transfer_config"] is None:
+            default_settings["transfer_config"] = TransferConfig(
+                multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+                multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE,
+                max_concurrency=settings.AWS_S3_MAX_CONCURRENCY,
+                use_threads=default_settings["use_threads"],
+            )
+
+        return default_settings
+
+    @property
+    def connection(self):
+        """Instrument the connection of each thread when it is created."""
+        is_new = getattr(self._connections, "connection", None) is None
+        connection = super().connection
+        if is_new:
+            events = connection.meta.client.meta.events
+            events.register("before-call.s3", start_timer)
+            events.register("after-call-error.s3", log_failure)
+            if settings.AWS_S3_LOG_LATENCY:
+                events.register("after-call.s3", log_latency)
+        return connection
+
+
+def start_timer(model, context, **kwargs):
+    """Record the start of a call to object storage."""
+    context["operation"] = model.name
+    context["start"] = time.perf_counter()
+
+
+def log_latency(context, http_response, **kwargs):
+    """Log the latency of a call to object storage."""
+    logger.debug(
+        "S3 %s returned %d in %.3fs",
+        context["operation"],
+        http_response.status_code,
+        time.perf_counter() - context["start"],
+    )
+
+
+def log_failure(context, exception, **kwargs):
+    """Log a call to object storage that failed without response."""
+    logger.warning(
+        "S3 %s failed after %.3fs: %s",
+        context["operation"],
+        time.perf_counter() - context["start"],
+        exception,
+    )
@@ -0,0 +1,20 @@
+"""Notify the collaboration server using celery tasks."""
+
+import requests
+
+from core.services.collaboration_services import CollaborationService
+
+from impress.celery_app import app
+
+
+@app.task(
+    autoretry_for=(requests.HTTPError,),
+    max_retries=3,
+    retry_backoff=True,
+)
+def reset_collaboration_connections(room, user_id=None):
+    """
+    Reset connections of a room in the collaboration server, retrying with a backoff
+    while it fails, e.g. while its circuit is open.
+    """
+    CollaborationService().send_reset_connections(room, user_id)
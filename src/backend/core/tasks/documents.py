@@ -0,0 +1,51 @@
+"""Upload contents of documents saved with write behind using celery tasks."""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import models
+
+from impress.celery_app import app
+
+
+@app.task(bind=True, max_retries=None)
+def upload_document_content(self, document_id):
+    """
+    Upload the content of a document waiting in the outbox to object storage.
+
+    The content is claimed in a short transaction and uploaded outside of it, so that
+    no database transaction is held during the upload. Uploads of a document are
+    serialized by the claim so that an older content never overwrites a newer one: the
+    task is retried later while another upload of the same document is in progress.
+    The content is only removed from the outbox if it was not replaced in the meantime,
+    in which case it is released for the task scheduled by the replacement to upload it.
+    """
+    with transaction.atomic():
+        upload = (
+            models.DocumentContentUpload.objects.select_for_update(of=("self",))
+            .select_related("document")
+            .filter(document_id=document_id)
+            .first()
+        )
+        # Already uploaded along with a previous save of the same document
+        if upload is None:
+            return
+
+        if upload.is_claimed():
+            raise self.retry(countdown=settings.DOCUMENT_CONTENT_WRITE_BEHIND_DELAY)
+
+        upload.claimed_at = timezone.now()
+        upload.save(update_fields=["claimed_at"])
+
+    try:
+        upload.document.upload_content(upload.content.encode("utf-8"), upload.etag)
+    except Exception:
+        upload.release()
+        raise
+
+    deleted, _ = models.DocumentContentUpload.objects.filter(
+        document_id=document_id, etag=upload.etag
+    ).delete()
+    if not deleted:
+        upload.release()
@@ -0,0 +1,66 @@
+"""
+Unit test for `abort_stale_attachment_uploads` command.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from uuid import uuid4
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+
+from core import factories, models
+from core.enums import DocumentAttachmentStatus
+
+pytestmark = pytest.mark.django_db
+
+
+def start_upload(document, status=DocumentAttachmentStatus.UPLOADING, age=0):
+    """Start a multipart upload of an attachment started some seconds ago."""
+    key = f"{document.id!s}/attachments/{uuid4()!s}.png"
+    default_storage.connection.meta.client.create_multipart_upload(
+        Bucket=default_storage.bucket_name, Key=key
+    )
+    attachment = models.Attachment.objects.create(
+        key=key, document=document, status=status, size=1, content_type="image/png"
+    )
+    models.Attachment.objects.filter(pk=attachment.pk).update(
+        created_at=timezone.now() - timedelta(seconds=age)
+    )
+    return key
+
+
+def list_uploads(key):
+    """List the multipart uploads in progress for a key."""
+    return default_storage.connection.meta.client.list_multipart_uploads(
+        Bucket=default_storage.bucket_name, Prefix=key
+    ).get("Uploads", [])
+
+
+def test_abort_stale_attachment_uploads(settings):
+    """
+    The command should abort the uploads of attachments started before the urls to
+    upload their parts expired and never completed.
+    """
+    settings.DOCUMENT_ATTACHMENT_UPLOAD_EXPIRATION = 3600
+    document = factories.DocumentFactory()
+    stale_key = start_upload(document, age=3601)
+    recent_key = start_upload(document, age=60)
+    processing_key = start_upload(
+        document, status=DocumentAttachmentStatus.PROCESSING, age=3601
+    )
+    stdout = StringIO()
+
+    call_command("abort_stale_attachment_uploads", stdout=stdout)
+
+    assert "[INFO] Aborted 1 stale uploads of attachments." in stdout.getvalue()
+    assert not list_uploads(stale_key)
+    assert not models.Attachment.objects.filter(key=stale_key).exists()
+    assert len(list_uploads(recent_key)) == 1
+    assert (
+        models.Attachment.objects.filter(key__in=[recent_key, processing_key]).count()
+        == 2
+    )
@@ -0,0 +1,32 @@
+"""
+Unit test for `benchmark_ancestors_lookups` command.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+import pytest
+
+from core import models
+
+
+@pytest.mark.django_db
+def test_benchmark_ancestors_lookups():
+    """
+    The command should print query plans before and after for each lookup and
+    leave no documents behind.
+    """
+    stdout = StringIO()
+
+    call_command("benchmark_ancestors_lookups", fanout=2, depth=3, stdout=stdout)
+
+    output = stdout.getvalue()
+    assert "[INFO] Created 14 documents." in output
+    assert "[INFO] Created 2 accesses." in output
+    assert output.count("--- Before: comparison with a prefix of the path ---") == 3
+    assert output.count("--- After: lookup on the ancestors' paths ---") == 3
+    assert output.count("Execution Time") == 6
+
+    assert not models.Document.objects.exists()
+    assert not models.DocumentAccess.objects.exists()
@@ -0,0 +1,38 @@
+"""
+Unit test for `benchmark_document_creation` command.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+import pytest
+
+from core import models
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_document_creation():
+    """
+    The command should print the throughput before and after for each number of
+    workers and leave no documents behind.
+    """
+    stdout = StringIO()
+
+    call_command(
+        "benchmark_document_creation",
+        workers=[1, 2],
+        documents=4,
+        hold=0,
+        stdout=stdout,
+    )
+
+    output = stdout.getvalue()
+    assert "=== Roots before: table lock ===" in output
+    assert "=== Roots after: path sequence ===" in output
+    assert "=== Children before: parent lock ===" in output
+    assert "=== Children after: optimistic path ===" in output
+    assert output.count("1 workers: ") == 4
+    assert output.count("2 workers: ") == 4
+
+    assert not models.Document.objects.exists()
@@ -0,0 +1,20 @@
+"""
+Unit test for `benchmark_media_auth_signing` command.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_media_auth_signing():
+    """The command should print the signing rate of each method."""
+    stdout = StringIO()
+
+    call_command("benchmark_media_auth_signing", iterations=20, keys=5, stdout=stdout)
+
+    output = stdout.getvalue()
+    assert "Before: presigned url signed by botocore: " in output
+    assert "After: template and cached signing key: " in output
+    assert "After: headers memoized for 60 seconds: " in output
+    assert output.count("signatures/s") == 3
@@ -0,0 +1,86 @@
+"""
+Unit test for `import_documents` command.
+"""
+
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+
+import pytest
+
+from core import factories, models
+from core.services.converter_services import YdocConverter
+
+pytestmark = pytest.mark.django_db
+
+DOCUMENTS = [
+    {"id": "home", "title": "Home", "content": "# Home"},
+    {"id": "guide", "parent": "home", "title": "Guide", "content": "# Guide"},
+    {"id": "install", "parent": "guide", "title": "Install", "content": "# Install"},
+]
+
+
+def write_ndjson(path, documents):
+    """Write documents to an NDJSON file."""
+    path.write_text("".join(f"{json.dumps(document)}\n" for document in documents))
+
+
+@mock.patch.object(YdocConverter, "convert", return_value="Converted")
+def test_import_documents(_mock_convert, tmp_path):
+    """
+    The command should import documents by batches and resume an interrupted import.
+    """
+    user = factories.UserFactory(sub="123")
+    source = tmp_path / "wiki.ndjson"
+    write_ndjson(source, DOCUMENTS[:2])
+    stdout = StringIO()
+
+    call_command(
+        "import_documents",
+        str(source),
+        sub="123",
+        email="john.doe@example.com",
+        batch_size=1,
+        stdout=stdout,
+    )
+
+    assert "[INFO] 2 documents created, 0 skipped." in stdout.getvalue()
+
+    write_ndjson(source, DOCUMENTS)
+    stdout = StringIO()
+
+    call_command(
+        "import_documents",
+        str(source),
+        sub="123",
+        email="john.doe@example.com",
+        batch_size=2,
+        stdout=stdout,
+    )
+
+    assert stdout.getvalue().splitlines() == [
+        "[INFO] 0 documents created, 2 skipped.",
+        "[INFO] 1 documents created, 2 skipped.",
+    ]
+    home = models.Document.objects.get(title="Home")
+    assert home.accesses.get().user == user
+    assert [document.title for document in home.get_descendants()] == [
+        "Guide",
+        "Install",
+    ]
+    assert models.ImportedDocument.objects.filter(import_key=str(source)).count() == 3
+
+
+def test_import_documents_invalid_line(tmp_path):
+    """The command should fail on a line that is not a valid document."""
+    source = tmp_path / "wiki.ndjson"
+    source.write_text('{"id": "home"}\n\n{"title": "Guide"}\n')
+
+    with pytest.raises(CommandError, match="Line 3 is invalid"):
+        call_command(
+            "import_documents", str(source), sub="123", email="john.doe@example.com"
+        )
+
+    assert not models.Document.objects.exists()
@@ -0,0 +1,32 @@
+"""
+Unit test for `upload_pending_document_contents` command.
+"""
+
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+import pytest
+
+from core import factories, models
+from core.tasks.documents import upload_document_content
+
+
+@pytest.mark.django_db
+def test_upload_pending_document_contents():
+    """The command should schedule the upload of each content waiting in the outbox."""
+    documents = factories.DocumentFactory.create_batch(2)
+    for document in documents:
+        models.DocumentContentUpload.objects.create(
+            document=document, etag=document.content_etag, content="foo"
+        )
+    stdout = StringIO()
+
+    with mock.patch.object(upload_document_content, "delay") as mock_delay:
+        call_command("upload_pending_document_contents", stdout=stdout)
+
+    assert {call.args[0] for call in mock_delay.call_args_list} == {
+        document.pk for document in documents
+    }
+    assert "[INFO] Scheduled the upload of 2 contents." in stdout.getvalue()
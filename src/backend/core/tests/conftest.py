@@ -6,6 +6,8 @@ from django.core.cache import cache
 
 import pytest
 
+from core.services.converter_services import conversion_cache
+
 USER = "user"
 TEAM = "team"
 VIA = [USER, TEAM]
@@ -15,6 +17,7 @@ VIA = [USER, TEAM]
 def clear_cache():
     """Fixture to clear the cache before each test."""
     cache.clear()
+    conversion_cache.clear()
 
 
 @pytest.fixture
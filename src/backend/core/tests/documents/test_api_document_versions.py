@@ -112,6 +112,25 @@ def test_api_document_versions_list_authenticated_related_success(via, mock_user
     assert content["count"] == 2
 
 
+def test_api_document_versions_list_numqueries_nested(django_assert_num_queries):
+    """
+    Listing versions of a nested document should fetch the document with its roles
+    and ancestors links in one query.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.DocumentFactory(users=[(user, "reader")])
+    parent = factories.DocumentFactory(parent=grand_parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+
+    with django_assert_num_queries(3):
+        response = client.get(f"/api/v1.0/documents/{document.id!s}/versions/")
+
+    assert response.status_code == 200
+
+
 @pytest.mark.parametrize("via", VIA)
 def test_api_document_versions_list_authenticated_related_pagination(
     via, mock_user_teams
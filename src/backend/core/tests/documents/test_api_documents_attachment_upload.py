@@ -13,7 +13,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 import pytest
 from rest_framework.test import APIClient
 
-from core import factories
+from core import factories, models
 from core.api.viewsets import malware_detection
 from core.tests.conftest import TEAM, USER, VIA
 
@@ -92,6 +92,13 @@ def test_api_documents_attachment_upload_anonymous_success():
     assert file_head["ContentType"] == "image/png"
     assert file_head["ContentDisposition"] == 'inline; filename="test.png"'
 
+    attachment = models.Attachment.objects.get(key=key)
+    assert attachment.document == document
+    assert attachment.creator is None
+    assert attachment.status == "processing"
+    assert attachment.size == len(PIXEL)
+    assert attachment.content_type == "image/png"
+
 
 @pytest.mark.parametrize(
     "reach, role",
@@ -259,6 +266,13 @@ def test_api_documents_attachment_upload_success(via, role, mock_user_teams):
     assert file_head["ContentType"] == "image/png"
     assert file_head["ContentDisposition"] == 'inline; filename="test.png"'
 
+    attachment = models.Attachment.objects.get(key=key)
+    assert attachment.document == document
+    assert attachment.creator == user
+    assert attachment.status == "processing"
+    assert attachment.size == len(PIXEL)
+    assert attachment.content_type == "image/png"
+
 
 def test_api_documents_attachment_upload_invalid(client):
     """Attempt to upload without a file should return an explicit error."""
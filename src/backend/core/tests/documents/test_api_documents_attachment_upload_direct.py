@@ -0,0 +1,402 @@
+"""
+Test direct uploads of attachments to object storage in impress's core app.
+"""
+
+import re
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.files.storage import default_storage
+
+import pytest
+import requests
+from botocore.exceptions import ClientError, ParamValidationError
+from rest_framework.test import APIClient
+
+from core import factories, models
+from core.api.viewsets import malware_detection
+
+pytestmark = pytest.mark.django_db
+
+PIXEL = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00"
+    b"\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\nIDATx\x9cc\xf8\xff\xff?\x00\x05\xfe\x02\xfe"
+    b"\xa7V\xbd\xfa\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+def start_upload(client, document, **data):
+    """Start a direct upload of a PNG file to a document."""
+    return client.post(
+        f"/api/v1.0/documents/{document.id!s}/attachment-upload-start/",
+        {
+            "file_name": "test.png",
+            "size": len(PIXEL),
+            "content_type": "image/png",
+            **data,
+        },
+        format="json",
+    )
+
+
+def upload_parts(parts, content):
+    """Upload the content of a file to the urls of its parts as a client would."""
+    response = requests.put(parts[0]["url"], data=content, timeout=10)
+    assert response.status_code == 200
+    return [{"part_number": 1, "etag": response.headers["ETag"]}]
+
+
+def list_uploads(prefix):
+    """List the multipart uploads in progress under a prefix in object storage."""
+    return default_storage.connection.meta.client.list_multipart_uploads(
+        Bucket=default_storage.bucket_name, Prefix=prefix
+    ).get("Uploads", [])
+
+
+def complete_upload(client, document, **data):
+    """Complete a direct upload to a document."""
+    return client.post(
+        f"/api/v1.0/documents/{document.id!s}/attachment-upload-complete/",
+        data,
+        format="json",
+    )
+
+
+def test_api_documents_attachment_upload_direct_anonymous_forbidden():
+    """
+    Anonymous users should not be able to upload attachments if the link reach
+    and role don't allow it.
+    """
+    document = factories.DocumentFactory(link_reach="public", link_role="reader")
+
+    response = start_upload(APIClient(), document)
+
+    assert response.status_code == 401
+    assert not models.Attachment.objects.exists()
+
+
+def test_api_documents_attachment_upload_direct_reader_forbidden():
+    """Readers of a document should not be able to upload attachments to it."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(
+        link_reach="restricted", users=[(user, "reader")]
+    )
+
+    response = start_upload(client, document)
+
+    assert response.status_code == 403
+    assert not models.Attachment.objects.exists()
+
+
+def test_api_documents_attachment_upload_direct_start(settings):
+    """
+    Editors should get a key reserved for their attachment and presigned urls to
+    upload its parts.
+    """
+    settings.DOCUMENT_IMAGE_MAX_SIZE = 20 * 2**20
+    settings.AWS_S3_MULTIPART_CHUNKSIZE = 2**20
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    response = start_upload(client, document, size=12 * 2**20)
+
+    assert response.status_code == 201
+    content = response.json()
+    assert re.match(
+        rf"^{document.id!s}/attachments/[0-9a-f-]{{36}}\.png$", content["key"]
+    )
+    assert content["part_size"] == 5 * 2**20
+    assert [part["part_number"] for part in content["parts"]] == [1, 2, 3]
+    for part in content["parts"]:
+        query = parse_qs(urlparse(part["url"]).query)
+        assert query["uploadId"] == [content["upload_id"]]
+        assert query["partNumber"] == [str(part["part_number"])]
+
+    attachment = models.Attachment.objects.get(key=content["key"])
+    assert attachment.document == document
+    assert attachment.creator == user
+    assert attachment.status == "uploading"
+    assert attachment.size == 12 * 2**20
+    assert attachment.content_type == "image/png"
+    assert content["key"] not in document.attachments
+
+
+def test_api_documents_attachment_upload_direct_start_size_exceeded(settings):
+    """Files larger than the limit should be refused before being uploaded."""
+    settings.DOCUMENT_IMAGE_MAX_SIZE = 1024 * 1024
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    response = start_upload(client, document, size=1024 * 1024 + 1)
+
+    assert response.status_code == 400
+    assert response.json() == {"size": ["File size exceeds the maximum limit of 1 MB."]}
+    assert not models.Attachment.objects.exists()
+
+
+def test_api_documents_attachment_upload_direct_start_unsafe():
+    """Files of unsafe types should be reserved a key marking them as unsafe."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    response = start_upload(
+        client,
+        document,
+        file_name="script.exe",
+        content_type="application/x-msdownload",
+    )
+
+    assert response.status_code == 201
+    assert re.match(
+        rf"^{document.id!s}/attachments/[0-9a-f-]{{36}}-unsafe\.exe$",
+        response.json()["key"],
+    )
+
+
+def test_api_documents_attachment_upload_direct_success():
+    """
+    Completing an upload should check the file, register it as attachment of the
+    document and trigger its analysis.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], PIXEL)
+
+    with mock.patch.object(malware_detection, "analyse_file") as mock_analyse_file:
+        response = complete_upload(
+            client,
+            document,
+            key=content["key"],
+            upload_id=content["upload_id"],
+            parts=parts,
+        )
+
+    assert response.status_code == 201
+    key = content["key"]
+    url_parsed = urlparse(response.json()["file"])
+    assert url_parsed.path == f"/api/v1.0/documents/{document.id!s}/media-check/"
+    assert parse_qs(url_parsed.query) == {"key": [key]}
+    mock_analyse_file.assert_called_once_with(key, document_id=document.id)
+
+    document.refresh_from_db()
+    assert document.attachments == [key]
+    assert models.Attachment.objects.get(key=key).status == "processing"
+
+    file_head = default_storage.connection.meta.client.head_object(
+        Bucket=default_storage.bucket_name, Key=key
+    )
+    assert file_head["Metadata"] == {"owner": str(user.id), "status": "processing"}
+    assert file_head["ContentType"] == "image/png"
+    assert file_head["ContentDisposition"] == 'inline; filename="test.png"'
+    assert file_head["ContentLength"] == len(PIXEL)
+
+
+@pytest.mark.parametrize(
+    "file_content",
+    [b"This is not an image.", PIXEL + b"\x00"],
+    ids=["type", "size"],
+)
+def test_api_documents_attachment_upload_direct_mismatch(file_content):
+    """
+    Files whose content does not match the type and size declared should be deleted
+    and not registered.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], file_content)
+
+    with mock.patch.object(malware_detection, "analyse_file") as mock_analyse_file:
+        response = complete_upload(
+            client,
+            document,
+            key=content["key"],
+            upload_id=content["upload_id"],
+            parts=parts,
+        )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "file": ["File does not match the type and size declared."]
+    }
+    mock_analyse_file.assert_not_called()
+
+    document.refresh_from_db()
+    assert document.attachments == []
+    assert not models.Attachment.objects.exists()
+    with pytest.raises(ClientError):
+        default_storage.connection.meta.client.head_object(
+            Bucket=default_storage.bucket_name, Key=content["key"]
+        )
+
+
+def test_api_documents_attachment_upload_direct_missing_file():
+    """
+    Uploads whose file can't be read once completed should be refused and their
+    attachment deleted.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], PIXEL)
+
+    s3_client = default_storage.connection.meta.client
+    complete_multipart_upload = s3_client.complete_multipart_upload
+
+    def complete_and_delete(**kwargs):
+        """Complete the upload and delete its file as if it went missing."""
+        response = complete_multipart_upload(**kwargs)
+        s3_client.delete_object(Bucket=kwargs["Bucket"], Key=kwargs["Key"])
+        return response
+
+    with (
+        mock.patch.object(
+            s3_client, "complete_multipart_upload", side_effect=complete_and_delete
+        ),
+        mock.patch.object(malware_detection, "analyse_file") as mock_analyse_file,
+    ):
+        response = complete_upload(
+            client,
+            document,
+            key=content["key"],
+            upload_id=content["upload_id"],
+            parts=parts,
+        )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "file": ["File does not match the type and size declared."]
+    }
+    mock_analyse_file.assert_not_called()
+    document.refresh_from_db()
+    assert document.attachments == []
+    assert not models.Attachment.objects.exists()
+
+
+def test_api_documents_attachment_upload_direct_other_document():
+    """An upload started on a document should not be completed on another one."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document, other_document = factories.DocumentFactory.create_batch(
+        2, users=[(user, "editor")]
+    )
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], PIXEL)
+
+    response = complete_upload(
+        client,
+        other_document,
+        key=content["key"],
+        upload_id=content["upload_id"],
+        parts=parts,
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"key": ["Upload not found."]}
+    assert models.Attachment.objects.get(key=content["key"]).status == "uploading"
+
+
+def test_api_documents_attachment_upload_direct_invalid_upload_id():
+    """Uploads that object storage fails to complete should be refused."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], PIXEL)
+
+    response = complete_upload(
+        client,
+        document,
+        key=content["key"],
+        upload_id="invalid",
+        parts=parts,
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"upload_id": ["Upload could not be completed."]}
+    document.refresh_from_db()
+    assert document.attachments == []
+    assert not models.Attachment.objects.exists()
+    assert not list_uploads(content["key"])
+
+
+def test_api_documents_attachment_upload_direct_start_failure():
+    """An upload that fails to start should be aborted along with its attachment."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    s3_client = default_storage.connection.meta.client
+    with (
+        mock.patch.object(
+            s3_client,
+            "generate_presigned_url",
+            side_effect=ParamValidationError(report=""),
+        ),
+        pytest.raises(ParamValidationError),
+    ):
+        start_upload(client, document)
+
+    assert not models.Attachment.objects.exists()
+    assert not list_uploads(f"{document.id!s}/attachments/")
+
+
+def test_api_documents_attachment_upload_direct_complete_concurrently():
+    """An upload should be completed only once, even by concurrent requests."""
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+    document = factories.DocumentFactory(users=[(user, "editor")])
+
+    content = start_upload(client, document).json()
+    parts = upload_parts(content["parts"], PIXEL)
+    data = {"key": content["key"], "upload_id": content["upload_id"], "parts": parts}
+
+    s3_client = default_storage.connection.meta.client
+    complete_multipart_upload = s3_client.complete_multipart_upload
+    concurrent_responses = []
+
+    def complete_concurrently(**kwargs):
+        """Complete the same upload in another request while this one completes it."""
+        if not concurrent_responses:
+            concurrent_responses.append(complete_upload(client, document, **data))
+        return complete_multipart_upload(**kwargs)
+
+    with (
+        mock.patch.object(
+            s3_client,
+            "complete_multipart_upload",
+            side_effect=complete_concurrently,
+        ) as mock_complete,
+        mock.patch.object(malware_detection, "analyse_file") as mock_analyse_file,
+    ):
+        response = complete_upload(client, document, **data)
+
+    assert response.status_code == 201
+    assert concurrent_responses[0].status_code == 400
+    assert concurrent_responses[0].json() == {"key": ["Upload not found."]}
+    assert mock_complete.call_count == 1
+    mock_analyse_file.assert_called_once()
@@ -22,7 +22,7 @@ def test_api_documents_children_list_anonymous_public_standalone(
     child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
     factories.UserDocumentAccessFactory(document=child1)
 
-    with django_assert_num_queries(8):
+    with django_assert_num_queries(5):
         APIClient().get(f"/api/v1.0/documents/{document.id!s}/children/")
     with django_assert_num_queries(4):
         response = APIClient().get(f"/api/v1.0/documents/{document.id!s}/children/")
@@ -96,9 +96,9 @@ def test_api_documents_children_list_anonymous_public_parent(django_assert_num_q
     child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
     factories.UserDocumentAccessFactory(document=child1)
 
-    with django_assert_num_queries(9):
-        APIClient().get(f"/api/v1.0/documents/{document.id!s}/children/")
     with django_assert_num_queries(5):
+        APIClient().get(f"/api/v1.0/documents/{document.id!s}/children/")
+    with django_assert_num_queries(4):
         response = APIClient().get(f"/api/v1.0/documents/{document.id!s}/children/")
 
     assert response.status_code == 200
@@ -187,7 +187,7 @@ def test_api_documents_children_list_authenticated_unrelated_public_or_authentic
     child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
     factories.UserDocumentAccessFactory(document=child1)
 
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(6):
         client.get(f"/api/v1.0/documents/{document.id!s}/children/")
     with django_assert_num_queries(5):
         response = client.get(
@@ -267,10 +267,10 @@ def test_api_documents_children_list_authenticated_public_or_authenticated_paren
     child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
     factories.UserDocumentAccessFactory(document=child1)
 
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         client.get(f"/api/v1.0/documents/{document.id!s}/children/")
 
-    with django_assert_num_queries(6):
+    with django_assert_num_queries(5):
         response = client.get(f"/api/v1.0/documents/{document.id!s}/children/")
 
     assert response.status_code == 200
@@ -373,7 +373,7 @@ def test_api_documents_children_list_authenticated_related_direct(
     child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
     factories.UserDocumentAccessFactory(document=child1)
 
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(6):
         response = client.get(
             f"/api/v1.0/documents/{document.id!s}/children/",
         )
@@ -456,7 +456,7 @@ def test_api_documents_children_list_authenticated_related_parent(
         document=grand_parent, user=user
     )
 
-    with django_assert_num_queries(10):
+    with django_assert_num_queries(6):
         response = client.get(
             f"/api/v1.0/documents/{document.id!s}/children/",
         )
@@ -591,7 +591,7 @@ def test_api_documents_children_list_authenticated_related_team_members(
 
     access = factories.TeamDocumentAccessFactory(document=document, team="myteam")
 
-    with django_assert_num_queries(9):
+    with django_assert_num_queries(6):
         response = client.get(f"/api/v1.0/documents/{document.id!s}/children/")
 
     # pylint: disable=R0801
@@ -647,3 +647,53 @@ def test_api_documents_children_list_authenticated_related_team_members(
             },
         ],
     }
+
+
+def test_api_documents_children_list_numqueries_nested(django_assert_num_queries):
+    """
+    Listing children of a nested document should fetch the document with its
+    ancestors links and resolve children's abilities in bulk.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.DocumentFactory(users=[(user, "reader")])
+    parent = factories.DocumentFactory(parent=grand_parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+    factories.DocumentFactory.create_batch(3, parent=document)
+
+    with django_assert_num_queries(6):
+        response = client.get(f"/api/v1.0/documents/{document.id!s}/children/")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+
+
+def test_api_documents_children_list_pagination_cursor(django_assert_num_queries):
+    """
+    Passing a cursor should paginate children on their path without counting them.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    document = factories.DocumentFactory(users=[(user, "reader")])
+    children = factories.DocumentFactory.create_batch(3, parent=document)
+
+    ids = []
+    url = f"/api/v1.0/documents/{document.id!s}/children/?cursor=&page_size=2"
+    while url:
+        with django_assert_num_queries(5) as captured:
+            response = client.get(url)
+        assert not any(
+            "COUNT(*)" in query["sql"] for query in captured.captured_queries
+        )
+
+        assert response.status_code == 200
+        content = response.json()
+        assert "count" not in content
+        ids.extend(result["id"] for result in content["results"])
+        url = content["next"]
+
+    assert ids == [str(child.id) for child in children]
@@ -784,3 +784,67 @@ def test_api_documents_descendants_list_authenticated_related_team_members(
             },
         ],
     }
+
+
+def test_api_documents_descendants_list_numqueries_nested(django_assert_num_queries):
+    """
+    Listing descendants of a nested document should fetch the document with its
+    ancestors links and resolve descendants' abilities in bulk.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.DocumentFactory(users=[(user, "reader")])
+    parent = factories.DocumentFactory(parent=grand_parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+    child = factories.DocumentFactory(parent=document)
+    factories.DocumentFactory.create_batch(2, parent=child)
+
+    with django_assert_num_queries(6):
+        response = client.get(f"/api/v1.0/documents/{document.id!s}/descendants/")
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+
+
+def test_api_documents_descendants_list_pagination_cursor():
+    """
+    Passing a cursor should paginate descendants on their path without counting
+    them, following the next and previous links.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    document = factories.DocumentFactory(users=[(user, "reader")])
+    child1, child2 = factories.DocumentFactory.create_batch(2, parent=document)
+    grand_child = factories.DocumentFactory(parent=child1)
+
+    response = client.get(
+        f"/api/v1.0/documents/{document.id!s}/descendants/?cursor=&page_size=2"
+    )
+
+    assert response.status_code == 200
+    content = response.json()
+    assert "count" not in content
+    assert content["previous"] is None
+    assert [result["id"] for result in content["results"]] == [
+        str(child1.id),
+        str(grand_child.id),
+    ]
+
+    response = client.get(content["next"])
+
+    content = response.json()
+    assert content["next"] is None
+    assert [result["id"] for result in content["results"]] == [str(child2.id)]
+
+    response = client.get(content["previous"])
+
+    content = response.json()
+    assert content["previous"] is None
+    assert [result["id"] for result in content["results"]] == [
+        str(child1.id),
+        str(grand_child.id),
+    ]
@@ -82,3 +82,54 @@ def test_api_document_favorite_list_authenticated_with_favorite():
             }
         ],
     }
+
+
+def test_api_document_favorite_list_authenticated_nested_favorites(
+    django_assert_num_queries,
+):
+    """
+    Listing nested favorite documents should not make one query per document to
+    compute the links of their ancestors.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    root = factories.DocumentFactory(link_reach="authenticated", link_role="editor")
+    parents = factories.DocumentFactory.create_batch(
+        2, parent=root, link_reach="restricted"
+    )
+    children = [
+        factories.DocumentFactory(
+            parent=parent,
+            link_reach="restricted",
+            favorited_by=[user],
+            users=[(user, "reader")],
+        )
+        for parent in parents
+        for _i in range(5)
+    ]
+
+    # nb_accesses is computed in one query for all documents on the first call
+    with django_assert_num_queries(5):
+        client.get("/api/v1.0/documents/favorite_list/")
+
+    with django_assert_num_queries(4):
+        response = client.get("/api/v1.0/documents/favorite_list/")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert {result["id"] for result in results} == {str(c.id) for c in children}
+    for result in results:
+        assert result["ancestors_link_reach"] == "authenticated"
+        assert result["ancestors_link_role"] == "editor"
+        assert result["abilities"]["update"] is True
+        assert result["abilities"]["destroy"] is False
+
+    # Adding more nested favorites should not add queries
+    factories.DocumentFactory.create_batch(
+        5, parent=parents[0], favorited_by=[user], users=[(user, "reader")]
+    )
+    with django_assert_num_queries(5):
+        response = client.get("/api/v1.0/documents/favorite_list/")
+    assert response.json()["count"] == 15
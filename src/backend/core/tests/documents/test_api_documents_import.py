@@ -0,0 +1,340 @@
+"""
+Tests for Documents API endpoint in impress's core app: import
+"""
+
+# pylint: disable=W0621
+
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import override_settings
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import factories
+from core.models import (
+    Document,
+    DocumentContentUpload,
+    ImportedDocument,
+    Invitation,
+    RoleChoices,
+)
+from core.services.converter_services import ConversionError, YdocConverter
+from core.services.import_services import DocumentImporter
+
+pytestmark = pytest.mark.django_db
+
+DOCUMENTS = [
+    {"id": "home", "title": "Home", "content": "# Home"},
+    {"id": "guide", "parent": "home", "title": "Guide", "content": "# Guide"},
+    {"id": "faq", "parent": "home", "title": "FAQ", "content": ""},
+    {"id": "install", "parent": "guide", "title": "Install", "content": "# Install"},
+    {"id": "about", "title": "About", "content": "# About"},
+]
+
+
+@pytest.fixture
+def mock_convert_md():
+    """Mock YdocConverter.convert to return a converted content."""
+    with patch.object(
+        YdocConverter,
+        "convert",
+        side_effect=lambda text: f"Converted {text:s}",
+    ) as mock:
+        yield mock
+
+
+def import_documents(data):
+    """Post documents to the import endpoint with a server-to-server token."""
+    return APIClient().post(
+        "/api/v1.0/documents/import/",
+        data,
+        format="json",
+        HTTP_AUTHORIZATION="Bearer DummyToken",
+    )
+
+
+def test_api_documents_import_missing_token():
+    """Requests with no token should not be allowed to import documents."""
+    data = {
+        "import_key": "wiki",
+        "documents": DOCUMENTS,
+        "sub": "123",
+        "email": "john.doe@example.com",
+    }
+
+    response = APIClient().post("/api/v1.0/documents/import/", data, format="json")
+
+    assert response.status_code == 401
+    assert not Document.objects.exists()
+
+
+def test_api_documents_import_authenticated_forbidden():
+    """
+    Authenticated users should not be allowed to import documents. This API endpoint
+    is reserved for server-to-server calls.
+    """
+    client = APIClient()
+    client.force_login(factories.UserFactory())
+
+    data = {
+        "import_key": "wiki",
+        "documents": DOCUMENTS,
+        "sub": "123",
+        "email": "john.doe@example.com",
+    }
+
+    response = client.post("/api/v1.0/documents/import/", data, format="json")
+
+    assert response.status_code == 401
+    assert not Document.objects.exists()
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+def test_api_documents_import_existing_user(mock_convert_md):
+    """
+    Documents should be created as a tree owned by the existing user, with their
+    converted content and without sending any email.
+    """
+    user = factories.UserFactory(sub="123")
+
+    response = import_documents(
+        {
+            "import_key": "wiki",
+            "documents": DOCUMENTS,
+            "sub": "123",
+            "email": "john.doe@example.com",
+        }
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"created": 5, "skipped": 0}
+    assert mock_convert_md.call_count == 4
+    assert len(mail.outbox) == 0
+
+    documents = {
+        imported.external_id: imported.document
+        for imported in ImportedDocument.objects.filter(
+            import_key="wiki"
+        ).select_related("document")
+    }
+    assert list(Document.objects.values_list("title", flat=True)) == [
+        "Home",
+        "Guide",
+        "Install",
+        "FAQ",
+        "About",
+    ]
+    home = documents["home"]
+    assert home.is_root()
+    assert home.numchild == 2
+    assert home.creator == user
+    assert home.accesses.get().user == user
+    assert home.accesses.get().role == RoleChoices.OWNER
+    assert list(home.get_children()) == [documents["guide"], documents["faq"]]
+    assert list(documents["guide"].get_children()) == [documents["install"]]
+    assert documents["guide"].numchild == 1
+    assert documents["about"].is_root()
+    assert documents["about"].accesses.get().user == user
+    assert not documents["guide"].accesses.exists()
+
+    assert documents["install"].get_role(user) == RoleChoices.OWNER
+    assert Document.objects.get(pk=documents["guide"].pk).content == (
+        "Converted # Guide"
+    )
+    assert documents["faq"].content_etag == ""
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_new_user():
+    """The owner should be invited to the root documents if they are not a user yet."""
+    response = import_documents(
+        {
+            "import_key": "wiki",
+            "documents": DOCUMENTS,
+            "sub": "123",
+            "email": "john.doe@example.com",
+        }
+    )
+
+    assert response.status_code == 201
+    assert list(
+        Invitation.objects.order_by("document__path").values_list(
+            "document__title", "email", "role"
+        )
+    ) == [
+        ("Home", "john.doe@example.com", RoleChoices.OWNER),
+        ("About", "john.doe@example.com", RoleChoices.OWNER),
+    ]
+    assert not Document.objects.filter(creator__isnull=False).exists()
+
+
+@override_settings(
+    SERVER_TO_SERVER_API_TOKENS=["DummyToken"], DOCUMENT_IMPORT_BATCH_SIZE=2
+)
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_resume():
+    """
+    Importing documents again under the same key should skip those already imported
+    and place the new ones under the parents imported before.
+    """
+    factories.UserFactory(sub="123")
+    data = {"import_key": "wiki", "sub": "123", "email": "john.doe@example.com"}
+
+    response = import_documents({**data, "documents": DOCUMENTS[:2]})
+    assert response.json() == {"created": 2, "skipped": 0}
+
+    response = import_documents({**data, "documents": DOCUMENTS})
+
+    assert response.status_code == 201
+    assert response.json() == {"created": 3, "skipped": 2}
+    assert Document.objects.count() == 5
+    home = Document.objects.get(title="Home")
+    assert home.numchild == 2
+    assert [child.title for child in home.get_children()] == ["Guide", "FAQ"]
+    assert Document.objects.get(title="Guide").numchild == 1
+
+    response = import_documents({**data, "import_key": "other", "documents": DOCUMENTS})
+
+    assert response.json() == {"created": 5, "skipped": 0}
+    assert Document.objects.count() == 10
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_path_taken():
+    """
+    Documents should be placed after a child added concurrently to their parent, which
+    took the path allocated to the first of them.
+    """
+    factories.UserFactory(sub="123")
+    data = {"import_key": "wiki", "sub": "123", "email": "john.doe@example.com"}
+    import_documents({**data, "documents": DOCUMENTS[:1]})
+
+    # The original method is called by the mock to interleave the concurrent child
+    # pylint: disable-next=protected-access
+    load_parents = DocumentImporter._load_parents
+
+    def load_parents_concurrently(importer, parents_ids):
+        """Add a child to the parent once the importer loaded its last child."""
+        load_parents(importer, parents_ids)
+        if not Document.objects.filter(title="Concurrent").exists():
+            Document.objects.get(title="Home").add_child(title="Concurrent")
+
+    with patch.object(
+        DocumentImporter,
+        "_load_parents",
+        autospec=True,
+        side_effect=load_parents_concurrently,
+    ) as mock_load_parents:
+        response = import_documents({**data, "documents": DOCUMENTS[:3]})
+
+    assert response.status_code == 201
+    assert response.json() == {"created": 2, "skipped": 1}
+    assert mock_load_parents.call_count == 2
+    home = Document.objects.get(title="Home")
+    assert home.numchild == 3
+    assert [child.title for child in home.get_children()] == [
+        "Concurrent",
+        "Guide",
+        "FAQ",
+    ]
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_unknown_parent():
+    """Documents should be imported after their parent."""
+    response = import_documents(
+        {
+            "import_key": "wiki",
+            "documents": DOCUMENTS[1:],
+            "sub": "123",
+            "email": "john.doe@example.com",
+        }
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "documents": ['Parent "home" of document "guide" must be imported before it.']
+    }
+    assert not Document.objects.exists()
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+def test_api_documents_import_conversion_error(mock_convert_md):
+    """Documents should not be imported if their content can't be converted."""
+    mock_convert_md.side_effect = ConversionError("Conversion failed")
+
+    response = import_documents(
+        {
+            "import_key": "wiki",
+            "documents": DOCUMENTS,
+            "sub": "123",
+            "email": "john.doe@example.com",
+        }
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"documents": ["Could not convert content of documents."]}
+    assert not Document.objects.exists()
+
+
+@override_settings(SERVER_TO_SERVER_API_TOKENS=["DummyToken"])
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_upload_on_commit(django_capture_on_commit_callbacks):
+    """Contents should be uploaded to object storage once the import is committed."""
+    factories.UserFactory(sub="123")
+    data = {
+        "import_key": "wiki",
+        "documents": DOCUMENTS[:1],
+        "sub": "123",
+        "email": "john.doe@example.com",
+    }
+
+    with patch.object(Document, "upload_content") as mock_upload:
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = import_documents(data)
+        mock_upload.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+    assert response.status_code == 201
+    home = Document.objects.get()
+    mock_upload.assert_called_once_with(
+        b"Converted # Home", home.content_etag, check_stored=False
+    )
+
+
+@override_settings(
+    SERVER_TO_SERVER_API_TOKENS=["DummyToken"], DOCUMENT_CONTENT_WRITE_BEHIND=True
+)
+@pytest.mark.usefixtures("mock_convert_md")
+def test_api_documents_import_write_behind():
+    """
+    Contents should be saved in the outbox of content uploads with write behind and
+    served from the content cache meanwhile.
+    """
+    factories.UserFactory(sub="123")
+
+    with patch.object(Document, "upload_content") as mock_upload:
+        response = import_documents(
+            {
+                "import_key": "wiki",
+                "documents": DOCUMENTS[:2],
+                "sub": "123",
+                "email": "john.doe@example.com",
+            }
+        )
+
+    assert response.status_code == 201
+    mock_upload.assert_not_called()
+    assert sorted(
+        DocumentContentUpload.objects.values_list("document__title", "content")
+    ) == [("Guide", "Converted # Guide"), ("Home", "Converted # Home")]
+    with patch.object(Document, "get_content_response") as mock_get:
+        assert Document.objects.get(title="Home").content == "Converted # Home"
+    mock_get.assert_not_called()
@@ -152,11 +152,11 @@ def test_api_documents_list_authenticated_direct(django_assert_num_queries):
         str(child4_with_access.id),
     }
 
-    with django_assert_num_queries(14):
+    with django_assert_num_queries(5):
         response = client.get("/api/v1.0/documents/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(6):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/documents/")
 
     assert response.status_code == 200
@@ -190,11 +190,11 @@ def test_api_documents_list_authenticated_via_team(
 
     expected_ids = {str(document.id) for document in documents_team1 + documents_team2}
 
-    with django_assert_num_queries(14):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/documents/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/documents/")
 
     assert response.status_code == 200
@@ -223,11 +223,11 @@ def test_api_documents_list_authenticated_link_reach_restricted(
     other_document = factories.DocumentFactory(link_reach="public")
     models.LinkTrace.objects.create(document=other_document, user=user)
 
-    with django_assert_num_queries(6):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/documents/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get("/api/v1.0/documents/")
 
     assert response.status_code == 200
@@ -272,11 +272,11 @@ def test_api_documents_list_authenticated_link_reach_public_or_authenticated(
 
     expected_ids = {str(document1.id), str(document2.id), str(visible_child.id)}
 
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(5):
         response = client.get("/api/v1.0/documents/")
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(5):
+    with django_assert_num_queries(4):
         response = client.get("/api/v1.0/documents/")
 
     assert response.status_code == 200
@@ -396,11 +396,11 @@ def test_api_documents_list_favorites_no_extra_queries(django_assert_num_queries
     factories.DocumentFactory.create_batch(2, users=[user])
 
     url = "/api/v1.0/documents/"
-    with django_assert_num_queries(14):
+    with django_assert_num_queries(4):
         response = client.get(url)
 
     # nb_accesses should now be cached
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get(url)
 
     assert response.status_code == 200
@@ -413,7 +413,7 @@ def test_api_documents_list_favorites_no_extra_queries(django_assert_num_queries
     for document in special_documents:
         models.DocumentFavorite.objects.create(document=document, user=user)
 
-    with django_assert_num_queries(4):
+    with django_assert_num_queries(3):
         response = client.get(url)
 
     assert response.status_code == 200
@@ -427,3 +427,67 @@ def test_api_documents_list_favorites_no_extra_queries(django_assert_num_queries
             assert result["is_favorite"] is True
         else:
             assert result["is_favorite"] is False
+
+
+@pytest.mark.parametrize(
+    "ordering", ["-updated_at", "created_at", "title", "-title", "-created_at"]
+)
+def test_api_documents_list_pagination_cursor(ordering, django_assert_num_queries):
+    """
+    Passing a cursor should paginate on the ordering of the list without counting
+    documents, and following the next and previous links should go through all pages.
+    """
+    user = factories.UserFactory()
+
+    client = APIClient()
+    client.force_login(user)
+
+    # Some titles are equal or null to check that the ordering is made unique
+    documents = [
+        factories.DocumentFactory(users=[user], title=title)
+        for title in [None, "other", "same", "same", "same"]
+    ]
+
+    pages = []
+    url = f"/api/v1.0/documents/?cursor=&page_size=2&ordering={ordering:s}"
+    while url:
+        with django_assert_num_queries(3) as captured:
+            response = client.get(url)
+        assert not any(
+            "COUNT(*)" in query["sql"] for query in captured.captured_queries
+        )
+
+        assert response.status_code == 200
+        content = response.json()
+        assert "count" not in content
+        pages.append([result["id"] for result in content["results"]])
+        url = content["next"]
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    ids = [document_id for page in pages for document_id in page]
+    assert sorted(ids) == sorted(str(document.id) for document in documents)
+
+    # Going back from the last page should yield the same pages in reverse
+    previous_pages = []
+    url = content["previous"]
+    while url:
+        response = client.get(url)
+        content = response.json()
+        previous_pages.append([result["id"] for result in content["results"]])
+        url = content["previous"]
+
+    assert previous_pages == pages[-2::-1]
+
+
+def test_api_documents_list_pagination_cursor_invalid():
+    """An invalid cursor should return a 404."""
+    user = factories.UserFactory()
+    factories.DocumentFactory(users=[user])
+
+    client = APIClient()
+    client.force_login(user)
+
+    response = client.get("/api/v1.0/documents/?cursor=invalid")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Invalid cursor"}
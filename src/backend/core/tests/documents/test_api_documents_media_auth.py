@@ -3,11 +3,13 @@ Test media-auth authorization API endpoint in docs core app.
 """
 
 from io import BytesIO
+from unittest import mock
 from urllib.parse import urlparse
 from uuid import uuid4
 
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.test import override_settings
 from django.utils import timezone
 
 import pytest
@@ -16,7 +18,9 @@ from freezegun import freeze_time
 from rest_framework.test import APIClient
 
 from core import factories, models
+from core.api.viewsets import DocumentViewSet
 from core.enums import DocumentAttachmentStatus
+from core.malware_detection import malware_detection_callback
 from core.tests.conftest import TEAM, USER, VIA
 
 pytestmark = pytest.mark.django_db
@@ -412,3 +416,174 @@ def test_api_documents_media_auth_missing_status_metadata():
         timeout=1,
     )
     assert response.content.decode("utf-8") == "my prose"
+
+
+def put_attachment(status=DocumentAttachmentStatus.READY):
+    """Store an attachment with the given status in object storage and return its key."""
+    key = f"{uuid4()!s}/attachments/{uuid4()!s}.jpg"
+    default_storage.connection.meta.client.put_object(
+        Bucket=default_storage.bucket_name,
+        Key=key,
+        Body=BytesIO(b"my prose"),
+        ContentType="text/plain",
+        Metadata={"status": status},
+    )
+    return key
+
+
+def get_media_auth(client, key):
+    """Call the media-auth endpoint for an attachment key."""
+    return client.get(
+        "/api/v1.0/documents/media-auth/",
+        HTTP_X_ORIGINAL_URL=f"http://localhost/media/{key:s}",
+    )
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cached(django_assert_num_queries):
+    """
+    Decisions should be cached so that the same attachment is authorized again
+    without querying the database nor object storage.
+    """
+    key = put_attachment()
+    factories.DocumentFactory(link_reach="public", attachments=[key])
+
+    assert get_media_auth(APIClient(), key).status_code == 200
+
+    with (
+        mock.patch.object(DocumentViewSet, "_get_attachment_status") as mock_status,
+        django_assert_num_queries(0),
+    ):
+        assert get_media_auth(APIClient(), key).status_code == 200
+    mock_status.assert_not_called()
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cached_per_user():
+    """Decisions for a user should not be used for other users."""
+    key = put_attachment()
+    document = factories.DocumentFactory(link_reach="restricted", attachments=[key])
+    access = factories.UserDocumentAccessFactory(document=document)
+
+    client = APIClient()
+    client.force_login(access.user)
+    assert get_media_auth(client, key).status_code == 200
+
+    client.force_login(factories.UserFactory())
+    assert get_media_auth(client, key).status_code == 403
+    assert get_media_auth(APIClient(), key).status_code == 403
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=0)
+def test_api_documents_media_auth_cache_disabled():
+    """Nothing should be cached when the timeout is 0."""
+    key = put_attachment()
+    factories.DocumentFactory(link_reach="public", attachments=[key])
+
+    with mock.patch.object(
+        DocumentViewSet,
+        "_get_attachment_status",
+        return_value=DocumentAttachmentStatus.READY,
+    ) as mock_status:
+        assert get_media_auth(APIClient(), key).status_code == 200
+        assert get_media_auth(APIClient(), key).status_code == 200
+
+    assert mock_status.call_count == 2
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_access():
+    """Creating an access should invalidate the decisions on attachments of its subtree."""
+    user = factories.UserFactory()
+    key = put_attachment()
+    parent = factories.DocumentFactory(link_reach="restricted")
+    factories.DocumentFactory(parent=parent, link_reach="restricted", attachments=[key])
+
+    client = APIClient()
+    client.force_login(user)
+    assert get_media_auth(client, key).status_code == 403
+
+    access = factories.UserDocumentAccessFactory(document=parent, user=user)
+    assert get_media_auth(client, key).status_code == 200
+
+    access.delete()
+    assert get_media_auth(client, key).status_code == 403
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_team_access(mock_user_teams):
+    """
+    Creating a team access should invalidate the decisions on attachments of its
+    subtree for the members of the team.
+    """
+    mock_user_teams.return_value = ["lasuite"]
+    key = put_attachment()
+    parent = factories.DocumentFactory(link_reach="restricted")
+    factories.DocumentFactory(parent=parent, link_reach="restricted", attachments=[key])
+
+    client = APIClient()
+    client.force_login(factories.UserFactory())
+    assert get_media_auth(client, key).status_code == 403
+
+    factories.TeamDocumentAccessFactory(document=parent, team="lasuite")
+    assert get_media_auth(client, key).status_code == 200
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_link_configuration():
+    """Updating the link configuration should invalidate the decisions on attachments."""
+    key = put_attachment()
+    parent = factories.DocumentFactory(link_reach="public")
+    factories.DocumentFactory(parent=parent, link_reach="restricted", attachments=[key])
+    access = factories.UserDocumentAccessFactory(document=parent, role="owner")
+
+    assert get_media_auth(APIClient(), key).status_code == 200
+
+    client = APIClient()
+    client.force_login(access.user)
+    with mock.patch("core.api.viewsets.CollaborationService.reset_connections"):
+        response = client.put(
+            f"/api/v1.0/documents/{parent.id!s}/link-configuration/",
+            {"link_reach": "restricted"},
+            format="json",
+        )
+    assert response.status_code == 200
+
+    assert get_media_auth(APIClient(), key).status_code == 403
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_move():
+    """Moving a document should invalidate the decisions on its attachments."""
+    key = put_attachment()
+    document = factories.DocumentFactory(link_reach="restricted", attachments=[key])
+    target = factories.DocumentFactory(link_reach="public")
+
+    assert get_media_auth(APIClient(), key).status_code == 403
+
+    document.move(target, pos="first-child")
+    assert get_media_auth(APIClient(), key).status_code == 200
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_attachments():
+    """Attaching a key to a document should invalidate the decisions on it."""
+    key = put_attachment()
+    factories.DocumentFactory(link_reach="restricted", attachments=[key])
+
+    assert get_media_auth(APIClient(), key).status_code == 403
+
+    factories.DocumentFactory(link_reach="public", attachments=[key])
+    assert get_media_auth(APIClient(), key).status_code == 200
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_auth_cache_invalidated_malware_verdict():
+    """A malware verdict should invalidate the status cached for an attachment."""
+    key = put_attachment(DocumentAttachmentStatus.PROCESSING)
+    document = factories.DocumentFactory(link_reach="public", attachments=[key])
+
+    assert get_media_auth(APIClient(), key).status_code == 403
+
+    malware_detection_callback(key, "safe", error_info={}, document_id=document.id)
+    assert get_media_auth(APIClient(), key).status_code == 200
@@ -1,14 +1,17 @@
 """Test the "media_check" endpoint."""
 
 from io import BytesIO
+from unittest import mock
 from uuid import uuid4
 
 from django.core.files.storage import default_storage
+from django.test import override_settings
 
 import pytest
 from rest_framework.test import APIClient
 
-from core import factories
+from core import factories, models
+from core.api.viewsets import DocumentViewSet
 from core.enums import DocumentAttachmentStatus
 from core.tests.conftest import TEAM, USER, VIA
 
@@ -162,6 +165,38 @@ def test_api_documents_media_check_connected_document():
     }
 
 
+def test_api_documents_media_check_numqueries_nested(django_assert_num_queries):
+    """
+    Checking a media of a nested document should fetch the document with its roles
+    and ancestors links in one query, and the status of the attachment in another.
+    """
+    user = factories.UserFactory()
+    grand_parent = factories.DocumentFactory(users=[(user, "reader")])
+    parent = factories.DocumentFactory(parent=grand_parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+
+    key = f"{document.id!s}/attachments/{uuid4()!s}.jpg"
+    default_storage.connection.meta.client.put_object(
+        Bucket=default_storage.bucket_name,
+        Key=key,
+        Body=BytesIO(b"my prose"),
+        ContentType="text/plain",
+        Metadata={"status": DocumentAttachmentStatus.READY},
+    )
+    document.attachments = [key]
+    document.save(update_fields=["attachments"])
+
+    client = APIClient()
+    client.force_login(user=user)
+
+    with django_assert_num_queries(3):
+        response = client.get(
+            f"/api/v1.0/documents/{document.id!s}/media-check/", {"key": key}
+        )
+
+    assert response.status_code == 200
+
+
 def test_api_documents_media_check_connected_document_media_not_related():
     """
     The "media_check" endpoint should return a 404 error if the key is not related to the document.
@@ -242,3 +277,77 @@ def test_api_documents_media_check_restricted_document(via, mock_user_teams):
         "status": DocumentAttachmentStatus.READY,
         "file": f"/media/{key:s}",
     }
+
+
+@override_settings(MEDIA_AUTH_CACHE_TIMEOUT=30)
+def test_api_documents_media_check_cached_status():
+    """
+    The status of an attachment should be cached so that it is not read again from
+    object storage.
+    """
+    document = factories.DocumentFactory(link_reach="public")
+
+    key = f"{document.id!s}/attachments/{uuid4()!s}.jpg"
+    default_storage.connection.meta.client.put_object(
+        Bucket=default_storage.bucket_name,
+        Key=key,
+        Body=BytesIO(b"my prose"),
+        ContentType="text/plain",
+        Metadata={"status": DocumentAttachmentStatus.READY},
+    )
+    document.attachments = [key]
+    document.save(update_fields=["attachments"])
+
+    client = APIClient()
+    url = f"/api/v1.0/documents/{document.id!s}/media-check/"
+    assert client.get(url, {"key": key}).status_code == 200
+
+    with mock.patch.object(DocumentViewSet, "_get_attachment_status") as mock_status:
+        response = client.get(url, {"key": key})
+
+    mock_status.assert_not_called()
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": DocumentAttachmentStatus.READY,
+        "file": f"/media/{key:s}",
+    }
+
+
+def test_api_documents_media_check_recorded_attachment():
+    """
+    The status of a recorded attachment should be read in the database rather than
+    in the metadata of its file in object storage.
+    """
+    document = factories.DocumentFactory(link_reach="public")
+
+    key = f"{document.id!s}/attachments/{uuid4()!s}.jpg"
+    default_storage.connection.meta.client.put_object(
+        Bucket=default_storage.bucket_name,
+        Key=key,
+        Body=BytesIO(b"my prose"),
+        ContentType="text/plain",
+        Metadata={"status": DocumentAttachmentStatus.PROCESSING},
+    )
+    models.Attachment.objects.create(
+        key=key,
+        document=document,
+        status=DocumentAttachmentStatus.READY,
+        size=8,
+        content_type="text/plain",
+    )
+    document.attachments = [key]
+    document.save(update_fields=["attachments"])
+
+    client = APIClient()
+    s3_client = default_storage.connection.meta.client
+    with mock.patch.object(s3_client, "head_object") as mock_head_object:
+        response = client.get(
+            f"/api/v1.0/documents/{document.id!s}/media-check/", {"key": key}
+        )
+
+    mock_head_object.assert_not_called()
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": DocumentAttachmentStatus.READY,
+        "file": f"/media/{key:s}",
+    }
@@ -861,7 +861,7 @@ def test_api_documents_retrieve_numqueries_with_link_trace(django_assert_num_que
 
     document = factories.DocumentFactory(users=[user], link_traces=[user])
 
-    with django_assert_num_queries(5):
+    with django_assert_num_queries(4):
         response = client.get(f"/api/v1.0/documents/{document.id!s}/")
 
     with django_assert_num_queries(3):
@@ -872,6 +872,41 @@ def test_api_documents_retrieve_numqueries_with_link_trace(django_assert_num_que
     assert response.json()["id"] == str(document.id)
 
 
+def test_api_documents_retrieve_numqueries_nested(django_assert_num_queries):
+    """
+    Retrieving a nested document should fetch its roles, favorite status and ancestors
+    links along with the document. Its number of accesses is counted in a single
+    query the first time and then served from the cache.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.DocumentFactory(
+        link_reach="restricted", users=[(user, "owner")]
+    )
+    parent = factories.DocumentFactory(parent=grand_parent, link_reach="authenticated")
+    document = factories.DocumentFactory(
+        parent=parent, link_reach="restricted", users=[user], link_traces=[user]
+    )
+    factories.UserDocumentAccessFactory(document=parent)
+
+    with django_assert_num_queries(4):
+        client.get(f"/api/v1.0/documents/{document.id!s}/")
+
+    with django_assert_num_queries(3):
+        response = client.get(f"/api/v1.0/documents/{document.id!s}/")
+
+    assert response.status_code == 200
+    content = response.json()
+    assert content["user_role"] == "owner"
+    assert content["ancestors_link_reach"] == "authenticated"
+    assert content["computed_link_reach"] == "authenticated"
+    assert content["nb_accesses_direct"] == 1
+    assert content["nb_accesses_ancestors"] == 3
+    assert content["is_favorite"] is False
+
+
 # Soft/permanent delete
 
 
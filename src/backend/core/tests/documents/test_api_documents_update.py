@@ -302,6 +302,39 @@ def test_api_documents_update_authenticated_editor_administrator_or_owner(
             assert value == new_document_values[key]
 
 
+def test_api_documents_update_numqueries_nested(django_assert_num_queries):
+    """
+    Updating a nested document should fetch its roles and ancestors links along with
+    the document. Its number of accesses is counted in a single query the first time
+    and then served from the cache.
+    """
+    user = factories.UserFactory()
+    client = APIClient()
+    client.force_login(user)
+
+    grand_parent = factories.DocumentFactory(users=[(user, "editor")])
+    parent = factories.DocumentFactory(parent=grand_parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+
+    with django_assert_num_queries(9):
+        client.patch(
+            f"/api/v1.0/documents/{document.id!s}/",
+            {"title": "first title", "websocket": True},
+            format="json",
+        )
+
+    with django_assert_num_queries(8):
+        response = client.patch(
+            f"/api/v1.0/documents/{document.id!s}/",
+            {"title": "new title", "websocket": True},
+            format="json",
+        )
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "new title"
+    assert response.json()["nb_accesses_ancestors"] == 1
+
+
 @responses.activate
 def test_api_documents_update_authenticated_no_websocket(settings):
     """
@@ -47,7 +47,7 @@ def test_api_documents_update_new_attachment_keys_anonymous(django_assert_num_qu
     factories.DocumentFactory(attachments=[image_keys[3]], link_reach="restricted")
     expected_keys = {image_keys[i] for i in [0, 1]}
 
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(10):
         response = APIClient().put(
             f"/api/v1.0/documents/{document.id!s}/",
             {"content": get_ydoc_with_mages(image_keys), "websocket": True},
@@ -98,7 +98,7 @@ def test_api_documents_update_new_attachment_keys_authenticated(
     factories.DocumentFactory(attachments=[image_keys[4]], users=[user])
     expected_keys = {image_keys[i] for i in [0, 1, 2, 4]}
 
-    with django_assert_num_queries(12):
+    with django_assert_num_queries(11):
         response = client.put(
             f"/api/v1.0/documents/{document.id!s}/",
             {"content": get_ydoc_with_mages(image_keys)},
@@ -0,0 +1,36 @@
+"""
+Test the migration allocating paths of root documents from a sequence.
+"""
+
+from django.db import connection
+
+import pytest
+
+from core.models import Document
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("last_step, next_step", [(3, 1024), (5000, 5120)])
+def test_add_document_root_path_sequence_migration(migrator, last_step, next_step):
+    """
+    Test that the migration starts the sequence right after the last root document,
+    on the scale of the step gap.
+    """
+    old_state = migrator.apply_initial_migration(
+        ("core", "0027_add_document_content_upload")
+    )
+    document_model = old_state.apps.get_model("core", "Document")
+    user_model = old_state.apps.get_model("core", "User")
+
+    creator = user_model.objects.create(sub="creator", email="creator@example.com")
+    document_model.objects.create(depth=1, path="0000001", creator=creator)
+    document_model.objects.create(
+        depth=1, path=Document.get_step_path("", last_step), creator=creator
+    )
+
+    # Apply the migration
+    migrator.apply_tested_migration(("core", "0028_add_document_root_path_sequence"))
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval('impress_document_root_path_seq')")
+        assert cursor.fetchone()[0] * Document.step_gap == next_step
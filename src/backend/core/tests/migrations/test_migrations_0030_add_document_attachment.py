@@ -0,0 +1,41 @@
+"""
+Test the migration indexing attachments of documents by their key.
+"""
+
+import pytest
+
+
+@pytest.mark.django_db
+def test_add_document_attachment_migration(migrator):
+    """
+    Test that the migration indexes the attachments of existing documents.
+    """
+    old_state = migrator.apply_initial_migration(("core", "0029_add_imported_document"))
+    document_model = old_state.apps.get_model("core", "Document")
+    user_model = old_state.apps.get_model("core", "User")
+
+    creator = user_model.objects.create(sub="creator", email="creator@example.com")
+    document = document_model.objects.create(
+        depth=1, path="0000001", creator=creator, attachments=["a/1.png", "b/2.png"]
+    )
+    document_model.objects.create(
+        depth=1, path="0000002", creator=creator, attachments=["a/1.png"]
+    )
+    document_model.objects.create(depth=1, path="0000003", creator=creator)
+
+    # Apply the migration
+    new_state = migrator.apply_tested_migration(
+        ("core", "0030_add_document_attachment")
+    )
+    document_attachment_model = new_state.apps.get_model("core", "DocumentAttachment")
+
+    assert sorted(
+        document_attachment_model.objects.values_list("document__path", "key")
+    ) == [
+        ("0000001", "a/1.png"),
+        ("0000001", "b/2.png"),
+        ("0000002", "a/1.png"),
+    ]
+    assert (
+        document_attachment_model.objects.filter(document_id=document.pk).count() == 2
+    )
@@ -0,0 +1,98 @@
+"""
+Test the generation of S3 authorization headers to serve attachments.
+"""
+
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.utils import timezone
+
+import botocore
+import pytest
+from botocore.credentials import ReadOnlyCredentials
+from freezegun import freeze_time
+
+from core.api import utils
+
+
+def sign_with_botocore(key, credentials):
+    """Sign a request to get an object as botocore does."""
+    url = default_storage.unsigned_connection.meta.client.generate_presigned_url(
+        "get_object",
+        ExpiresIn=0,
+        Params={"Bucket": default_storage.bucket_name, "Key": key},
+    )
+    request = botocore.awsrequest.AWSRequest(method="get", url=url)
+    region = default_storage.connection.meta.client.meta.region_name
+    botocore.auth.S3SigV4Auth(credentials, "s3", region).add_auth(request)
+    return request
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        "a56b7b61-7a2c-4bbb-9aaf-a1db89a6a18a/attachments/image.png",
+        "document/attachments/a file with spaces+plus~tilde.png",
+        "document/attachments/éàü.jpg",
+    ],
+)
+@pytest.mark.parametrize("token", [None, "session-token"])
+def test_api_utils_generate_s3_authorization_headers_botocore(key, token):
+    """The headers should be the same as the ones signed by botocore."""
+    credentials = ReadOnlyCredentials("access-key", "secret-key", token)
+
+    with (
+        freeze_time(timezone.now()),
+        mock.patch.object(
+            botocore.credentials.Credentials,
+            "get_frozen_credentials",
+            return_value=credentials,
+        ),
+    ):
+        request = utils.generate_s3_authorization_headers(key)
+        expected = sign_with_botocore(key, credentials)
+
+    assert request.url == expected.url
+    assert dict(request.headers) == dict(expected.headers)
+
+
+def test_api_utils_generate_s3_authorization_headers_signing_key_cached():
+    """The signing key should be derived once per day."""
+    # pylint doesn't see the methods added by lru_cache to the function it wraps
+    # pylint: disable-next=no-value-for-parameter
+    utils.get_sigv4_signing_key.cache_clear()
+
+    with freeze_time("2025-01-01 10:00:00"):
+        utils.generate_s3_authorization_headers("document/attachments/1.png")
+        utils.generate_s3_authorization_headers("document/attachments/2.png")
+    with freeze_time("2025-01-02 10:00:00"):
+        utils.generate_s3_authorization_headers("document/attachments/1.png")
+
+    # pylint: disable-next=no-value-for-parameter
+    cache_info = utils.get_sigv4_signing_key.cache_info()
+    assert cache_info.misses == 2
+    assert cache_info.hits == 1
+
+
+@override_settings(MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT=60)
+def test_api_utils_generate_s3_authorization_headers_window():
+    """
+    Headers of an object should be signed once per window of time, dated from the
+    start of the window.
+    """
+    key = "document/attachments/1.png"
+
+    with freeze_time("2025-01-01 10:00:10"):
+        first = utils.generate_s3_authorization_headers(key)
+    with freeze_time("2025-01-01 10:00:50"):
+        second = utils.generate_s3_authorization_headers(key)
+        other = utils.generate_s3_authorization_headers("document/attachments/2.png")
+    with freeze_time("2025-01-01 10:01:10"):
+        third = utils.generate_s3_authorization_headers(key)
+
+    assert first.headers["X-Amz-Date"] == "20250101T100000Z"
+    assert dict(second.headers) == dict(first.headers)
+    assert other.headers["Authorization"] != first.headers["Authorization"]
+    assert third.headers["X-Amz-Date"] == "20250101T100100Z"
+    assert third.headers["Authorization"] != first.headers["Authorization"]
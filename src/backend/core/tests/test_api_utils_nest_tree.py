@@ -105,3 +105,31 @@ def test_api_utils_nest_tree_decreasing_path_resets_parent():
         ],
     }
     assert nest_tree(documents, 4) == expected
+
+
+def test_api_utils_nest_tree_skip_sorting():
+    """
+    Documents already ordered by path should be nested as they come, which allows
+    passing any iterable.
+    """
+    documents = (
+        document
+        for document in [
+            {"id": "1", "path": "0001"},
+            {"id": "2", "path": "00010001"},
+            {"id": "3", "path": "000100010001"},
+            {"id": "4", "path": "00010002"},
+        ]
+    )
+    assert nest_tree(documents, 4, skip_sorting=True) == {
+        "id": "1",
+        "path": "0001",
+        "children": [
+            {
+                "id": "2",
+                "path": "00010001",
+                "children": [{"id": "3", "path": "000100010001", "children": []}],
+            },
+            {"id": "4", "path": "00010002", "children": []},
+        ],
+    }
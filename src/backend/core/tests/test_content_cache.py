@@ -0,0 +1,40 @@
+"""
+Unit tests for the cache of the content of documents
+"""
+
+from core.content_cache import LRUCache
+
+
+def test_content_cache_lru_evicts_least_recently_used():
+    """Least recently used entries should be evicted beyond the maximum size."""
+    lru_cache = LRUCache()
+    lru_cache.set("a", "aaa", max_size=8)
+    lru_cache.set("b", "bbb", max_size=8)
+
+    # Reading "a" makes "b" the least recently used entry
+    assert lru_cache.get("a") == "aaa"
+    lru_cache.set("c", "ccc", max_size=8)
+
+    assert lru_cache.get("a") == "aaa"
+    assert lru_cache.get("b") is None
+    assert lru_cache.get("c") == "ccc"
+    assert lru_cache.size == 6
+
+
+def test_content_cache_lru_replace():
+    """Setting a key again should replace its value and account for its size."""
+    lru_cache = LRUCache()
+    lru_cache.set("a", "aaa", max_size=8)
+    lru_cache.set("a", "a", max_size=8)
+
+    assert lru_cache.get("a") == "a"
+    assert lru_cache.size == 1
+
+
+def test_content_cache_lru_too_large():
+    """Values larger than the maximum size should not be cached."""
+    lru_cache = LRUCache()
+    lru_cache.set("a", "aaa", max_size=2)
+
+    assert lru_cache.get("a") is None
+    assert lru_cache.size == 0
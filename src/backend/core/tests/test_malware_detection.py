@@ -1,6 +1,7 @@
 """Test malware detection callback."""
 
 import random
+from unittest import mock
 
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
@@ -11,6 +12,7 @@ from lasuite.malware_detection.enums import ReportStatus
 from core.enums import DocumentAttachmentStatus
 from core.factories import DocumentFactory
 from core.malware_detection import malware_detection_callback
+from core.models import Attachment
 
 pytestmark = pytest.mark.django_db
 
@@ -56,10 +58,37 @@ def test_malware_detection_callback_safe_status(safe_file):
     assert metadata["status"] == DocumentAttachmentStatus.READY
 
 
+def test_malware_detection_callback_safe_status_recorded(safe_file):
+    """
+    The status of a recorded attachment should be updated in the database without
+    rewriting its file in object storage.
+    """
+    document = DocumentFactory(attachments=[safe_file])
+    attachment = Attachment.objects.create(
+        key=safe_file, document=document, size=4, content_type="text/plain"
+    )
+
+    s3_client = default_storage.connection.meta.client
+    with mock.patch.object(s3_client, "copy_object") as mock_copy_object:
+        malware_detection_callback(
+            safe_file,
+            ReportStatus.SAFE,
+            error_info={},
+            document_id=document.id,
+        )
+
+    mock_copy_object.assert_not_called()
+    attachment.refresh_from_db()
+    assert attachment.status == DocumentAttachmentStatus.READY
+
+
 def test_malware_detection_callback_unsafe_status(unsafe_file):
     """Test malware detection callback with unsafe status."""
 
     document = DocumentFactory(attachments=[unsafe_file])
+    Attachment.objects.create(
+        key=unsafe_file, document=document, size=4, content_type="text/plain"
+    )
 
     malware_detection_callback(
         unsafe_file,
@@ -74,3 +103,4 @@ def test_malware_detection_callback_unsafe_status(unsafe_file):
 
     assert unsafe_file not in document.attachments
     assert not default_storage.exists(unsafe_file)
+    assert not Attachment.objects.filter(key=unsafe_file).exists()
@@ -0,0 +1,141 @@
+"""
+Unit tests for the DocumentAttachment model
+"""
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def get_indexed_keys(document):
+    """Return the keys indexed for a document."""
+    return set(
+        models.DocumentAttachment.objects.filter(document=document).values_list(
+            "key", flat=True
+        )
+    )
+
+
+def test_models_document_attachments_str():
+    """The str representation should include the key and the document."""
+    document = factories.DocumentFactory(attachments=["a/attachments/1.png"])
+    attachment = models.DocumentAttachment.objects.get(document=document)
+    assert (
+        str(attachment) == f"a/attachments/1.png attached to document {document.id!s}"
+    )
+
+
+def test_models_document_attachments_created_with_document():
+    """Creating a document should index its attachments."""
+    document = factories.DocumentFactory(attachments=["a/1.png", "b/2.png"])
+    assert get_indexed_keys(document) == {"a/1.png", "b/2.png"}
+
+
+def test_models_document_attachments_updated_with_document():
+    """Saving a document should index attachments added and drop those removed."""
+    document = factories.DocumentFactory(attachments=["a/1.png", "b/2.png"])
+
+    document = models.Document.objects.get(pk=document.pk)
+    document.attachments.remove("a/1.png")
+    document.attachments.append("c/3.png")
+    document.save(update_fields=["attachments"])
+
+    assert get_indexed_keys(document) == {"b/2.png", "c/3.png"}
+
+
+def test_models_document_attachments_unchanged():
+    """Saving a document with unchanged attachments should not touch the index."""
+    document = factories.DocumentFactory(attachments=["a/1.png"])
+
+    document = models.Document.objects.get(pk=document.pk)
+    document.title = "new title"
+    with CaptureQueriesContext(connection) as queries:
+        document.save()
+
+    document = models.Document.objects.only("path").get(pk=document.pk)
+    document.title = "other title"
+    with CaptureQueriesContext(connection) as more_queries:
+        document.save(update_fields=["title"])
+
+    assert not [
+        query
+        for query in [*queries, *more_queries]
+        if "impress_document_attachment" in query["sql"]
+    ]
+    assert get_indexed_keys(document) == {"a/1.png"}
+
+
+def test_models_document_attachments_deleted_with_document():
+    """Hard deleting a document should delete its attachments from the index."""
+    document = factories.DocumentFactory(attachments=["a/1.png"])
+    document.delete()
+    assert models.DocumentAttachment.objects.exists() is False
+
+
+@pytest.mark.parametrize(
+    "reach, is_readable",
+    [("public", True), ("authenticated", False), ("restricted", False)],
+)
+def test_models_document_attachments_readable_anonymous(reach, is_readable):
+    """Anonymous users should only read attachments of public documents or subtrees."""
+    parent = factories.DocumentFactory(link_reach=reach)
+    factories.DocumentFactory(
+        parent=parent, link_reach="restricted", attachments=["a/1.png"]
+    )
+
+    assert (
+        models.DocumentAttachment.objects.filter(key="a/1.png")
+        .readable(AnonymousUser())
+        .exists()
+        is is_readable
+    )
+
+
+@pytest.mark.parametrize(
+    "reach, is_readable",
+    [("public", True), ("authenticated", True), ("restricted", False)],
+)
+def test_models_document_attachments_readable_link_reach(reach, is_readable):
+    """Authenticated users should read attachments of documents reachable by link."""
+    user = factories.UserFactory()
+    parent = factories.DocumentFactory(link_reach=reach)
+    factories.DocumentFactory(
+        parent=parent, link_reach="restricted", attachments=["a/1.png"]
+    )
+
+    assert (
+        models.DocumentAttachment.objects.filter(key="a/1.png").readable(user).exists()
+        is is_readable
+    )
+
+
+@pytest.mark.parametrize("via", ["user", "team"])
+def test_models_document_attachments_readable_ancestor_access(via, mock_user_teams):
+    """
+    Authenticated users should read attachments of documents in a subtree on which
+    they or their teams have a role, and not those of other subtrees.
+    """
+    user = factories.UserFactory()
+    grand_parent = factories.DocumentFactory(link_reach="restricted")
+    parent = factories.DocumentFactory(parent=grand_parent, link_reach="restricted")
+    factories.DocumentFactory(
+        parent=parent, link_reach="restricted", attachments=["a/1.png"]
+    )
+    factories.DocumentFactory(link_reach="restricted", attachments=["a/1.png"])
+    factories.DocumentFactory(link_reach="restricted", attachments=["b/2.png"])
+
+    if via == "user":
+        factories.UserDocumentAccessFactory(document=grand_parent, user=user)
+    else:
+        mock_user_teams.return_value = ["lasuite"]
+        factories.TeamDocumentAccessFactory(document=grand_parent, team="lasuite")
+
+    assert list(
+        models.DocumentAttachment.objects.readable(user).values_list("key", flat=True)
+    ) == ["a/1.png"]
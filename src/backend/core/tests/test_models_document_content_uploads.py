@@ -0,0 +1,211 @@
+"""
+Unit tests for the DocumentContentUpload model and the upload of contents of documents
+saved with write behind
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+import pytest
+
+from core import content_cache, factories, models
+from core.tasks.documents import upload_document_content
+
+pytestmark = pytest.mark.django_db
+
+
+def list_versions(document):
+    """Return the versions of the content of a document in object storage."""
+    return default_storage.connection.meta.client.list_object_versions(
+        Bucket=default_storage.bucket_name, Prefix=document.file_key
+    ).get("Versions", [])
+
+
+@override_settings(DOCUMENT_CONTENT_WRITE_BEHIND=True)
+def test_models_document_content_uploads_write_behind(
+    django_capture_on_commit_callbacks,
+):
+    """
+    Saving a document with write behind should not upload its content but save it in
+    the outbox, from which it should be read until it is uploaded after commit.
+    """
+    with mock.patch.object(default_storage, "save") as mock_save:
+        with django_capture_on_commit_callbacks() as callbacks:
+            document = factories.DocumentFactory(content="foo")
+
+    mock_save.assert_not_called()
+    assert len(callbacks) == 1
+    upload = models.DocumentContentUpload.objects.get()
+    assert upload.document == document
+    assert upload.etag == document.content_etag
+    assert upload.content == "foo"
+    assert str(upload) == f"content {upload.etag:s} of document {document.pk!s}"
+
+    # Read your writes from another process
+    content_cache.local_cache.clear()
+    with mock.patch.object(
+        models.Document, "get_content_response"
+    ) as mock_get_content_response:
+        assert models.Document.objects.get(pk=document.pk).content == "foo"
+    mock_get_content_response.assert_not_called()
+
+    # The task uploads the content and empties the outbox
+    callbacks[0]()
+
+    assert not models.DocumentContentUpload.objects.exists()
+    assert len(list_versions(document)) == 1
+    content_cache.local_cache.clear()
+    assert models.Document.objects.get(pk=document.pk).content == "foo"
+
+
+@override_settings(DOCUMENT_CONTENT_WRITE_BEHIND=True)
+def test_models_document_content_uploads_coalesce(django_capture_on_commit_callbacks):
+    """Successive saves of a document should be uploaded once with the last content."""
+    document = factories.DocumentFactory(content="foo")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            for content in ["bar", "baz", "qux"]:
+                document.content = content
+                document.save()
+
+            assert models.DocumentContentUpload.objects.get().content == "qux"
+
+    assert not models.DocumentContentUpload.objects.exists()
+    versions = list_versions(document)
+    assert len(versions) == 1
+    assert versions[0]["ETag"].strip('"') == document.content_etag
+
+
+def test_models_document_content_uploads_task_replaced():
+    """
+    A content replaced during its upload should be kept in the outbox for the task
+    scheduled by the replacement to upload it.
+    """
+    document = factories.DocumentFactory()
+    models.DocumentContentUpload.objects.create(
+        document=document, etag="acbd18db4cc2f85cedef654fccc4a4d8", content="foo"
+    )
+
+    def replace(*args, **kwargs):
+        models.DocumentContentUpload.objects.filter(document=document).update(
+            etag="37b51d194a7513e45b56f6524f2d51f2", content="bar"
+        )
+
+    with mock.patch.object(
+        models.Document, "upload_content", side_effect=replace
+    ) as mock_upload_content:
+        upload_document_content.apply(args=[document.pk]).get()
+
+    mock_upload_content.assert_called_once_with(
+        b"foo", "acbd18db4cc2f85cedef654fccc4a4d8"
+    )
+    upload = models.DocumentContentUpload.objects.get()
+    assert upload.content == "bar"
+    assert upload.claimed_at is None
+
+
+def test_models_document_content_uploads_task_nothing_to_upload():
+    """The task should do nothing if the content was already uploaded."""
+    document = factories.DocumentFactory()
+
+    with mock.patch.object(models.Document, "upload_content") as mock_upload_content:
+        upload_document_content.apply(args=[document.pk]).get()
+
+    mock_upload_content.assert_not_called()
+
+
+def test_models_document_content_uploads_task_claimed():
+    """
+    The content should be claimed while it is uploaded, outside of any transaction
+    opened by the task, and removed once uploaded.
+    """
+    document = factories.DocumentFactory()
+    models.DocumentContentUpload.objects.create(
+        document=document, etag="acbd18db4cc2f85cedef654fccc4a4d8", content="foo"
+    )
+    atomic_blocks = len(connection.atomic_blocks)
+    during_upload = []
+
+    def upload_content(*args, **kwargs):
+        during_upload.append(
+            (
+                len(connection.atomic_blocks),
+                models.DocumentContentUpload.objects.get().is_claimed(),
+            )
+        )
+
+    with mock.patch.object(
+        models.Document, "upload_content", side_effect=upload_content
+    ):
+        upload_document_content.apply(args=[document.pk]).get()
+
+    assert during_upload == [(atomic_blocks, True)]
+    assert not models.DocumentContentUpload.objects.exists()
+
+
+def test_models_document_content_uploads_task_failure():
+    """A content that fails to upload should be released for another attempt."""
+    document = factories.DocumentFactory()
+    models.DocumentContentUpload.objects.create(
+        document=document, etag="acbd18db4cc2f85cedef654fccc4a4d8", content="foo"
+    )
+
+    with (
+        mock.patch.object(
+            models.Document, "upload_content", side_effect=ConnectionError
+        ),
+        pytest.raises(ConnectionError),
+    ):
+        upload_document_content.apply(args=[document.pk]).get()
+
+    assert models.DocumentContentUpload.objects.get().claimed_at is None
+
+
+@override_settings(DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT=300)
+def test_models_document_content_uploads_task_locked():
+    """The task should be retried while another upload of the document is running."""
+    document = factories.DocumentFactory()
+    models.DocumentContentUpload.objects.create(
+        document=document,
+        etag="acbd18db4cc2f85cedef654fccc4a4d8",
+        content="foo",
+        claimed_at=timezone.now() - timedelta(seconds=299),
+    )
+
+    with (
+        mock.patch.object(models.Document, "upload_content") as mock_upload_content,
+        mock.patch.object(
+            upload_document_content, "retry", side_effect=RuntimeError
+        ) as mock_retry,
+        pytest.raises(RuntimeError),
+    ):
+        upload_document_content.apply(args=[document.pk]).get()
+
+    mock_retry.assert_called_once_with(countdown=2)
+    mock_upload_content.assert_not_called()
+
+
+@override_settings(DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT=300)
+def test_models_document_content_uploads_task_claim_abandoned():
+    """A content claimed by an upload that was abandoned should be uploaded again."""
+    document = factories.DocumentFactory()
+    models.DocumentContentUpload.objects.create(
+        document=document,
+        etag="acbd18db4cc2f85cedef654fccc4a4d8",
+        content="foo",
+        claimed_at=timezone.now() - timedelta(seconds=301),
+    )
+
+    with mock.patch.object(models.Document, "upload_content") as mock_upload_content:
+        upload_document_content.apply(args=[document.pk]).get()
+
+    mock_upload_content.assert_called_once_with(
+        b"foo", "acbd18db4cc2f85cedef654fccc4a4d8"
+    )
+    assert not models.DocumentContentUpload.objects.exists()
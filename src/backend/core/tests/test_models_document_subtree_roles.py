@@ -0,0 +1,220 @@
+"""
+Unit tests for the DocumentSubtreeRole model
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+
+from core import factories, models
+
+pytestmark = pytest.mark.django_db
+
+
+def test_models_document_subtree_roles_str():
+    """The str representation should include the target, the role and the path."""
+    access = factories.TeamDocumentAccessFactory(team="admins", role="reader")
+    assert (
+        str(access.subtree_role)
+        == f"team:admins is reader on subtree {access.document.path:s}"
+    )
+
+
+def test_models_document_subtree_roles_created_with_access():
+    """Saving a document access should create the corresponding subtree role."""
+    parent = factories.DocumentFactory()
+    document = factories.DocumentFactory(parent=parent)
+    access = factories.UserDocumentAccessFactory(document=document, role="editor")
+
+    subtree_role = models.DocumentSubtreeRole.objects.get(access=access)
+    assert subtree_role.document == document
+    assert subtree_role.path == document.path
+    assert subtree_role.user == access.user
+    assert subtree_role.team == ""
+    assert subtree_role.role == "editor"
+    assert subtree_role.ancestors_deleted_at is None
+
+
+def test_models_document_subtree_roles_updated_with_access():
+    """Updating the role of a document access should update its subtree role."""
+    access = factories.UserDocumentAccessFactory(role="reader")
+
+    access.role = "owner"
+    access.save()
+
+    assert models.DocumentSubtreeRole.objects.get(access=access).role == "owner"
+    assert models.DocumentSubtreeRole.objects.count() == 1
+
+
+def test_models_document_subtree_roles_deleted_with_access():
+    """Deleting a document access should delete its subtree role."""
+    access = factories.UserDocumentAccessFactory()
+    other_access = factories.UserDocumentAccessFactory(document=access.document)
+
+    access.delete()
+
+    assert list(
+        models.DocumentSubtreeRole.objects.values_list("access", flat=True)
+    ) == [other_access.pk]
+
+
+def test_models_document_subtree_roles_bulk_create():
+    """Document accesses created in bulk should get their subtree roles."""
+    document = factories.DocumentFactory()
+    user = factories.UserFactory()
+
+    models.DocumentAccess.objects.bulk_create(
+        [
+            models.DocumentAccess(document=document, user=user, role="reader"),
+            models.DocumentAccess(document=document, team="lasuite", role="editor"),
+        ]
+    )
+
+    assert set(
+        models.DocumentSubtreeRole.objects.values_list("path", "user", "team", "role")
+    ) == {
+        (document.path, user.pk, "", "reader"),
+        (document.path, None, "lasuite", "editor"),
+    }
+
+
+def test_models_document_subtree_roles_bulk_create_constant_queries():
+    """
+    Creating accesses in bulk should fetch their documents in a single query,
+    whatever the number of documents.
+    """
+
+    def bulk_create(nb_documents):
+        users = factories.UserFactory.create_batch(nb_documents)
+        documents = factories.DocumentFactory.create_batch(nb_documents)
+        with CaptureQueriesContext(connection) as queries:
+            models.DocumentAccess.objects.bulk_create(
+                [
+                    models.DocumentAccess(
+                        document_id=document.id, user=user, role="reader"
+                    )
+                    for document, user in zip(documents, users, strict=True)
+                ]
+            )
+        return len(queries)
+
+    assert bulk_create(3) == bulk_create(1)
+
+
+def test_models_document_subtree_roles_move():
+    """Moving a document should update the path of subtree roles in its subtree."""
+    source = factories.DocumentFactory()
+    document = factories.DocumentFactory(parent=source)
+    child = factories.DocumentFactory(parent=document)
+    target = factories.DocumentFactory()
+    access = factories.UserDocumentAccessFactory(document=document)
+    child_access = factories.UserDocumentAccessFactory(document=child)
+    other_access = factories.UserDocumentAccessFactory(document=source)
+
+    document.move(target, pos="first-child")
+
+    document.refresh_from_db()
+    child.refresh_from_db()
+    assert document.path.startswith(target.path)
+    assert models.DocumentSubtreeRole.objects.get(access=access).path == document.path
+    assert (
+        models.DocumentSubtreeRole.objects.get(access=child_access).path == child.path
+    )
+    assert (
+        models.DocumentSubtreeRole.objects.get(access=other_access).path == source.path
+    )
+
+
+def create_consecutive_children(parent, count):
+    """
+    Create children of a document at consecutive steps, as treebeard allocated them
+    before steps were spaced.
+    """
+    children = factories.DocumentFactory.create_batch(count, parent=parent)
+    for step, child in enumerate(children, start=1):
+        models.Document.objects.filter(pk=child.pk).update(
+            path=models.Document.get_step_path(parent.path, step)
+        )
+        child.refresh_from_db()
+    return children
+
+
+def assert_subtree_roles_synced():
+    """Check that the path of each subtree role is the path of its document."""
+    for subtree_role in models.DocumentSubtreeRole.objects.select_related("document"):
+        assert subtree_role.path == subtree_role.document.path
+
+
+def test_models_document_subtree_roles_move_shifting_siblings():
+    """
+    Moving a document left of a sibling at consecutive steps should update the subtree
+    roles of the siblings shifted by treebeard and of their descendants, and renew
+    the accesses versions of their former and new paths.
+    """
+    parent = factories.DocumentFactory()
+    first, second, third = create_consecutive_children(parent, 3)
+    child = factories.DocumentFactory(parent=second)
+    first_owner, second_owner = factories.UserFactory.create_batch(2)
+    factories.UserDocumentAccessFactory(document=first, user=first_owner, role="owner")
+    factories.UserDocumentAccessFactory(
+        document=second, user=second_owner, role="owner"
+    )
+    paths = [first.path, second.path, third.path]
+    versions = models.Document.get_accesses_versions(paths)
+
+    third.move(first, pos="left")
+
+    for document in (first, second, third, child):
+        document.refresh_from_db()
+    assert [third.path, first.path, second.path] == paths
+    assert child.path.startswith(second.path)
+    assert_subtree_roles_synced()
+    assert first.get_role(first_owner) == "owner"
+    assert first.get_role(second_owner) is None
+    assert second.get_role(second_owner) == "owner"
+    assert child.get_role(second_owner) == "owner"
+    new_versions = models.Document.get_accesses_versions(paths)
+    assert all(new_versions[path] != versions[path] for path in paths)
+
+
+def test_models_document_subtree_roles_soft_delete_and_restore():
+    """
+    Soft deleting and restoring a document should update the deletion date of
+    subtree roles in its subtree.
+    """
+    document = factories.DocumentFactory()
+    child = factories.DocumentFactory(parent=document)
+    access = factories.UserDocumentAccessFactory(document=child)
+    other_access = factories.UserDocumentAccessFactory()
+
+    document.soft_delete()
+
+    subtree_role = models.DocumentSubtreeRole.objects.get(access=access)
+    assert subtree_role.ancestors_deleted_at == document.deleted_at
+    assert subtree_role.ancestors_deleted_at < timezone.now()
+    assert (
+        models.DocumentSubtreeRole.objects.get(access=other_access).ancestors_deleted_at
+        is None
+    )
+
+    document.restore()
+
+    subtree_role.refresh_from_db()
+    assert subtree_role.ancestors_deleted_at is None
+
+
+def test_models_document_subtree_roles_get_role():
+    """Roles should be resolved from subtree roles on the document and its ancestors."""
+    user = factories.UserFactory()
+    grand_parent = factories.DocumentFactory(users=[(user, "reader")])
+    parent = factories.DocumentFactory(parent=grand_parent, users=[(user, "editor")])
+    document = factories.DocumentFactory(parent=parent)
+    factories.UserDocumentAccessFactory(document=document, role="owner")
+
+    assert document.get_role(user) == "editor"
+    annotated_document = models.Document.objects.annotate_user_roles(user).get(
+        pk=document.pk
+    )
+    assert sorted(annotated_document.user_roles) == ["editor", "reader"]
@@ -17,8 +17,10 @@ from django.test.utils import override_settings
 from django.utils import timezone
 
 import pytest
+from freezegun import freeze_time
+from treebeard.exceptions import NodeAlreadySaved
 
-from core import factories, models
+from core import content_cache, factories, models
 
 pytestmark = pytest.mark.django_db
 
@@ -716,6 +718,277 @@ def test_models_documents_version_duplicate():
     assert len(response["Versions"]) == 2
 
 
+def test_models_documents_add_root_path_sequence():
+    """
+    Paths of root documents should be allocated from a sequence, following any root
+    placed after it by treebeard.
+    """
+    first = factories.DocumentFactory()
+    second = models.Document.add_root(title="second")
+
+    assert first.depth == second.depth == 1
+    assert len(second.path) == models.Document.steplen
+    assert second.path > first.path
+
+    # Place a root beyond the sequence as moving a document to the root level would
+    moved = factories.DocumentFactory()
+    moved_path = models.Document.get_step_path(
+        "", models.Document.get_path_step(moved.path) + 100
+    )
+    models.Document.objects.filter(pk=moved.pk).update(path=moved_path)
+
+    third = models.Document.add_root(instance=models.Document(title="third"))
+    assert third.path > moved_path
+    assert models.Document.objects.get(pk=third.pk).path == third.path
+
+
+def test_models_documents_add_root_path_taken():
+    """The path of a root should be allocated again if it is already taken."""
+    taken = factories.DocumentFactory()
+    free_path = models.Document.get_next_root_path()
+
+    with mock.patch.object(
+        models.Document, "get_next_root_path", side_effect=[taken.path, free_path]
+    ):
+        document = models.Document.add_root(title="new")
+
+    assert models.Document.objects.get(pk=document.pk).path == free_path
+
+
+def test_models_documents_get_next_root_paths():
+    """Paths of several root documents should be allocated at once, in order."""
+    last = factories.DocumentFactory()
+
+    paths = models.Document.get_next_root_paths(3)
+
+    assert len(set(paths)) == 3
+    assert paths == sorted(paths)
+    assert paths[0] > last.path
+    assert {len(path) for path in paths} == {models.Document.steplen}
+
+
+def test_models_documents_add_root_already_saved():
+    """Adding a document that is already saved as a root should fail."""
+    document = factories.DocumentFactory()
+
+    with pytest.raises(NodeAlreadySaved):
+        models.Document.add_root(instance=document)
+
+
+def get_step(document):
+    """Return the last step of the path of a document as an integer."""
+    return models.Document.get_path_step(document.path)
+
+
+def test_models_documents_add_child_step_gap():
+    """Children should be appended after the last child, spaced by the step gap."""
+    parent = factories.DocumentFactory()
+    first = parent.add_child(title="first")
+    second = parent.add_child(instance=models.Document(title="second"))
+
+    assert first.path.startswith(parent.path)
+    assert first.depth == second.depth == 2
+    assert get_step(first) == 1024
+    assert get_step(second) == 2048
+    assert parent.numchild == 2
+    parent.refresh_from_db()
+    assert parent.numchild == 2
+
+
+def test_models_documents_add_child_path_taken():
+    """The path of a child should be taken again if it is already taken."""
+    parent = factories.DocumentFactory()
+    taken = parent.add_child(title="taken")
+
+    # The last child is not seen yet, as by a concurrent transaction
+    with (
+        mock.patch.object(models.Document, "get_last_child_step", return_value=0),
+        mock.patch("core.models.secrets.randbelow", return_value=9),
+    ):
+        document = parent.add_child(title="new")
+
+    assert get_step(taken) == 1024
+    assert models.Document.objects.get(pk=document.pk).path == parent.path + "000000A"
+
+
+def test_models_documents_add_sibling_gap():
+    """
+    Siblings added right or left of a document should be placed halfway to their
+    neighbour without moving other documents.
+    """
+    parent = factories.DocumentFactory()
+    first = factories.DocumentFactory(parent=parent)
+    grand_child = factories.DocumentFactory(parent=first)
+    second = factories.DocumentFactory(parent=parent)
+    paths = dict(models.Document.objects.values_list("pk", "path"))
+
+    right = first.add_sibling("right", title="right")
+    left = first.add_sibling("left", title="left")
+    last = first.add_sibling("last-sibling", title="last")
+    after_last = last.add_sibling("right", title="after last")
+
+    assert (
+        dict(models.Document.objects.filter(pk__in=paths).values_list("pk", "path"))
+        == paths
+    )
+    assert [get_step(document) for document in [left, right, last, after_last]] == [
+        512,
+        1536,
+        3072,
+        4096,
+    ]
+    assert [document.pk for document in models.Document.objects.filter(depth=2)] == [
+        left.pk,
+        first.pk,
+        right.pk,
+        second.pk,
+        last.pk,
+        after_last.pk,
+    ]
+    assert grand_child.path.startswith(first.path)
+    parent.refresh_from_db()
+    assert parent.numchild == 6
+
+
+def test_models_documents_add_sibling_gap_roots():
+    """Roots added right of a root should fill the gap or follow the last root."""
+    first = factories.DocumentFactory()
+    second = factories.DocumentFactory()
+
+    right = first.add_sibling("right", title="right")
+    last = second.add_sibling("right", title="last")
+
+    assert first.path < right.path < second.path < last.path
+    assert right.depth == last.depth == 1
+
+
+def test_models_documents_add_sibling_no_gap():
+    """Treebeard should shift the following siblings when there is no gap left."""
+    parent = factories.DocumentFactory()
+    first = factories.DocumentFactory(parent=parent)
+    second = factories.DocumentFactory(parent=parent)
+    models.Document.objects.filter(pk=second.pk).update(
+        path=models.Document.get_step_path(parent.path, get_step(first) + 1)
+    )
+
+    right = first.add_sibling("right", title="right")
+
+    second.refresh_from_db()
+    assert get_step(right) == get_step(first) + 1
+    assert get_step(second) == get_step(first) + 2
+
+
+@pytest.mark.parametrize("pos", ["right", "first-sibling"])
+def test_models_documents_add_sibling_no_gap_subtree_roles(pos):
+    """
+    Subtree roles of the siblings shifted by treebeard and of their descendants should
+    follow their new paths.
+    """
+    parent = factories.DocumentFactory()
+    first, second = factories.DocumentFactory.create_batch(2, parent=parent)
+    for step, document in enumerate([first, second], start=1):
+        models.Document.objects.filter(pk=document.pk).update(
+            path=models.Document.get_step_path(parent.path, step)
+        )
+        document.refresh_from_db()
+    child = factories.DocumentFactory(parent=second)
+    owner = factories.UserFactory()
+    factories.UserDocumentAccessFactory(document=second, user=owner, role="owner")
+
+    document = first.add_sibling(pos, title="new")
+
+    second.refresh_from_db()
+    child.refresh_from_db()
+    assert get_step(second) == 3
+    assert models.DocumentSubtreeRole.objects.get(user=owner).path == second.path
+    assert document.get_role(owner) is None
+    assert second.get_role(owner) == "owner"
+    assert child.get_role(owner) == "owner"
+
+
+def test_models_documents_save_content_etag():
+    """
+    The ETag of the content should be saved with the document and spare asking object
+    storage for it when saving the document again.
+    """
+    document = factories.DocumentFactory(content="foo")
+
+    assert document.content_etag == "acbd18db4cc2f85cedef654fccc4a4d8"
+    document.refresh_from_db()
+    assert document.content_etag == "acbd18db4cc2f85cedef654fccc4a4d8"
+
+    client = default_storage.connection.meta.client
+    with (
+        mock.patch.object(client, "head_object") as mock_head_object,
+        mock.patch.object(default_storage, "save") as mock_save,
+    ):
+        document.content = "foo"
+        document.save()
+        mock_save.assert_not_called()
+
+        document.content = "bar"
+        document.save(update_fields=["title"])
+        mock_save.assert_called_once()
+
+    mock_head_object.assert_not_called()
+    document.refresh_from_db()
+    assert document.content_etag == "37b51d194a7513e45b56f6524f2d51f2"
+
+
+def test_models_documents_save_content_etag_unknown():
+    """
+    Documents saved before their ETag was stored with them should compare the ETag
+    of their content with the one in object storage.
+    """
+    document = factories.DocumentFactory(content="foo")
+    models.Document.objects.filter(pk=document.pk).update(content_etag="")
+    document.refresh_from_db()
+
+    with mock.patch.object(default_storage, "save") as mock_save:
+        document.content = "foo"
+        document.save()
+
+    mock_save.assert_not_called()
+    document.refresh_from_db()
+    assert document.content_etag == "acbd18db4cc2f85cedef654fccc4a4d8"
+
+
+def test_models_documents_content_cache():
+    """
+    The content of a document should be read from the content cache for the ETag saved
+    with the document, and from object storage when it is not in the cache.
+    """
+    document = factories.DocumentFactory(content="foo")
+
+    with mock.patch.object(
+        models.Document, "get_content_response"
+    ) as mock_get_content_response:
+        assert models.Document.objects.get(pk=document.pk).content == "foo"
+
+    mock_get_content_response.assert_not_called()
+
+    content_cache.local_cache.clear()
+    assert models.Document.objects.get(pk=document.pk).content == "foo"
+    assert content_cache.get_content(document.pk, document.content_etag) == "foo"
+
+
+@override_settings(DOCUMENT_CONTENT_CACHE_TIMEOUT=60)
+def test_models_documents_content_cache_shared():
+    """
+    The content of a document should be shared between processes when enabled.
+    """
+    document = factories.DocumentFactory(content="foo")
+    content_cache.local_cache.clear()
+
+    with mock.patch.object(
+        models.Document, "get_content_response"
+    ) as mock_get_content_response:
+        assert models.Document.objects.get(pk=document.pk).content == "foo"
+
+    mock_get_content_response.assert_not_called()
+    assert cache.get(f"document_{document.pk!s}_content_{document.content_etag:s}")
+
+
 def test_models_documents__email_invitation__success():
     """
     The email invitation is sent successfully.
@@ -858,7 +1131,6 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_ancestors(
     """Test that nb_accesses is cached when calling nb_accesses_ancestors."""
     parent = factories.DocumentFactory()
     document = factories.DocumentFactory(parent=parent)
-    key = f"document_{document.id!s}_nb_accesses"
     nb_accesses_parent = random.randint(1, 4)
     factories.UserDocumentAccessFactory.create_batch(
         nb_accesses_parent, document=parent
@@ -870,11 +1142,12 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_ancestors(
     factories.UserDocumentAccessFactory()  # An unrelated access should not be counted
 
     # Initially, the nb_accesses should not be cached
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None
 
     # Compute the nb_accesses for the first time (this should set the cache)
     nb_accesses_ancestors = nb_accesses_parent + nb_accesses_direct
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert document.nb_accesses_ancestors == nb_accesses_ancestors
 
     # Ensure that the nb_accesses is now cached
@@ -886,8 +1159,9 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_ancestors(
     models.DocumentAccess.objects.create(
         document=document, user=factories.UserFactory(), role="reader"
     )
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None  # Cache should be invalidated
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert document.nb_accesses_ancestors == nb_accesses_ancestors + 1
     assert cache.get(key) == (nb_accesses_direct + 1, nb_accesses_ancestors + 1)
 
@@ -898,7 +1172,6 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_direct(
     """Test that nb_accesses is cached when calling nb_accesses_direct."""
     parent = factories.DocumentFactory()
     document = factories.DocumentFactory(parent=parent)
-    key = f"document_{document.id!s}_nb_accesses"
     nb_accesses_parent = random.randint(1, 4)
     factories.UserDocumentAccessFactory.create_batch(
         nb_accesses_parent, document=parent
@@ -910,11 +1183,12 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_direct(
     factories.UserDocumentAccessFactory()  # An unrelated access should not be counted
 
     # Initially, the nb_accesses should not be cached
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None
 
     # Compute the nb_accesses for the first time (this should set the cache)
     nb_accesses_ancestors = nb_accesses_parent + nb_accesses_direct
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert document.nb_accesses_direct == nb_accesses_direct
 
     # Ensure that the nb_accesses is now cached
@@ -926,8 +1200,9 @@ def test_models_documents_nb_accesses_cache_is_set_and_retrieved_direct(
     models.DocumentAccess.objects.create(
         document=document, user=factories.UserFactory(), role="reader"
     )
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None  # Cache should be invalidated
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         assert document.nb_accesses_direct == nb_accesses_direct + 1
     assert cache.get(key) == (nb_accesses_direct + 1, nb_accesses_ancestors + 1)
 
@@ -939,19 +1214,20 @@ def test_models_documents_nb_accesses_cache_is_invalidated_on_access_removal(
 ):
     """Test that the cache is invalidated when a document access is deleted."""
     document = factories.DocumentFactory()
-    key = f"document_{document.id!s}_nb_accesses"
     access = factories.UserDocumentAccessFactory(document=document)
 
     # Initially, the nb_accesses should be cached
     assert getattr(document, field) == 1
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) == (1, 1)
 
     # Remove the access and check if cache is invalidated
     access.delete()
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None  # Cache should be invalidated
 
     # Recompute the nb_accesses (this should trigger a cache set)
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         new_nb_accesses = getattr(document, field)
     assert new_nb_accesses == 0
     assert cache.get(key) == (0, 0)  # Cache should now contain the new value
@@ -964,32 +1240,166 @@ def test_models_documents_nb_accesses_cache_is_invalidated_on_document_soft_dele
 ):
     """Test that the cache is invalidated when a document access is deleted."""
     document = factories.DocumentFactory()
-    key = f"document_{document.id!s}_nb_accesses"
     factories.UserDocumentAccessFactory(document=document)
 
     # Initially, the nb_accesses should be cached
     assert getattr(document, field) == 1
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) == (1, 1)
 
     # Soft delete the document and check if cache is invalidated
     document.soft_delete()
+    key = document.get_nb_accesses_cache_key()
     assert cache.get(key) is None  # Cache should be invalidated
 
     # Recompute the nb_accesses (this should trigger a cache set)
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         new_nb_accesses = getattr(document, field)
     assert new_nb_accesses == (1 if field == "nb_accesses_direct" else 0)
     assert cache.get(key) == (1, 0)  # Cache should now contain the new value
 
     document.restore()
+    key = document.get_nb_accesses_cache_key()
+    assert cache.get(key) is None  # Cache should be invalidated
 
     # Recompute the nb_accesses (this should trigger a cache set)
-    with django_assert_num_queries(2):
+    with django_assert_num_queries(1):
         new_nb_accesses = getattr(document, field)
     assert new_nb_accesses == 1
     assert cache.get(key) == (1, 1)  # Cache should now contain the new value
 
 
+def test_models_documents_nb_accesses_cache_invalidate_subtree(
+    django_assert_num_queries,
+):
+    """
+    Invalidating the cache for number of accesses on a document should invalidate it
+    on all its descendants without querying them.
+    """
+    document = factories.DocumentFactory()
+    child = factories.DocumentFactory(parent=document)
+    grand_child = factories.DocumentFactory(parent=child)
+    sibling = factories.DocumentFactory()
+    for doc in [document, child, grand_child, sibling]:
+        doc.get_nb_accesses()
+    keys = [doc.get_nb_accesses_cache_key() for doc in [child, grand_child, sibling]]
+
+    with django_assert_num_queries(0):
+        child.invalidate_accesses_cache()
+
+    assert child.get_nb_accesses_cache_key() != keys[0]
+    assert grand_child.get_nb_accesses_cache_key() != keys[1]
+    assert sibling.get_nb_accesses_cache_key() == keys[2]
+    assert cache.get(grand_child.get_nb_accesses_cache_key()) is None
+
+
+def test_models_documents_nb_accesses_cache_invalidate_on_commit(
+    django_capture_on_commit_callbacks,
+):
+    """
+    The version of the subtree should be renewed again when the transaction is
+    committed so that a value computed concurrently before commit is not used.
+    """
+    document = factories.DocumentFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        document.invalidate_accesses_cache()
+        key = document.get_nb_accesses_cache_key()
+        # A concurrent request computes the value before the transaction is committed
+        cache.set(key, (0, 0))
+
+    assert document.get_nb_accesses_cache_key() != key
+
+
+def test_models_documents_accesses_versions_no_expiry(
+    django_capture_on_commit_callbacks,
+):
+    """
+    Accesses versions should outlive the default timeout of the cache so that values
+    cached on them for longer remain reachable.
+    """
+    document = factories.DocumentFactory()
+    child = factories.DocumentFactory(parent=document)
+    paths = [document.path, child.path]
+
+    with freeze_time("2025-01-01 10:00:00"):
+        with django_capture_on_commit_callbacks(execute=True):
+            child.invalidate_accesses_cache()
+        versions = models.Document.get_accesses_versions(paths)
+
+    with freeze_time("2025-02-01 10:00:00"):
+        assert models.Document.get_accesses_versions(paths) == versions
+
+
+def test_models_documents_nb_accesses_cache_move():
+    """
+    Moving a document should renew the accesses version of its subtree at its former
+    path, which other documents may take, and at its new path, which it may have had
+    before if it is moved back under a former parent.
+    """
+    document = factories.DocumentFactory(parent=factories.DocumentFactory())
+    former_path = document.path
+    target = factories.DocumentFactory()
+
+    paths = []
+    with mock.patch.object(
+        models.Document,
+        "invalidate_accesses_cache",
+        autospec=True,
+        side_effect=lambda invalidated: paths.append(invalidated.path),
+    ):
+        document.move(target, pos="first-child")
+
+    document.refresh_from_db()
+    assert document.path.startswith(target.path)
+    assert paths == [former_path, document.path]
+
+
+def test_models_documents_prefetch_nb_accesses(django_assert_num_queries):
+    """
+    The number of accesses of many documents should be resolved in bulk: cached
+    values are reused and missing values are computed in one query and cached.
+    """
+    root = factories.DocumentFactory()
+    parent = factories.DocumentFactory(parent=root)
+    document = factories.DocumentFactory(parent=parent)
+    sibling = factories.DocumentFactory(parent=parent)
+    other = factories.DocumentFactory()
+    deleted = factories.DocumentFactory(parent=other)
+    factories.UserDocumentAccessFactory.create_batch(2, document=root)
+    factories.UserDocumentAccessFactory(document=parent)
+    factories.UserDocumentAccessFactory.create_batch(3, document=document)
+    factories.UserDocumentAccessFactory(document=other)
+    factories.UserDocumentAccessFactory.create_batch(2, document=deleted)
+    deleted.soft_delete()
+
+    # The value of the parent is cached already
+    cache.set(parent.get_nb_accesses_cache_key(), (7, 7))
+
+    documents = [root, parent, document, sibling, deleted]
+    with django_assert_num_queries(1):
+        models.Document.prefetch_nb_accesses(documents)
+
+    with django_assert_num_queries(0):
+        assert [(d.nb_accesses_direct, d.nb_accesses_ancestors) for d in documents] == [
+            (2, 2),
+            (7, 7),
+            (3, 6),
+            (0, 3),
+            (2, 1),
+        ]
+
+    for document in documents:
+        key = document.get_nb_accesses_cache_key()
+        assert cache.get(key) == document.get_nb_accesses()
+
+    # Values should now be resolved from the cache without any query
+    documents = [models.Document.objects.get(pk=d.pk) for d in documents]
+    with django_assert_num_queries(0):
+        models.Document.prefetch_nb_accesses(documents)
+    assert documents[2].get_nb_accesses() == (3, 6)
+
+
 def test_models_documents_numchild_deleted_from_instance():
     """the "numchild" field should not include documents deleted from the instance."""
     document = factories.DocumentFactory()
@@ -1315,3 +1725,302 @@ def test_models_documents_compute_ancestors_links_paths_mapping_structure(
                 {"link_reach": sibling.link_reach, "link_role": sibling.link_role},
             ],
         }
+
+
+def test_models_documents_get_paths_links_mapping(django_assert_num_queries):
+    """
+    The get_paths_links_mapping method should compute the links of the ancestors of
+    many documents in a single query, skipping soft deleted ancestors.
+    """
+    root = factories.DocumentFactory(link_reach="restricted")
+    document = factories.DocumentFactory(
+        parent=root, link_reach="authenticated", link_role="editor"
+    )
+    child = factories.DocumentFactory(parent=document)
+    other_root = factories.DocumentFactory(link_reach="public", link_role="reader")
+    deleted_document = factories.DocumentFactory(parent=other_root)
+    deleted_child = factories.DocumentFactory(parent=deleted_document)
+    deleted_document.soft_delete()
+
+    with django_assert_num_queries(1):
+        mapping = models.Document.get_paths_links_mapping(
+            [child.path, document.path, deleted_child.path, root.path]
+        )
+
+    assert mapping == {
+        root.path: [{"link_reach": "restricted", "link_role": root.link_role}],
+        document.path: [
+            {"link_reach": "restricted", "link_role": root.link_role},
+            {"link_reach": "authenticated", "link_role": "editor"},
+        ],
+        other_root.path: [{"link_reach": "public", "link_role": "reader"}],
+    }
+
+
+def test_models_documents_get_paths_links_mapping_roots(django_assert_num_queries):
+    """No query should be made when none of the documents has ancestors."""
+    documents = factories.DocumentFactory.create_batch(2)
+
+    with django_assert_num_queries(0):
+        assert not models.Document.get_paths_links_mapping(d.path for d in documents)
+
+
+@pytest.mark.parametrize("is_authenticated", [True, False])
+def test_models_documents_prefetch_abilities(
+    is_authenticated, django_assert_num_queries
+):
+    """
+    Abilities prefetched in bulk should be the same as abilities computed on
+    each document and be used by get_abilities without any query.
+    """
+    user = factories.UserFactory() if is_authenticated else AnonymousUser()
+    root = factories.DocumentFactory(link_reach="public", link_role="reader")
+    document = factories.DocumentFactory(parent=root, link_reach="restricted")
+    child = factories.DocumentFactory(
+        parent=document, link_reach="authenticated", link_role="editor"
+    )
+    other = factories.DocumentFactory(link_reach="restricted")
+    deleted = factories.DocumentFactory(parent=other, link_reach="public")
+    if is_authenticated:
+        factories.UserDocumentAccessFactory(document=document, user=user, role="editor")
+        factories.UserDocumentAccessFactory(document=deleted, user=user, role="owner")
+    deleted.soft_delete()
+
+    paths = [root.path, document.path, child.path, other.path, deleted.path]
+    expected_abilities = [
+        models.Document.objects.get(path=path).get_abilities(user) for path in paths
+    ]
+
+    queryset = models.Document.objects.filter(path__in=paths).order_by("path")
+    if is_authenticated:
+        queryset = queryset.annotate_user_roles(user)
+    documents = list(queryset)
+
+    with django_assert_num_queries(1):
+        models.Document.prefetch_abilities(documents, user)
+
+    with django_assert_num_queries(0):
+        assert [d.get_abilities(user) for d in documents] == expected_abilities
+        assert documents[2].computed_link_reach == "public"
+
+
+def test_models_documents_prefetch_abilities_memoized():
+    """
+    Abilities should be computed only once for documents sharing the same role,
+    link definitions and deletion status.
+    """
+    user = factories.UserFactory()
+    factories.DocumentFactory.create_batch(3, link_reach="public", link_role="reader")
+    factories.DocumentFactory(link_reach="restricted")
+    documents = list(models.Document.objects.annotate_user_roles(user))
+
+    with mock.patch.object(
+        models.Document,
+        "compute_abilities",
+        autospec=True,
+        side_effect=lambda document, role, user: {"link_reach": document.link_reach},
+    ) as mock_compute:
+        models.Document.prefetch_abilities(documents, user)
+
+    assert mock_compute.call_count == 2
+    public_documents = [d for d in documents if d.link_reach == "public"]
+    assert len(public_documents) == 3
+    assert all(
+        d.get_abilities(user) is public_documents[0].get_abilities(user)
+        for d in public_documents
+    )
+
+
+def test_models_documents_prefetch_abilities_other_user():
+    """Abilities prefetched for a user should not be returned to another user."""
+    user = factories.UserFactory()
+    other_user = factories.UserFactory()
+    document = factories.DocumentFactory(
+        link_reach="restricted", users=[(user, "owner")]
+    )
+    document = models.Document.objects.annotate_user_roles(user).get(pk=document.pk)
+
+    models.Document.prefetch_abilities([document], user)
+
+    assert document.get_abilities(user)["destroy"] is True
+    del document.user_roles
+    assert document.get_abilities(other_user)["retrieve"] is False
+
+
+def test_models_documents_get_role_request_cache(django_assert_num_queries):
+    """
+    During a request, the role of a user on a document should be resolved once and
+    resolved again after accesses change on the document or one of its ancestors.
+    """
+    user = factories.UserFactory()
+    parent = factories.DocumentFactory(users=[(user, "reader")])
+    document = factories.DocumentFactory(parent=parent)
+    sibling = factories.DocumentFactory(parent=parent, users=[(user, "editor")])
+
+    # Outside of a request, roles are not cached
+    with django_assert_num_queries(1):
+        assert document.get_role(user) == "reader"
+    with django_assert_num_queries(1):
+        assert document.get_role(user) == "reader"
+
+    token = models.request_roles_cache.set({})
+    try:
+        with django_assert_num_queries(2):
+            assert document.get_role(user) == "reader"
+            assert sibling.get_role(user) == "editor"
+        with django_assert_num_queries(0):
+            assert document.get_role(user) == "reader"
+            assert sibling.get_role(user) == "editor"
+
+        access = models.DocumentAccess.objects.get(document=parent, user=user)
+        access.role = "owner"
+        access.save()
+
+        with django_assert_num_queries(2):
+            assert document.get_role(user) == "owner"
+            assert sibling.get_role(user) == "owner"
+    finally:
+        models.request_roles_cache.reset(token)
+
+
+@override_settings(DOCUMENT_ROLES_CACHE_TIMEOUT=30)
+def test_models_documents_get_role_shared_cache(
+    django_assert_num_queries, mock_user_teams
+):
+    """
+    When enabled, the role of a user on a document should be shared between requests
+    and invalidated when accesses or the teams of the user change.
+    """
+    mock_user_teams.return_value = []
+    user = factories.UserFactory()
+    parent = factories.DocumentFactory(users=[(user, "reader")])
+    document = factories.DocumentFactory(parent=parent, teams=[("lasuite", "editor")])
+    other_document = factories.DocumentFactory()
+
+    with django_assert_num_queries(2):
+        assert document.get_role(user) == "reader"
+        assert other_document.get_role(user) is None
+    with django_assert_num_queries(0):
+        same_document = models.Document(pk=document.pk, path=document.path)
+        assert same_document.get_role(user) == "reader"
+        assert other_document.get_role(user) is None
+
+    mock_user_teams.return_value = ["lasuite"]
+    with django_assert_num_queries(1):
+        assert document.get_role(user) == "editor"
+
+    access = models.DocumentAccess.objects.get(document=parent, user=user)
+    access.role = "owner"
+    access.save()
+    with django_assert_num_queries(1):
+        assert document.get_role(user) == "owner"
+
+
+def test_models_documents_annotate_ancestors_links(django_assert_num_queries):
+    """
+    Ancestors links annotated on the queryset should be used to compute the link
+    definition inherited from ancestors, unless one of the ancestors is deleted.
+    """
+    grand_parent = factories.DocumentFactory(
+        link_reach="authenticated", link_role="reader"
+    )
+    parent = factories.DocumentFactory(
+        parent=grand_parent, link_reach="restricted", link_role="editor"
+    )
+    document = factories.DocumentFactory(parent=parent, link_reach="public")
+    child = factories.DocumentFactory(parent=document)
+
+    document = models.Document.objects.annotate_ancestors_links().get(pk=document.pk)
+    assert document.ancestors_links == [
+        {"link_reach": "authenticated", "link_role": "reader"},
+        {"link_reach": "restricted", "link_role": "editor"},
+    ]
+    with django_assert_num_queries(0):
+        assert document.ancestors_link_definition == {
+            "link_reach": "authenticated",
+            "link_role": "reader",
+        }
+
+    parent.soft_delete()
+
+    child = models.Document.objects.annotate_ancestors_links().get(pk=child.pk)
+    assert len(child.ancestors_links) == 1
+    with django_assert_num_queries(0):
+        assert child.ancestors_link_definition == {
+            "link_reach": None,
+            "link_role": None,
+        }
+    assert (
+        child.ancestors_link_definition
+        == models.Document.objects.get(pk=child.pk).ancestors_link_definition
+    )
+
+
+def test_models_documents_tree(django_assert_num_queries):
+    """
+    The tree opened on a document should include its ancestors and, below the highest
+    ancestor readable by the user, their children that are not deleted.
+    """
+    user = factories.UserFactory()
+    root = factories.DocumentFactory(link_reach="restricted")
+    factories.DocumentFactory(parent=root, link_reach="public")
+    parent = factories.DocumentFactory(parent=root, link_reach="authenticated")
+    parent_sibling = factories.DocumentFactory(parent=parent)
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+    sibling = factories.DocumentFactory(parent=document)
+    deleted_sibling = factories.DocumentFactory(parent=document)
+    current = factories.DocumentFactory(parent=document)
+    child = factories.DocumentFactory(parent=current)
+    factories.DocumentFactory(parent=child)
+    factories.DocumentFactory(parent=deleted_sibling)
+    deleted_sibling.soft_delete()
+
+    with django_assert_num_queries(1):
+        tree = list(models.Document.objects.tree(current, user).order_by("path"))
+
+    assert [d.pk for d in tree] == [
+        root.pk,
+        parent.pk,
+        parent_sibling.pk,
+        document.pk,
+        sibling.pk,
+        current.pk,
+        child.pk,
+    ]
+    assert {d.highest_readable_depth for d in tree} == {parent.depth}
+
+
+def test_models_documents_tree_not_readable():
+    """No children should be included if the user can not read any of the ancestors."""
+    user = factories.UserFactory()
+    parent = factories.DocumentFactory(link_reach="restricted")
+    document = factories.DocumentFactory(parent=parent, link_reach="restricted")
+    factories.DocumentFactory(parent=parent, link_reach="public")
+
+    tree = list(models.Document.objects.tree(document, user).order_by("path"))
+
+    assert [d.pk for d in tree] == [parent.pk, document.pk]
+    assert tree[0].highest_readable_depth is None
+
+
+def test_models_documents_filter_highest_ancestors():
+    """
+    Only documents of which no ancestor is in the queryset should be kept, whatever
+    their depth and whether the ancestor in the queryset is their parent or not.
+    """
+    root = factories.DocumentFactory(title="root")
+    child = factories.DocumentFactory(parent=root, title="in")
+    grand_child = factories.DocumentFactory(parent=child, title="in")
+    great_grand_child = factories.DocumentFactory(parent=grand_child, title="in")
+    other_root = factories.DocumentFactory(title="in")
+    other_child = factories.DocumentFactory(parent=other_root)
+    other_grand_child = factories.DocumentFactory(parent=other_child, title="in")
+
+    assert set(
+        models.Document.objects.filter(title="in").filter_highest_ancestors()
+    ) == {child, other_root}
+    assert set(
+        models.Document.objects.filter(
+            pk__in=[great_grand_child.pk, other_grand_child.pk]
+        ).filter_highest_ancestors()
+    ) == {great_grand_child, other_grand_child}
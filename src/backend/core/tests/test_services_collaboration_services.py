@@ -5,15 +5,29 @@ core.services.collaboration_services module.
 
 import json
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from unittest import mock
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
 
 import pytest
 import requests
 import responses
 
-from core.services.collaboration_services import CollaborationService
+from core.services.collaboration_services import (
+    CIRCUIT_OPEN_CACHE_KEY,
+    FAILURES_CACHE_KEY,
+    CircuitOpenError,
+    CollaborationService,
+    connection_info_lookups,
+    get_session,
+)
+from core.tasks.collaboration import reset_collaboration_connections
 
 
 @pytest.fixture
@@ -183,3 +197,186 @@ def test_reset_connections_request_exception(settings):
         service.reset_connections(room, user_id)
 
     assert len(responses.calls) == 1
+
+
+def test_session_reused():
+    """Calls to the collaboration server should share one session."""
+    assert get_session() is get_session()
+
+
+@responses.activate
+def test_circuit_breaker(settings):
+    """
+    Calls should fail fast once the threshold of consecutive failures is reached,
+    until the circuit closes again after its timeout.
+    """
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD = 3
+    service = CollaborationService()
+
+    endpoint_url = "http://example.com/get-connections/"
+    responses.add(responses.GET, endpoint_url, status=503)
+
+    for _i in range(3):
+        with pytest.raises(requests.HTTPError, match="Status code: 503"):
+            service.get_document_connection_info("room1", "session")
+    assert len(responses.calls) == 3
+
+    with pytest.raises(CircuitOpenError):
+        service.get_document_connection_info("room1", "session")
+    with pytest.raises(CircuitOpenError):
+        service.reset_connections("room1")
+    assert len(responses.calls) == 3
+
+    # The circuit closes after its timeout and a success resets failures
+    cache.delete(CIRCUIT_OPEN_CACHE_KEY)
+    responses.replace(responses.GET, endpoint_url, json={"count": 1}, status=200)
+
+    assert service.get_document_connection_info("room1", "session") == (1, False)
+    assert cache.get(FAILURES_CACHE_KEY) is None
+
+
+@responses.activate
+def test_circuit_breaker_failures_expire(settings):
+    """
+    Failures should be counted during the timeout of the circuit, starting over if
+    their counter expired in the meantime.
+    """
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT = 30
+    responses.add(responses.GET, "http://example.com/get-connections/", status=503)
+
+    with (
+        mock.patch.object(cache, "add", wraps=cache.add) as mock_add,
+        pytest.raises(requests.HTTPError),
+    ):
+        CollaborationService().get_document_connection_info("room1", "session")
+    mock_add.assert_called_once_with(FAILURES_CACHE_KEY, 1, 30)
+
+    with (
+        mock.patch.object(cache, "add", return_value=False),
+        mock.patch.object(cache, "incr", side_effect=ValueError),
+        pytest.raises(requests.HTTPError),
+    ):
+        CollaborationService().get_document_connection_info("room1", "session")
+    assert cache.get(FAILURES_CACHE_KEY) == 1
+
+
+@responses.activate
+def test_circuit_breaker_not_consecutive(settings):
+    """Failures interleaved with successes should not open the circuit."""
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD = 2
+    settings.COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT = 0
+    service = CollaborationService()
+
+    endpoint_url = "http://example.com/get-connections/"
+    # Responses registered for the same URL are returned in order
+    for _i in range(3):
+        responses.add(
+            responses.GET,
+            endpoint_url,
+            body=requests.exceptions.ConnectionError("Network error"),
+        )
+        responses.add(responses.GET, endpoint_url, status=404)
+
+    for _i in range(3):
+        with pytest.raises(requests.HTTPError):
+            service.get_document_connection_info("room1", "session")
+        assert service.get_document_connection_info("room1", "session") == (0, False)
+
+    assert cache.get(CIRCUIT_OPEN_CACHE_KEY) is None
+
+
+@responses.activate
+@pytest.mark.django_db(transaction=True)
+def test_reset_connections_async(settings):
+    """
+    Connections should be reset by a celery task once the transaction is committed
+    when the asynchronous mode is enabled.
+    """
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_RESET_CONNECTIONS_ASYNC = True
+    endpoint_url = "http://example.com/reset-connections/?room=room1"
+    responses.add(responses.POST, endpoint_url, json={}, status=200)
+
+    with mock.patch.object(
+        reset_collaboration_connections,
+        "delay",
+        wraps=reset_collaboration_connections.delay,
+    ) as mock_delay:
+        with transaction.atomic():
+            CollaborationService().reset_connections("room1", "user123")
+            mock_delay.assert_not_called()
+
+    mock_delay.assert_called_once_with("room1", "user123")
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.headers.get("X-User-Id") == "user123"
+
+
+@responses.activate
+def test_get_document_connection_info_cache(settings):
+    """
+    The connection info should be cached for the session, and for any session when
+    nobody is connected to the room.
+    """
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT = 2
+    service = CollaborationService()
+
+    busy_resp = responses.get(
+        "http://example.com/get-connections/?room=busy&sessionKey=session1",
+        json={"count": 2, "exists": True},
+    )
+    other_session_resp = responses.get(
+        "http://example.com/get-connections/?room=busy&sessionKey=session2",
+        json={"count": 2, "exists": False},
+    )
+    empty_resp = responses.get(
+        "http://example.com/get-connections/?room=empty&sessionKey=session1",
+        json={"count": 0, "exists": False},
+    )
+
+    for _i in range(2):
+        assert service.get_document_connection_info("busy", "session1") == (2, True)
+        assert service.get_document_connection_info("busy", "session2") == (2, False)
+        assert service.get_document_connection_info("empty", "session1") == (0, False)
+        assert service.get_document_connection_info("empty", "session2") == (0, False)
+
+    assert busy_resp.call_count == 1
+    assert other_session_resp.call_count == 1
+    assert empty_resp.call_count == 1
+
+    settings.COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT = 0
+    assert service.get_document_connection_info("busy", "session1") == (2, True)
+    assert busy_resp.call_count == 2
+
+
+def test_get_document_connection_info_coalesced(settings):
+    """Concurrent lookups of the same connection info should share a single call."""
+    settings.COLLABORATION_API_URL = "http://example.com/"
+    settings.COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT = 0
+    service = CollaborationService()
+    released = threading.Event()
+
+    def fetch(_room, _session_key):
+        released.wait(timeout=5)
+        return 1, True
+
+    with mock.patch.object(
+        CollaborationService, "fetch_document_connection_info", side_effect=fetch
+    ) as mock_fetch:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = [
+                executor.submit(service.get_document_connection_info, "room", "key")
+                for _i in range(4)
+            ]
+            while not connection_info_lookups:
+                time.sleep(0.01)
+            time.sleep(0.1)
+            released.set()
+
+        assert [result.result() for result in results] == [(1, True)] * 4
+
+    assert mock_fetch.call_count == 1
+    assert not connection_info_lookups
@@ -1,5 +1,6 @@
 """Test converter services."""
 
+import asyncio
 from base64 import b64decode
 from unittest.mock import MagicMock, patch
 
@@ -7,12 +8,22 @@ import pytest
 import requests
 
 from core.services.converter_services import (
+    AsyncYdocConverter,
+    ConversionError,
     ServiceUnavailableError,
     ValidationError,
     YdocConverter,
+    get_session,
 )
 
 
+@pytest.fixture(autouse=True)
+def mock_sleep():
+    """Don't wait before retrying conversions."""
+    with patch("core.services.converter_services.time.sleep") as mock:
+        yield mock
+
+
 def test_auth_header(settings):
     """Test authentication header generation."""
     settings.Y_PROVIDER_API_KEY = "test-key"
@@ -27,7 +38,7 @@ def test_convert_empty_text():
         converter.convert("")
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_convert_service_unavailable(mock_post):
     """Should raise ServiceUnavailableError when service is unavailable."""
     converter = YdocConverter()
@@ -40,8 +51,10 @@ def test_convert_service_unavailable(mock_post):
     ):
         converter.convert("test text")
 
+    assert mock_post.call_count == 3
+
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_convert_http_error(mock_post):
     """Should raise ServiceUnavailableError when HTTP error occurs."""
     converter = YdocConverter()
@@ -57,7 +70,38 @@ def test_convert_http_error(mock_post):
         converter.convert("test text")
 
 
-@patch("requests.post")
+@pytest.mark.parametrize("status_code", [400, 401, 413])
+@patch("requests.Session.post")
+def test_convert_client_error_not_retried(mock_post, status_code):
+    """Client errors are permanent and should not be retried."""
+    mock_response = requests.Response()
+    mock_response.status_code = status_code
+    mock_post.return_value = mock_response
+
+    with pytest.raises(ConversionError) as excinfo:
+        YdocConverter().convert("test text")
+
+    assert not isinstance(excinfo.value, ServiceUnavailableError)
+    assert str(excinfo.value) == (
+        f"Conversion service refused the request: {status_code:d}"
+    )
+    assert mock_post.call_count == 1
+
+
+@patch("requests.Session.post")
+def test_convert_server_error_retried(mock_post):
+    """Server errors should be retried until the service is considered unavailable."""
+    mock_response = requests.Response()
+    mock_response.status_code = 503
+    mock_post.return_value = mock_response
+
+    with pytest.raises(ServiceUnavailableError):
+        YdocConverter().convert("test text")
+
+    assert mock_post.call_count == 3
+
+
+@patch("requests.Session.post")
 def test_convert_full_integration(mock_post, settings):
     """Test full integration with all settings."""
 
@@ -90,7 +134,7 @@ def test_convert_full_integration(mock_post, settings):
     )
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_convert_timeout(mock_post):
     """Should raise ServiceUnavailableError when request times out."""
     converter = YdocConverter()
@@ -110,3 +154,93 @@ def test_convert_none_input():
 
     with pytest.raises(ValidationError, match="Input text cannot be empty"):
         converter.convert(None)
+
+
+def test_convert_session_reused():
+    """Conversions should share one session keeping connections alive."""
+    assert get_session() is get_session()
+    pool_manager = get_session().get_adapter("http://test.com/").poolmanager
+    assert pool_manager.connection_pool_kw["maxsize"] == 10
+
+
+@patch("requests.Session.post")
+def test_convert_retry_backoff(
+    mock_post,
+    mock_sleep,  # pylint: disable=redefined-outer-name
+    settings,
+):
+    """Conversions should be retried with an exponential backoff."""
+    settings.CONVERSION_API_RETRIES = 3
+    settings.CONVERSION_API_RETRY_BACKOFF = 0.5
+
+    mock_response = MagicMock()
+    mock_response.content = b"converted content"
+    mock_post.side_effect = [
+        requests.ConnectionError("Connection error"),
+        requests.ConnectionError("Connection error"),
+        mock_response,
+    ]
+
+    result = YdocConverter().convert("test text")
+
+    assert b64decode(result) == b"converted content"
+    assert mock_post.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0]
+
+
+@patch("requests.Session.post")
+def test_convert_cache(mock_post, settings):
+    """Converted contents should be cached by their Markdown text."""
+    mock_response = MagicMock()
+    mock_response.content = b"converted content"
+    mock_post.return_value = mock_response
+
+    converter = YdocConverter()
+    assert converter.convert("test text") == converter.convert("test text")
+    assert mock_post.call_count == 1
+
+    converter.convert("other text")
+    assert mock_post.call_count == 2
+
+    settings.CONVERSION_CACHE_MAX_SIZE = 0
+    converter.convert("another text")
+    converter.convert("another text")
+    assert mock_post.call_count == 4
+
+
+@patch("requests.Session.post")
+def test_convert_many(mock_post):
+    """Texts should be converted concurrently and returned in order."""
+
+    def post(_url, data, **_kwargs):
+        mock_response = MagicMock()
+        mock_response.content = f"converted {data:s}".encode()
+        return mock_response
+
+    mock_post.side_effect = post
+    texts = [f"text {i:d}" for i in range(10)]
+
+    results = YdocConverter().convert_many(texts, max_workers=3)
+
+    assert [b64decode(result).decode() for result in results] == [
+        f"converted {text:s}" for text in texts
+    ]
+
+
+@patch("requests.Session.post")
+def test_convert_many_async(mock_post):
+    """The asyncio variant should convert texts concurrently and in order."""
+
+    def post(_url, data, **_kwargs):
+        mock_response = MagicMock()
+        mock_response.content = f"converted {data:s}".encode()
+        return mock_response
+
+    mock_post.side_effect = post
+    texts = [f"text {i:d}" for i in range(10)]
+
+    results = asyncio.run(AsyncYdocConverter().convert_many(texts))
+
+    assert [b64decode(result).decode() for result in results] == [
+        f"converted {text:s}" for text in texts
+    ]
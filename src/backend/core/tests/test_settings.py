@@ -28,3 +28,23 @@ def test_invalid_settings_oidc_email_configuration():
         "Both OIDC_FALLBACK_TO_EMAIL_FOR_IDENTIFICATION and "
         "OIDC_ALLOW_DUPLICATE_EMAILS cannot be set to True simultaneously. "
     )
+
+
+@pytest.mark.parametrize("timeout", [-1, 900])
+def test_invalid_settings_media_auth_signature_cache_timeout(timeout):
+    """
+    Signed headers should not be reused beyond the 15 minutes object storage allows.
+    """
+
+    class TestSettings(Base):
+        """Fake test settings."""
+
+        MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT = timeout
+
+    with pytest.raises(ValueError) as excinfo:
+        TestSettings().post_setup()
+
+    assert str(excinfo.value) == (
+        "MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT must be between 0 and 899 seconds "
+        "so that headers are used within the 15 minutes object storage allows."
+    )
@@ -0,0 +1,76 @@
+"""Test the object storage backend of the impress core app."""
+
+from unittest import mock
+
+from django.core.files.storage import default_storage
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+
+from core.storage import S3Storage
+
+
+def test_storage_client_config(settings):
+    """The client and transfers should be configured from settings."""
+    settings.AWS_S3_MAX_POOL_CONNECTIONS = 20
+    settings.AWS_S3_TCP_KEEPALIVE = True
+    settings.AWS_S3_CONNECT_TIMEOUT = 2
+    settings.AWS_S3_READ_TIMEOUT = 10
+    settings.AWS_S3_RETRY_MODE = "adaptive"
+    settings.AWS_S3_MAX_ATTEMPTS = 5
+    settings.AWS_S3_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+    settings.AWS_S3_MULTIPART_CHUNKSIZE = 4 * 1024 * 1024
+    settings.AWS_S3_MAX_CONCURRENCY = 4
+
+    storage = S3Storage()
+
+    client_config = storage.connection.meta.client.meta.config
+    assert client_config.max_pool_connections == 20
+    assert client_config.tcp_keepalive is True
+    assert client_config.connect_timeout == 2
+    assert client_config.read_timeout == 10
+    assert client_config.retries == {"mode": "adaptive", "total_max_attempts": 5}
+    assert storage.transfer_config.multipart_threshold == 16 * 1024 * 1024
+    assert storage.transfer_config.multipart_chunksize == 4 * 1024 * 1024
+    assert storage.transfer_config.max_request_concurrency == 4
+    assert storage.transfer_config.use_threads is True
+
+
+@mock.patch("core.storage.logger.debug")
+def test_storage_latency_logged(mock_debug, settings):
+    """The latency of each call to object storage should be logged if enabled."""
+    settings.AWS_S3_LOG_LATENCY = True
+
+    S3Storage().connection.meta.client.head_bucket(Bucket=default_storage.bucket_name)
+
+    mock_debug.assert_called_once()
+    message, operation, status_code, duration = mock_debug.call_args.args
+    assert message == "S3 %s returned %d in %.3fs"
+    assert operation == "HeadBucket"
+    assert status_code == 200
+    assert duration > 0
+
+
+@mock.patch("core.storage.logger.debug")
+def test_storage_latency_not_logged(mock_debug, settings):
+    """The latency of calls to object storage should not be logged by default."""
+    settings.AWS_S3_LOG_LATENCY = False
+
+    S3Storage().connection.meta.client.head_bucket(Bucket=default_storage.bucket_name)
+
+    mock_debug.assert_not_called()
+
+
+@mock.patch("core.storage.logger.warning")
+def test_storage_failure_logged(mock_warning, settings):
+    """Calls to object storage failing without response should be logged."""
+    settings.AWS_S3_MAX_ATTEMPTS = 1
+    storage = S3Storage(endpoint_url="http://127.0.0.1:1")
+
+    with pytest.raises(EndpointConnectionError):
+        storage.connection.meta.client.head_bucket(Bucket=default_storage.bucket_name)
+
+    mock_warning.assert_called_once()
+    message, operation, _duration, _exception = mock_warning.call_args.args
+    assert message == "S3 %s failed after %.3fs: %s"
+    assert operation == "HeadBucket"
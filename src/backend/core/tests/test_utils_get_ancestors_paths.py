@@ -0,0 +1,56 @@
+"""
+Unit tests for the get_ancestors_paths utility function and its SQL counterpart.
+"""
+
+from django.db import models
+
+import pytest
+
+from core import factories
+from core.models import AncestorsPaths, Document
+from core.utils import get_ancestors_paths
+
+
+def test_utils_get_ancestors_paths():
+    """The paths of the ancestors should be the prefixes of the path, root first."""
+    assert get_ancestors_paths("000100020003", 4) == [
+        "0001",
+        "00010002",
+        "000100020003",
+    ]
+
+
+def test_utils_get_ancestors_paths_exclude_self():
+    """The path itself should not be included if `include_self` is False."""
+    assert get_ancestors_paths("000100020003", 4, include_self=False) == [
+        "0001",
+        "00010002",
+    ]
+
+
+def test_utils_get_ancestors_paths_root():
+    """A root should have no ancestors other than itself."""
+    assert get_ancestors_paths("0001", 4) == ["0001"]
+    assert get_ancestors_paths("0001", 4, include_self=False) == []
+
+
+@pytest.mark.django_db
+def test_utils_get_ancestors_paths_sql():
+    """
+    The AncestorsPaths expression should select the same documents as the explicit
+    list of paths of their ancestors.
+    """
+    root = factories.DocumentFactory()
+    parent = factories.DocumentFactory(parent=root)
+    document = factories.DocumentFactory(parent=parent)
+    factories.DocumentFactory(parent=parent)
+    factories.DocumentFactory()
+
+    ancestors = Document.objects.filter(
+        path__in=AncestorsPaths(
+            models.Value(document.path), Document.steplen, max_length=252
+        )
+    ).order_by("path")
+
+    assert list(ancestors) == [root, parent, document]
+    assert [d.path for d in ancestors] == document.get_ancestors_paths()
@@ -48,6 +48,27 @@ def filter_descendants(paths, root_paths, skip_sorting=False):
     return results
 
 
+def get_ancestors_paths(path, steplen, include_self=True):
+    """
+    Expands the materialized path of a node into the paths of its ancestors.
+
+    All the steps of a materialized path having the same length, the paths of the
+    ancestors of a node are the prefixes of its path with a length multiple of the
+    step length. Looking them up with an explicit list of paths allows using the index
+    on the path column instead of comparing each row with a prefix of the node's path.
+
+    Args:
+        path (str): The materialized path of the node.
+        steplen (int): The length of each step in the path.
+        include_self (bool): If True, the path of the node itself is included.
+
+    Returns:
+        list of str: The paths of the ancestors sorted from the root down.
+    """
+    stop = len(path) + 1 if include_self else len(path)
+    return [path[:index] for index in range(steplen, stop, steplen)]
+
+
 def base64_yjs_to_xml(base64_string):
     """Extract xml from base64 yjs document."""
 
@@ -112,7 +112,7 @@ class Base(Configuration):
 
     STORAGES = {
         "default": {
-            "BACKEND": "storages.backends.s3.S3Storage",
+            "BACKEND": "core.storage.S3Storage",
         },
         "staticfiles": {
             "BACKEND": values.Value(
@@ -141,12 +141,72 @@ class Base(Configuration):
         environ_prefix=None,
     )
 
+    # Client of object storage (see core.storage.S3Storage)
+    AWS_S3_MAX_POOL_CONNECTIONS = values.PositiveIntegerValue(
+        50, environ_name="AWS_S3_MAX_POOL_CONNECTIONS", environ_prefix=None
+    )
+    AWS_S3_TCP_KEEPALIVE = values.BooleanValue(
+        True, environ_name="AWS_S3_TCP_KEEPALIVE", environ_prefix=None
+    )
+    AWS_S3_CONNECT_TIMEOUT = values.FloatValue(
+        5, environ_name="AWS_S3_CONNECT_TIMEOUT", environ_prefix=None
+    )
+    AWS_S3_READ_TIMEOUT = values.FloatValue(
+        30, environ_name="AWS_S3_READ_TIMEOUT", environ_prefix=None
+    )
+    AWS_S3_RETRY_MODE = values.Value(
+        "standard", environ_name="AWS_S3_RETRY_MODE", environ_prefix=None
+    )
+    AWS_S3_MAX_ATTEMPTS = values.PositiveIntegerValue(
+        3, environ_name="AWS_S3_MAX_ATTEMPTS", environ_prefix=None
+    )
+    # Files larger than the threshold are uploaded in parts, concurrently
+    AWS_S3_MULTIPART_THRESHOLD = values.PositiveIntegerValue(
+        8 * 1024 * 1024, environ_name="AWS_S3_MULTIPART_THRESHOLD", environ_prefix=None
+    )
+    AWS_S3_MULTIPART_CHUNKSIZE = values.PositiveIntegerValue(
+        8 * 1024 * 1024, environ_name="AWS_S3_MULTIPART_CHUNKSIZE", environ_prefix=None
+    )
+    AWS_S3_MAX_CONCURRENCY = values.PositiveIntegerValue(
+        10, environ_name="AWS_S3_MAX_CONCURRENCY", environ_prefix=None
+    )
+    # Log the latency of each call to object storage at debug level
+    AWS_S3_LOG_LATENCY = values.BooleanValue(
+        False, environ_name="AWS_S3_LOG_LATENCY", environ_prefix=None
+    )
+
     # Document images
     DOCUMENT_IMAGE_MAX_SIZE = values.Value(
         10 * (2**20),  # 10MB
         environ_name="DOCUMENT_IMAGE_MAX_SIZE",
         environ_prefix=None,
     )
+    # Number of seconds during which the urls issued to upload an attachment directly
+    # to object storage are valid
+    DOCUMENT_ATTACHMENT_UPLOAD_EXPIRATION = values.PositiveIntegerValue(
+        3600,
+        environ_name="DOCUMENT_ATTACHMENT_UPLOAD_EXPIRATION",
+        environ_prefix=None,
+    )
+
+    # Number of seconds during which the decisions to serve an attachment to a user
+    # and the processing status of the attachment are cached. They are invalidated
+    # when accesses or link settings change. Nothing is cached when set to 0, the
+    # default.
+    MEDIA_AUTH_CACHE_TIMEOUT = values.IntegerValue(
+        0,
+        environ_name="MEDIA_AUTH_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
+
+    # Number of seconds during which the headers signed to serve an attachment are
+    # reused by each process, dated from the start of the window. It must stay below
+    # the 15 minutes object storage allows. Headers are signed each time when 0.
+    MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT = values.IntegerValue(
+        0,
+        environ_name="MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
 
     DOCUMENT_UNSAFE_MIME_TYPES = [
         # Executable Files
@@ -224,6 +284,67 @@ class Base(Configuration):
     # Document versions
     DOCUMENT_VERSIONS_PAGE_SIZE = 50
 
+    # Maximum size in bytes of the contents of documents cached in each process,
+    # and number of seconds during which they are also shared between processes
+    # (contents are only cached in each process when set to 0)
+    DOCUMENT_CONTENT_CACHE_MAX_SIZE = values.IntegerValue(
+        32 * 1024 * 1024,
+        environ_name="DOCUMENT_CONTENT_CACHE_MAX_SIZE",
+        environ_prefix=None,
+    )
+    DOCUMENT_CONTENT_CACHE_TIMEOUT = values.IntegerValue(
+        0,
+        environ_name="DOCUMENT_CONTENT_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
+
+    # Upload contents of documents to object storage from celery workers, after the
+    # document is saved, instead of during the request. Successive saves of a document
+    # within the delay (in seconds) are coalesced in a single upload.
+    DOCUMENT_CONTENT_WRITE_BEHIND = values.BooleanValue(
+        False,
+        environ_name="DOCUMENT_CONTENT_WRITE_BEHIND",
+        environ_prefix=None,
+    )
+    DOCUMENT_CONTENT_WRITE_BEHIND_DELAY = values.IntegerValue(
+        2,
+        environ_name="DOCUMENT_CONTENT_WRITE_BEHIND_DELAY",
+        environ_prefix=None,
+    )
+    # Seconds after which the upload of a content that was not completed is considered
+    # abandoned, e.g. by a worker that was stopped, and the content uploaded again.
+    DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT = values.IntegerValue(
+        300,
+        environ_name="DOCUMENT_CONTENT_WRITE_BEHIND_CLAIM_TIMEOUT",
+        environ_prefix=None,
+    )
+
+    # Bulk imports of documents are created by batches, converting and uploading the
+    # contents of each batch with a bounded number of concurrent workers.
+    DOCUMENT_IMPORT_BATCH_SIZE = values.PositiveIntegerValue(
+        100,
+        environ_name="DOCUMENT_IMPORT_BATCH_SIZE",
+        environ_prefix=None,
+    )
+    DOCUMENT_IMPORT_CONVERSION_WORKERS = values.PositiveIntegerValue(
+        8,
+        environ_name="DOCUMENT_IMPORT_CONVERSION_WORKERS",
+        environ_prefix=None,
+    )
+    DOCUMENT_IMPORT_UPLOAD_WORKERS = values.PositiveIntegerValue(
+        8,
+        environ_name="DOCUMENT_IMPORT_UPLOAD_WORKERS",
+        environ_prefix=None,
+    )
+
+    # Number of seconds during which the role of a user on a document is shared
+    # between requests. Roles are only cached per request when set to 0.
+    DOCUMENT_ROLES_CACHE_TIMEOUT = values.IntegerValue(
+        0,
+        environ_name="DOCUMENT_ROLES_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
+
     # Internationalization
     # https://docs.djangoproject.com/en/3.1/topics/i18n/
 
@@ -292,6 +413,7 @@ class Base(Configuration):
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "core.middleware.ForceSessionMiddleware",
+        "core.middleware.RequestRolesCacheMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "dockerflow.django.middleware.DockerflowMiddleware",
         "csp.middleware.CSPMiddleware",
@@ -429,6 +551,33 @@ class Base(Configuration):
         environ_name="COLLABORATION_WS_NOT_CONNECTED_READY_ONLY",
         environ_prefix=None,
     )
+    COLLABORATION_API_TIMEOUT = values.PositiveIntegerValue(
+        10, environ_name="COLLABORATION_API_TIMEOUT", environ_prefix=None
+    )
+    # Calls to the collaboration server fail fast during the timeout (in seconds) once
+    # the threshold of consecutive failures is reached
+    COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD = values.PositiveIntegerValue(
+        5,
+        environ_name="COLLABORATION_API_CIRCUIT_BREAKER_THRESHOLD",
+        environ_prefix=None,
+    )
+    COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT = values.PositiveIntegerValue(
+        30,
+        environ_name="COLLABORATION_API_CIRCUIT_BREAKER_TIMEOUT",
+        environ_prefix=None,
+    )
+    # Number of seconds during which the connection info of rooms is cached
+    COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT = values.IntegerValue(
+        2,
+        environ_name="COLLABORATION_CONNECTION_INFO_CACHE_TIMEOUT",
+        environ_prefix=None,
+    )
+    # Reset connections from celery workers instead of during requests
+    COLLABORATION_RESET_CONNECTIONS_ASYNC = values.BooleanValue(
+        False,
+        environ_name="COLLABORATION_RESET_CONNECTIONS_ASYNC",
+        environ_prefix=None,
+    )
 
     # Frontend
     FRONTEND_THEME = values.Value(
@@ -474,6 +623,8 @@ class Base(Configuration):
     # Celery
     CELERY_BROKER_URL = values.Value("redis://redis:6379/0")
     CELERY_BROKER_TRANSPORT_OPTIONS = values.DictValue({})
+    # Task modules that are not imported by the modules loaded at startup
+    CELERY_IMPORTS = ["core.tasks.collaboration", "core.tasks.documents"]
 
     # Session
     SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -660,6 +811,34 @@ class Base(Configuration):
         environ_name="CONVERSION_API_SECURE",
         environ_prefix=None,
     )
+    # Connections kept alive to the conversion service, concurrent conversions of
+    # batches and retries with an exponential backoff (in seconds) when unavailable
+    CONVERSION_API_POOL_SIZE = values.PositiveIntegerValue(
+        default=10,
+        environ_name="CONVERSION_API_POOL_SIZE",
+        environ_prefix=None,
+    )
+    CONVERSION_API_MAX_CONCURRENCY = values.PositiveIntegerValue(
+        default=4,
+        environ_name="CONVERSION_API_MAX_CONCURRENCY",
+        environ_prefix=None,
+    )
+    CONVERSION_API_RETRIES = values.IntegerValue(
+        default=2,
+        environ_name="CONVERSION_API_RETRIES",
+        environ_prefix=None,
+    )
+    CONVERSION_API_RETRY_BACKOFF = values.FloatValue(
+        default=0.5,
+        environ_name="CONVERSION_API_RETRY_BACKOFF",
+        environ_prefix=None,
+    )
+    # Maximum size in bytes of the converted contents cached in each process
+    CONVERSION_CACHE_MAX_SIZE = values.IntegerValue(
+        default=8 * 1024 * 1024,
+        environ_name="CONVERSION_CACHE_MAX_SIZE",
+        environ_prefix=None,
+    )
 
     NO_WEBSOCKET_CACHE_TIMEOUT = values.Value(
         default=120,
@@ -827,6 +1006,13 @@ class Base(Configuration):
                 "OIDC_ALLOW_DUPLICATE_EMAILS cannot be set to True simultaneously. "
             )
 
+        # Object storage refuses requests signed more than 15 minutes before
+        if not 0 <= cls.MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT < 900:
+            raise ValueError(
+                "MEDIA_AUTH_SIGNATURE_CACHE_TIMEOUT must be between 0 and 899 seconds "
+                "so that headers are used within the 15 minutes object storage allows."
+            )
+
 
 class Build(Base):
     """Settings used when the application is built.